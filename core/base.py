@@ -13,12 +13,19 @@
 #  * See the License for the specific language governing permissions and
 #  * limitations under the License.
 
+# Built-in Imports
+import json
+
 # Third-party Imports
 from boto import exception
 
 # Cloudify imports
 from ec2 import utils as ec2_utils
 from ec2 import constants
+from ec2 import retry
+from ec2 import inventory
+from ec2 import tagging
+from ec2 import fastdescribe
 from vpc import constants as vpc_constants
 from vpc import connection
 from cloudify.exceptions import NonRecoverableError, RecoverableError
@@ -33,10 +40,17 @@ class AwsBase(object):
         self.client = \
             client if client else connection.VPCConnectionClient().client()
 
-    def execute(self, fn, args=None, raise_on_falsy=False):
+    def execute(self, fn, args=None, raise_on_falsy=False,
+                retry_not_found=False):
+        """ Calls fn with retry.execute_with_retry.
+
+        :param retry_not_found: Retries *.NotFound, for calls that refer to
+        resources created right before, which AWS may not know yet.
+        """
 
         try:
-            output = fn(**args) if args else fn()
+            output = retry.execute_with_retry(
+                fn, args, retry_not_found=retry_not_found)
         except (exception.EC2ResponseError,
                 exception.BotoServerError) as e:
             raise NonRecoverableError('{0}'.format(str(e)))
@@ -47,12 +61,25 @@ class AwsBase(object):
 
         return output
 
+    def iterate(self, resources):
+        """ Yields from a pagination iterator and raises its Boto errors
+        as NonRecoverableError, like execute.
+        """
+
+        try:
+            for resource in resources:
+                yield resource
+        except (exception.EC2ResponseError,
+                exception.BotoServerError) as e:
+            raise NonRecoverableError('{0}'.format(str(e)))
+
     def get_and_filter_resources_by_matcher(
             self, filter_function, filters,
             not_found_token='NotFound'):
 
         try:
-            list_of_matching_resources = filter_function(**filters)
+            list_of_matching_resources = retry.execute_with_retry(
+                filter_function, filters)
         except exception.EC2ResponseError as e:
             if not_found_token in str(e):
                 return []
@@ -65,16 +92,23 @@ class AwsBase(object):
     def filter_for_single_resource(self, filter_function,
                                    filters,
                                    not_found_token='NotFound'):
+        """ Looks up one resource by the ID in filters, such as
+        {'vpc_ids': 'vpc-0123abcd'}. No API call is made without an ID,
+        because an empty ID filter lists every resource in the region.
+        """
+
+        resource_id = filters.values()[0] if filters else None
+
+        if not resource_id:
+            return None
 
         resources = self.get_and_filter_resources_by_matcher(
             filter_function, filters, not_found_token)
 
-        if resources:
-            for resource in resources:
-                if resource.id == filters.values()[0]:
-                    return resource
+        return self.index_resources_by_id(resources).get(resource_id)
 
-        return None
+    def index_resources_by_id(self, resources):
+        return dict((resource.id, resource) for resource in resources or [])
 
     def get_related_targets_and_types(self, relationships):
         """
@@ -248,6 +282,9 @@ class AwsBaseNode(AwsBase):
             ctx.node.properties['resource_id']
         self.is_external_resource = \
             ctx.node.properties['use_external_resource']
+        self.trusted_resource_id = \
+            vpc_constants.TRUST_RUNTIME_RESOURCE_IDS and \
+            constants.EXTERNAL_RESOURCE_ID in ctx.instance.runtime_properties
         self.required_properties = required_properties
         self.get_all_handler = {'function': dummy, 'argument': ''}
         self.not_found_error = ''
@@ -256,7 +293,9 @@ class AwsBaseNode(AwsBase):
         """ This validates all VPC Nodes before bootstrap.
         """
 
-        resource = self.get_resource()
+        resource = inventory.get_resource(
+            self.aws_resource_type, self.resource_id,
+            self.describe_for_lookup)
 
         for property_key in self.required_properties:
             ec2_utils.validate_node_property(
@@ -296,7 +335,7 @@ class AwsBaseNode(AwsBase):
         if not self.is_external_resource:
             return False
 
-        if not self.get_resource():
+        if not self.resource_exists():
             self.raise_forbidden_external_resource(self.resource_id)
 
         ctx.logger.info(
@@ -316,16 +355,35 @@ class AwsBaseNode(AwsBase):
             .format(self.aws_resource_type,
                     self.cloudify_node_instance_id))
 
-        if not self.get_resource():
+        if not self.trusted_resource_id and not self.resource_exists():
             self.raise_forbidden_external_resource(self.resource_id)
 
-        if self.delete_external_resource_naively() or self.delete():
+        if self.delete_external_resource_naively() or \
+                self.execute_with_trusted_id(self.delete):
             return self.post_delete()
 
         raise NonRecoverableError(
             'Neither external resource, nor Cloudify resource, '
             'unable to delete this resource.')
 
+    def execute_with_trusted_id(self, fn):
+        """ Calls fn, which mutates the resource.
+
+        A trusted resource ID was taken from the aws_resource_id runtime
+        property and was not verified first. So the resource is only
+        looked up if fn fails with NotFound.
+        """
+
+        if not self.trusted_resource_id:
+            return fn()
+
+        try:
+            return fn()
+        except NonRecoverableError as e:
+            if 'NotFound' in str(e) and not self.resource_exists():
+                self.raise_forbidden_external_resource(self.resource_id)
+            raise
+
     def delete_external_resource_naively(self):
 
         if not self.is_external_resource:
@@ -339,15 +397,25 @@ class AwsBaseNode(AwsBase):
 
         return True
 
-    def get_all_matching(self, list_of_ids=None):
+    def iterate_matching(self, list_of_ids=None):
+        """ Yields the resources with the given IDs, describing a page of
+        IDs per call, so that a caller that found what it needs does not
+        describe the rest.
+        """
 
-        matches = self.get_and_filter_resources_by_matcher(
-            self.get_all_handler['function'],
-            {self.get_all_handler['argument']: list_of_ids},
-            not_found_token=self.not_found_error
-        )
+        list_of_ids = list_of_ids or []
+        page_size = constants.PAGE_SIZE
 
-        return matches
+        for start in range(0, len(list_of_ids), page_size):
+            for resource in self.get_and_filter_resources_by_matcher(
+                    self.get_all_handler['function'],
+                    {self.get_all_handler['argument']:
+                        list_of_ids[start:start + page_size]},
+                    not_found_token=self.not_found_error) or []:
+                yield resource
+
+    def get_all_matching(self, list_of_ids=None):
+        return list(self.iterate_matching(list_of_ids))
 
     def get_resource(self):
 
@@ -359,10 +427,37 @@ class AwsBaseNode(AwsBase):
 
         return resource
 
+    def describe_for_lookup(self, resource_ids):
+        """ Describes resources only to find out whether they exist. With
+        AWS_FAST_DESCRIBE set, the resource types that fastdescribe knows
+        are parsed into records with only an id and a state.
+        """
+
+        if fastdescribe.is_enabled() and self.aws_resource_type in \
+                fastdescribe.RESOURCE_DESCRIBE_ACTIONS:
+            return fastdescribe.describe_resources(
+                self.client, self.aws_resource_type, resource_ids)
+
+        return self.get_all_handler['function'](
+            **{self.get_all_handler['argument']: resource_ids})
+
+    def resource_exists(self):
+
+        return self.filter_for_single_resource(
+            self.describe_for_lookup,
+            {'resource_ids': self.resource_id},
+            not_found_token=self.not_found_error
+        ) is not None
+
     def post_create(self):
 
         ec2_utils.set_external_resource_id(self.resource_id, ctx.instance)
 
+        # the ID is saved first, so that a resource that could not be
+        # tagged is still deleted on uninstall
+        if not self.is_external_resource:
+            tagging.tag_resource(self.resource_id)
+
         ctx.logger.info(
             'Added {0} {1} to Cloudify.'
             .format(self.aws_resource_type, self.resource_id))
@@ -430,12 +525,14 @@ class RouteMixin(object):
                                                  route_to_create)
         return True
 
+    def get_routes_collection(self, route_table_ctx_instance):
+        return ec2_utils.get_runtime_property_collection(
+            route_table_ctx_instance, 'routes',
+            key=lambda route: json.dumps(route, sort_keys=True))
+
     def add_route_to_runtime_properties(self,
                                         route_table_ctx_instance, route):
-        if 'routes' not in \
-                route_table_ctx_instance.runtime_properties.keys():
-            route_table_ctx_instance.runtime_properties['routes'] = []
-        route_table_ctx_instance.runtime_properties['routes'].append(route)
+        self.get_routes_collection(route_table_ctx_instance).add(route)
 
     def delete_route(self, route_table_id,
                      route, route_table_ctx_instance=None):
@@ -464,5 +561,4 @@ class RouteMixin(object):
 
     def remove_route_from_runtime_properties(
             self, route_table_ctx_instance, route):
-        if route in route_table_ctx_instance.runtime_properties['routes']:
-            route_table_ctx_instance.runtime_properties['routes'].remove(route)
+        self.get_routes_collection(route_table_ctx_instance).remove(route)
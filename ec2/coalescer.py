@@ -0,0 +1,121 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+# Built-in Imports
+import threading
+
+# Cloudify imports
+from ec2 import constants
+
+
+class _Batch(object):
+
+    def __init__(self):
+        self.items = []
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.results = {}
+        self.error = None
+
+
+class Coalescer(object):
+    """Serves single-item requests made concurrently by several operations
+    with one batched API call.
+
+    The first caller of a group becomes the leader of a batch. If other
+    callers are in flight, the leader waits up to window seconds (or until
+    the batch is full) for them to join, then calls batch_function once
+    for every item in the batch and hands each caller its own result.
+    A caller that is alone does not wait at all, unless always_wait is set
+    because the other callers are expected to arrive shortly after it.
+
+    Batches are kept in memory, so only the operations that run as threads
+    of the same process are batched together. Operations that run in other
+    worker processes make calls of their own.
+    """
+
+    def __init__(self, batch_function,
+                 window=constants.COALESCE_WINDOW,
+                 max_batch_size=constants.COALESCE_MAX_BATCH_SIZE,
+                 always_wait=False):
+        """
+        :param batch_function: Called as batch_function(group, items). It
+        returns a dict mapping every item it found to its result.
+        :param window: Seconds a leader waits for other callers to join.
+        :param max_batch_size: Maximum items sent in a single batch.
+        :param always_wait: Whether a leader waits for the window even when
+        no other caller is in flight.
+        """
+
+        self.batch_function = batch_function
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.always_wait = always_wait
+        self._pending = {}
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def submit(self, group, item):
+        """Returns the result of item, batched with concurrent requests.
+
+        :param group: Items are only batched with items of the same group,
+        for example the same account and region.
+        :param item: The item to look up, for example an instance ID.
+        :returns the result for item, or None if it was not found.
+        :raises whatever batch_function raised for the batch.
+        """
+
+        with self._lock:
+            self._active += 1
+            batch = self._pending.get(group)
+            is_leader = batch is None
+            if is_leader:
+                batch = self._pending[group] = _Batch()
+            batch.items.append(item)
+            if len(batch.items) >= self.max_batch_size:
+                self._close(group, batch)
+            should_wait = self.always_wait or self._active > 1
+
+        try:
+            if is_leader:
+                if should_wait:
+                    batch.full.wait(self.window)
+                with self._lock:
+                    self._close(group, batch)
+                self._run(group, batch)
+            else:
+                batch.done.wait()
+        finally:
+            with self._lock:
+                self._active -= 1
+
+        if batch.error:
+            raise batch.error
+
+        return batch.results.get(item)
+
+    def _close(self, group, batch):
+        if self._pending.get(group) is batch:
+            del self._pending[group]
+        batch.full.set()
+
+    def _run(self, group, batch):
+        try:
+            batch.results = self.batch_function(
+                group, list(set(batch.items))) or {}
+        except Exception as e:
+            batch.error = e
+        finally:
+            batch.done.set()
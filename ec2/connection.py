@@ -15,7 +15,12 @@
 
 # Builtin Imports
 import os
+import json
+import time
+import hashlib
+import threading
 import ConfigParser
+from collections import OrderedDict
 
 # Third-party Imports
 from boto.ec2 import get_region
@@ -26,10 +31,110 @@ from boto.ec2.elb import connect_to_region as connect_to_elb_region
 
 # Cloudify Imports
 from ec2 import utils
+from ec2 import metrics
+from ec2 import ratelimit
 from ec2 import constants
 from cloudify.exceptions import NonRecoverableError
 
 
+class ConnectionRegistry(object):
+    """A process-wide cache of boto connections.
+
+    Connections are keyed by a hash of the aws_config they were built from,
+    so every module asking for a client with the same configuration gets the
+    same connection object back and reuses its keep-alive HTTPS connections.
+    Boto connections are not thread safe, so a connection is never handed
+    to a thread other than the one that created it.
+    """
+
+    def __init__(self,
+                 max_size=constants.CONNECTION_CACHE_MAX_SIZE,
+                 idle_timeout=constants.CONNECTION_CACHE_IDLE_TIMEOUT):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._connections = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, factory):
+        """Returns the cached connection for key, creating it if needed.
+
+        :param key: A hashable identifying the connection configuration.
+        :param factory: A callable that returns a new connection.
+        :returns a boto connection object.
+        """
+
+        key = (threading.current_thread().ident, key)
+
+        with self._lock:
+            self._evict_idle()
+            entry = self._connections.pop(key, None)
+            if entry:
+                entry[1] = time.time()
+                self._connections[key] = entry
+                return entry[0]
+
+        new_connection = factory()
+
+        with self._lock:
+            entry = self._connections.pop(key, None)
+            if entry:
+                self._close(new_connection)
+            else:
+                entry = [new_connection, None]
+            entry[1] = time.time()
+            self._connections[key] = entry
+            while len(self._connections) > self.max_size:
+                self._close(self._connections.popitem(last=False)[1][0])
+
+        return entry[0]
+
+    def clear(self):
+        """Closes and forgets every cached connection.
+        """
+
+        with self._lock:
+            while self._connections:
+                self._close(self._connections.popitem()[1][0])
+
+    def __len__(self):
+        return len(self._connections)
+
+    def _evict_idle(self):
+        oldest_allowed = time.time() - self.idle_timeout
+        for key, (cached_connection, last_used) in \
+                self._connections.items():
+            if last_used >= oldest_allowed:
+                break
+            del self._connections[key]
+            self._close(cached_connection)
+
+    def _close(self, cached_connection):
+        close = getattr(cached_connection, 'close', None)
+        if close:
+            close()
+
+
+connection_registry = ConnectionRegistry()
+
+
+def get_connection_key(connection_type, aws_config):
+    """Returns a stable hash of a connection type and an aws_config.
+
+    :param connection_type: A string naming the kind of client.
+    :param aws_config: The aws_config dictionary, or None.
+    :returns a hex digest string.
+    """
+
+    normalized_config = dict(
+        (key, value) for key, value in (aws_config or {}).items()
+        if value is not None)
+
+    return hashlib.sha1('{0}:{1}'.format(
+        connection_type,
+        json.dumps(normalized_config, sort_keys=True, default=str))
+    ).hexdigest()
+
+
 class EC2ConnectionClient():
     """Provides functions for getting the EC2 Client
     """
@@ -43,6 +148,27 @@ class EC2ConnectionClient():
 
         aws_config_property = (self._get_aws_config_property() or
                                self._get_aws_config_from_file())
+
+        return connection_registry.get(
+            get_connection_key(
+                self.__class__.__name__, aws_config_property),
+            lambda: ratelimit.install(metrics.install(
+                self._connect(aws_config_property))))
+
+    def connection_key(self):
+        """Identifies the account and region that client() connects to,
+        so that requests for the same one can be batched together.
+        """
+
+        return get_connection_key(
+            self.__class__.__name__,
+            (self._get_aws_config_property() or
+             self._get_aws_config_from_file()))
+
+    def _connect(self, aws_config_property):
+        """Creates a new EC2Connection for the given aws_config.
+        """
+
         if not aws_config_property:
             return EC2Connection()
         elif aws_config_property.get('ec2_region_name'):
@@ -137,12 +263,10 @@ class EC2ConnectionClient():
 
 class ELBConnectionClient(EC2ConnectionClient):
 
-    def client(self):
-        """Represents the ELBConnection Client
+    def _connect(self, aws_config_property):
+        """Creates a new ELBConnection for the given aws_config.
         """
 
-        aws_config_property = (self._get_aws_config_property() or
-                               self._get_aws_config_from_file())
         if not aws_config_property:
             return ELBConnection()
 
@@ -23,6 +23,19 @@ AWS_TYPE_PROPERTY = 'external_type'  # resource's openstack type
 
 INSTANCE_REQUIRED_PROPERTIES = ['image_id', 'instance_type']
 
+INSTANCE_SNAPSHOT_CACHE = 'instance_snapshot'
+RUNTIME_PROPERTY_COLLECTION_CACHE = 'runtime_property_collection'
+# the runtime property of the index of a RuntimePropertyCollection
+RUNTIME_PROPERTY_INDEX_NAME = '{0}_index'
+INSTANCE_STATE_MAX_AGE = 2
+# DescribeInstanceStatus takes at most 100 instance IDs per call
+INSTANCE_STATUS_IDS_PAGE_SIZE = 100
+
+# Runtime properties of a launch, and the launch generation, which
+# terminate increments so that a reinstall gets a new client token
+INSTANCE_LAUNCH_PROPERTIES = ['reservation_id', 'ami_launch_index']
+LAUNCH_GENERATION_PROPERTY = 'launch_generation'
+
 INSTANCE_INTERNAL_ATTRIBUTES = \
     ['private_dns_name', 'public_dns_name',
      'public_ip_address', 'ip', 'placement']
@@ -50,6 +63,8 @@ ADMIN_PASSWORD_PROPERTY = 'password'  # the server's password
 
 # securitygroup module constants
 SECURITY_GROUP_REQUIRED_PROPERTIES = ['description', 'rules']
+SECURITY_GROUP_RULES_PER_CALL = 20
+SECURITY_GROUP_NAME_CACHE = 'security_group_by_name'
 
 # ELB Default Values
 HEALTH_CHECK_INTERVAL = 30
@@ -58,6 +73,8 @@ HEALTH_CHECK_TIMEOUT = 5
 HEALTH_CHECK_UNHEALTHY_THRESHOLD = 5
 
 ELB_REQUIRED_PROPERTIES = ['elb_name', 'zones', 'listeners']
+ELB_INSTANCES_PER_CALL = 100
+ELB_REGISTRATION_WINDOW = 0.5
 
 # ebs module constants
 VOLUME_REQUIRED_PROPERTIES = ['size', 'zone', 'device']
@@ -68,10 +85,15 @@ VOLUME_IN_USE = 'in-use'
 
 # keypair module constants
 KEYPAIR_REQUIRED_PROPERTIES = ['private_key_path']
+KEYPAIR_NOT_FOUND_ERROR = 'InvalidKeyPair.NotFound'
 
 # elastic ip module contants
 ALLOCATION_ID = 'allocation_id'
 
+# tagging
+DEPLOYMENT_ID_TAG = 'cloudify-deployment-id'
+NODE_INSTANCE_ID_TAG = 'cloudify-node-instance-id'
+
 # config
 AWS_CONFIG_PROPERTY = 'aws_config'
 AWS_DEFAULT_CONFIG_PATH = '~/.boto'
@@ -80,8 +102,81 @@ NODE_INSTANCE = 'node-instance'
 RELATIONSHIP_INSTANCE = 'relationship-instance'
 AWS_CONFIG_PATH_ENV_VAR_NAME = "AWS_CONFIG_PATH"
 
+# not found diagnostics
+AVAILABLE_RESOURCES_LOG_LIMIT = 50
+AVAILABLE_RESOURCES_LOG_LIMIT_ENV_VAR_NAME = \
+    'AWS_AVAILABLE_RESOURCES_LOG_LIMIT'
+AVAILABLE_RESOURCES_LOG_LINES = 20
+MAX_RESULTS_MIN = 5
+MAX_RESULTS_MAX = 1000
+
+# paginated describe calls (MaxResults of a page)
+PAGE_SIZE = 100
+
+# connection cache
+CONNECTION_CACHE_MAX_SIZE = 32
+CONNECTION_CACHE_IDLE_TIMEOUT = 300
+
+# retries
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 20
+RETRY_TIME_BUDGET = 60
+RETRY_TIME_BUDGET_ENV_VAR_NAME = 'AWS_RETRY_TIME_BUDGET'
+THROTTLING_ERROR_CODES = [
+    'RequestLimitExceeded', 'Throttling', 'ThrottlingException',
+    'RequestThrottled', 'TooManyRequestsException'
+]
+TRANSIENT_ERROR_CODES = [
+    'InternalError', 'InternalFailure', 'ServiceUnavailable', 'Unavailable'
+]
+
+# in-process state waiter
+WAITER_INITIAL_INTERVAL = 1.0
+WAITER_MAX_INTERVAL = 15.0
+WAITER_BACKOFF_FACTOR = 1.5
+WAITER_TIME_BUDGET = 120
+WAITER_TIME_BUDGET_ENV_VAR_NAME = 'AWS_WAITER_TIME_BUDGET'
+
+# request coalescing
+COALESCE_WINDOW = 0.05
+COALESCE_MAX_BATCH_SIZE = 200
+BATCH_LAUNCH_WINDOW = 1.0
+BATCH_LAUNCH_MAX_SIZE = 100
+BATCH_TEARDOWN_WINDOW = 0.5
+
+# validation inventory snapshots
+INVENTORY_WINDOW = 0.1
+INVENTORY_SNAPSHOTS_MAX = 16
+INVENTORY_NOT_FOUND_ERROR_TOKENS = [
+    'NotFound', 'Malformed', 'InvalidParameterValue'
+]
+
+# client side rate limiting (action class > (requests per second, burst))
+RATE_LIMITS = {
+    'describe': (20, 100),
+    'mutate': (5, 50),
+    'tag': (5, 50)
+}
+RATE_LIMITS_ENV_VAR_NAME = 'AWS_RATE_LIMITS'
+RATE_LIMIT_STATE_PATH_ENV_VAR_NAME = 'AWS_RATE_LIMIT_STATE_PATH'
+RATE_LIMIT_STATE_FILE_NAME = 'cloudify-aws-rate-limit'
+RATE_LIMIT_STATE_SIZE = 65536
+RATE_LIMIT_DESCRIBE_PREFIXES = ['Describe', 'Get', 'List']
+RATE_LIMIT_TAG_ACTIONS = ['CreateTags', 'DeleteTags']
+
+# API call metrics
+METRICS_CACHE = 'api_call_metrics'
+METRICS_LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+METRICS_PREFIX = 'cloudify_aws_api'
+METRICS_FILE_PREFIX = 'cloudify-aws-metrics'
+METRICS_DIR_ENV_VAR_NAME = 'AWS_METRICS_DIR'
+
 # Boto config schema (section > options)
 BOTO_CONFIG_SCHEMA = {
     'Credentials': ['aws_access_key_id', 'aws_secret_access_key'],
     'Boto': ['ec2_region_name', 'ec2_region_endpoint']
 }
+
+# Describe responses parsed into compact records (see ec2/fastdescribe.py)
+FAST_DESCRIBE_ENV_VAR_NAME = 'AWS_FAST_DESCRIBE'
+FAST_DESCRIBE_ENABLED_VALUES = ['1', 'true', 'yes']
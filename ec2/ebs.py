@@ -23,9 +23,13 @@ import boto.exception
 from ec2 import utils
 from ec2 import constants
 from ec2 import connection
+from ec2 import retry
+from ec2 import inventory
+from ec2 import pagination
+from ec2 import tagging
 from cloudify import ctx
 from cloudify.exceptions import NonRecoverableError
-from cloudify.decorators import operation
+from ec2.metrics import operation
 
 
 @operation
@@ -36,7 +40,10 @@ def creation_validation(**_):
     for property_key in constants.VOLUME_REQUIRED_PROPERTIES:
         utils.validate_node_property(property_key, ctx.node.properties)
 
-    volume_object = _get_volumes_from_id(utils.get_resource_id())
+    volume_object = inventory.get_resource(
+        'volume', ctx.node.properties['resource_id'],
+        lambda resource_ids: connection.EC2ConnectionClient().client()
+        .get_all_volumes(volume_ids=resource_ids))
 
     if ctx.node.properties['use_external_resource'] and not volume_object:
         raise NonRecoverableError(
@@ -72,13 +79,15 @@ def create(args, **_):
     create_volume_args.update(args)
 
     try:
-        new_volume = ec2_client.create_volume(**create_volume_args)
+        new_volume = retry.execute_with_retry(
+            ec2_client.create_volume, create_volume_args)
     except (boto.exception.EC2ResponseError,
             boto.exception.BotoServerError) as e:
         raise NonRecoverableError('{0}'.format(str(e)))
 
     utils.set_external_resource_id(
         new_volume.id, ctx.instance, external=False)
+    tagging.tag_resource(new_volume.id)
 
 
 @operation
@@ -154,9 +163,11 @@ def attach(**_):
         .format(volume_id, instance_id))
 
     try:
-        volume_object.attach(
-            instance_id,
-            ctx.source.node.properties['device'])
+        retry.execute_with_retry(
+            volume_object.attach,
+            dict(instance_id=instance_id,
+                 device=ctx.source.node.properties['device']),
+            retry_not_found=True)
     except (boto.exception.EC2ResponseError,
             boto.exception.BotoServerError) as e:
         raise NonRecoverableError('{0}'.format(str(e)))
@@ -193,7 +204,7 @@ def detach(args, **_):
             'EBS volume {0} not found in account.'.format(volume_id))
 
     try:
-        detached = volume_object.detach(**args)
+        detached = retry.execute_with_retry(volume_object.detach, args)
     except (boto.exception.EC2ResponseError,
             boto.exception.BotoServerError) as e:
         raise NonRecoverableError('{0}'.format(str(e)))
@@ -232,7 +243,8 @@ def create_snapshot(args, **_):
         args = dict(description=snapshot_desc)
 
     try:
-        new_snapshot = volume_object.create_snapshot(**args)
+        new_snapshot = retry.execute_with_retry(
+            volume_object.create_snapshot, args)
     except (boto.exception.EC2ResponseError,
             boto.exception.BotoServerError) as e:
         raise NonRecoverableError('{0}'.format(str(e)))
@@ -272,7 +284,7 @@ def _delete_volume(volume_id):
         return False
 
     try:
-        output = volume_to_delete.delete()
+        output = retry.execute_with_retry(volume_to_delete.delete)
     except (boto.exception.EC2ResponseError,
             boto.exception.BotoServerError) as e:
         raise NonRecoverableError('{0}'.format(str(e)))
@@ -374,6 +386,9 @@ def _get_volumes_from_id(volume_id):
     :returns The boto EBS volume object.
     """
 
+    if not volume_id:
+        return None
+
     volumes = _get_volumes(list_of_volume_ids=volume_id)
 
     return volumes[0] if volumes else volumes
@@ -390,12 +405,14 @@ def _get_volumes(list_of_volume_ids):
     ec2_client = connection.EC2ConnectionClient().client()
 
     try:
-        volumes = ec2_client.get_all_volumes(
-            volume_ids=list_of_volume_ids)
+        volumes = retry.execute_with_retry(
+            ec2_client.get_all_volumes,
+            dict(volume_ids=list_of_volume_ids))
     except boto.exception.EC2ResponseError as e:
-        if 'InvalidVolume.NotFound' in e:
-            all_volumes = ec2_client.get_all_volumes()
-            utils.log_available_resources(all_volumes)
+        if e.error_code == 'InvalidVolume.NotFound':
+            utils.log_available_resources(
+                lambda limit: pagination.iterate_resources(
+                    ec2_client, 'volume', page_size=limit + 1))
         return None
     except boto.exception.BotoServerError as e:
         raise NonRecoverableError('{0}'.format(str(e)))
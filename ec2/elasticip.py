@@ -20,20 +20,22 @@ import boto.exception
 from ec2 import utils
 from ec2 import constants
 from ec2 import connection
+from ec2 import retry
+from ec2 import inventory
 from cloudify import ctx
 from cloudify.exceptions import NonRecoverableError
-from cloudify.decorators import operation
+from ec2.metrics import operation
 
 
 @operation
 def creation_validation(**_):
     """ This checks that all user supplied info is valid """
 
-    if not ctx.node.properties['resource_id']:
-        address = None
-    else:
-        address = _get_address_by_id(
-            ctx.node.properties['resource_id'])
+    address = inventory.get_resource(
+        'address', ctx.node.properties['resource_id'],
+        lambda resource_ids: connection.EC2ConnectionClient().client()
+        .get_all_addresses(addresses=resource_ids),
+        lambda address_object: address_object.public_ip)
 
     if ctx.node.properties['use_external_resource'] and not address:
         raise NonRecoverableError(
@@ -62,7 +64,8 @@ def allocate(**_):
         kw['domain'] = ctx.node.properties['domain']
 
     try:
-        address_object = ec2_client.allocate_address(**kw)
+        address_object = retry.execute_with_retry(
+            ec2_client.allocate_address, kw)
     except (boto.exception.EC2ResponseError,
             boto.exception.BotoServerError) as e:
         raise NonRecoverableError('{0}'.format(str(e)))
@@ -97,7 +100,7 @@ def release(**_):
     ctx.logger.debug('Attempting to release an Elastic IP.')
 
     try:
-        deleted = address_object.delete()
+        deleted = retry.execute_with_retry(address_object.delete)
     except (boto.exception.EC2ResponseError,
             boto.exception.BotoServerError) as e:
         raise NonRecoverableError('{0}'.format(str(e)))
@@ -151,7 +154,7 @@ def associate(**_):
         .format(kw))
 
     try:
-        ec2_client.associate_address(**kw)
+        retry.execute_with_retry(ec2_client.associate_address, kw)
     except (boto.exception.EC2ResponseError,
             boto.exception.BotoServerError) as e:
         raise NonRecoverableError('{0}'.format(str(e)))
@@ -193,7 +196,8 @@ def disassociate(**_):
     ctx.logger.debug('Disassociating Elastic IP {0}'.format(elasticip))
 
     try:
-        ec2_client.disassociate_address(**disassociate_args)
+        retry.execute_with_retry(
+            ec2_client.disassociate_address, disassociate_args)
     except (boto.exception.EC2ResponseError,
             boto.exception.BotoServerError) as e:
         raise NonRecoverableError('{0}'.format(str(e)))
@@ -327,11 +331,14 @@ def _get_all_addresses(address=None):
     ec2_client = connection.EC2ConnectionClient().client()
 
     try:
-        addresses = ec2_client.get_all_addresses(address)
+        addresses = retry.execute_with_retry(
+            ec2_client.get_all_addresses, dict(addresses=address))
     except boto.exception.EC2ResponseError as e:
-        if 'InvalidAddress.NotFound' in e:
-            addresses = ec2_client.get_all_addresses()
-            utils.log_available_resources(addresses)
+        if e.error_code == 'InvalidAddress.NotFound':
+            # DescribeAddresses is not paginated and has no MaxResults, so
+            # every address is described and only the log is capped
+            utils.log_available_resources(
+                lambda _: ec2_client.get_all_addresses())
         return None
     except boto.exception.BotoServerError as e:
         raise NonRecoverableError('{0}'.format(str(e)))
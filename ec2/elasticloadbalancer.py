@@ -21,8 +21,12 @@ import boto.exception
 from ec2 import constants
 from ec2 import connection
 from ec2 import utils
+from ec2 import retry
+from ec2 import coalescer
+from ec2 import inventory
+from ec2 import pagination
 from cloudify import ctx
-from cloudify.decorators import operation
+from ec2.metrics import operation
 from cloudify.exceptions import NonRecoverableError
 from cloudify.exceptions import RecoverableError
 
@@ -34,11 +38,11 @@ def creation_validation(**_):
     for property_key in constants.ELB_REQUIRED_PROPERTIES:
         utils.validate_node_property(property_key, ctx.node.properties)
 
-    if not ctx.node.properties['resource_id']:
-        elb = None
-    else:
-        elb = _get_existing_elb(
-            ctx.node.properties['resource_id'])
+    elb = inventory.get_resource(
+        'load_balancer', ctx.node.properties['resource_id'],
+        lambda resource_ids: connection.ELBConnectionClient().client()
+        .get_all_load_balancers(load_balancer_names=resource_ids),
+        inventory.get_name)
 
     if ctx.node.properties['use_external_resource'] and not elb:
         raise NonRecoverableError(
@@ -68,16 +72,14 @@ def create_elb(**_):
 
 def _add_instance_to_elb_list_in_properties(instance_id):
 
-    if 'instance_list' not in ctx.target.instance.runtime_properties.keys():
-        ctx.target.instance.runtime_properties['instance_list'] = []
-
-    ctx.target.instance.runtime_properties['instance_list'].append(instance_id)
+    utils.get_runtime_property_collection(
+        ctx.target.instance, 'instance_list').add(instance_id)
 
 
 def _remove_instance_from_elb_list_in_properties(instance_id):
-    if instance_id in ctx.target.instance.runtime_properties['instance_list']:
-        ctx.target.instance.runtime_properties['instance_list'].remove(
-            instance_id)
+
+    utils.get_runtime_property_collection(
+        ctx.target.instance, 'instance_list').remove(instance_id)
 
 
 @operation
@@ -91,14 +93,12 @@ def remove_instance_from_elb(**_):
         utils.get_external_resource_id_or_raise(
             'instance_id', ctx.source.instance)
 
-    instance_list = [instance_id]
-    lb = _get_existing_elb(elb_name)
-
     ctx.logger.info('Attemping to remove instance: {0} from elb {1}'
                     .format(instance_id, elb_name))
 
     try:
-        lb.deregister_instances(instance_list)
+        _change_elb_registration(
+            _deregister_coalescer, elb_name, instance_id)
     except (boto.exception.EC2ResponseError,
             boto.exception.BotoServerError,
             boto.exception.BotoClientError) as e:
@@ -126,10 +126,8 @@ def add_instance_to_elb(**_):
     ctx.logger.info('Attemping to remove instance: {0} from elb {1}'
                     .format(instance_id, elb_name))
 
-    lb = _get_existing_elb(elb_name)
-
     try:
-        lb.register_instances(instance_id)
+        _change_elb_registration(_register_coalescer, elb_name, instance_id)
     except (boto.exception.EC2ResponseError,
             boto.exception.BotoServerError,
             boto.exception.BotoClientError) as e:
@@ -143,6 +141,85 @@ def add_instance_to_elb(**_):
     _add_instance_to_elb_list_in_properties(instance_id)
 
 
+def _change_elb_registration(registration_coalescer, elb_name, instance_id):
+    """Registers or deregisters an instance with a load balancer.
+    Requests for the same load balancer that are made concurrently by
+    several relationship operations of this process are sent in a single
+    API call.
+
+    :param registration_coalescer: _register_coalescer or
+    _deregister_coalescer.
+    :param elb_name: The name of the load balancer.
+    :param instance_id: The ID of an EC2 Instance.
+    :raises the Boto error of this instance's request.
+    """
+
+    error = registration_coalescer.submit(
+        (connection.ELBConnectionClient().connection_key(), elb_name),
+        instance_id)
+
+    if error:
+        raise error
+
+
+def _change_elb_registration_batch(action, elb_name, list_of_instance_ids):
+    """Calls register_instances or deregister_instances for a batch of
+    instances of one load balancer.
+
+    If the call for the batch fails, every instance is retried on its own,
+    so that one bad instance does not fail the requests of the others.
+
+    :param action: The name of the ELBConnection method to call.
+    :param elb_name: The name of the load balancer.
+    :param list_of_instance_ids: The IDs of the batched EC2 Instances.
+    :returns a dict of instance ID to None, or to the Boto error of
+    that instance's request.
+    """
+
+    elb_client = connection.ELBConnectionClient().client()
+
+    try:
+        retry.execute_with_retry(
+            getattr(elb_client, action),
+            dict(load_balancer_name=elb_name,
+                 instances=list_of_instance_ids))
+    except (boto.exception.EC2ResponseError,
+            boto.exception.BotoServerError,
+            boto.exception.BotoClientError) as e:
+        if len(list_of_instance_ids) == 1:
+            return {list_of_instance_ids[0]: e}
+        ctx.logger.debug(
+            'Batched {0} failed, calling it per instance: {1}'
+            .format(action, str(e)))
+        errors = {}
+        for instance_id in list_of_instance_ids:
+            errors.update(_change_elb_registration_batch(
+                action, elb_name, [instance_id]))
+        return errors
+
+    return dict((instance_id, None) for instance_id in list_of_instance_ids)
+
+
+def _register_instances_batch(group, list_of_instance_ids):
+    return _change_elb_registration_batch(
+        'register_instances', group[1], list_of_instance_ids)
+
+
+def _deregister_instances_batch(group, list_of_instance_ids):
+    return _change_elb_registration_batch(
+        'deregister_instances', group[1], list_of_instance_ids)
+
+
+_register_coalescer = coalescer.Coalescer(
+    _register_instances_batch,
+    window=constants.ELB_REGISTRATION_WINDOW,
+    max_batch_size=constants.ELB_INSTANCES_PER_CALL)
+_deregister_coalescer = coalescer.Coalescer(
+    _deregister_instances_batch,
+    window=constants.ELB_REGISTRATION_WINDOW,
+    max_batch_size=constants.ELB_INSTANCES_PER_CALL)
+
+
 def _add_health_check_to_elb(elb, health_check):
 
     hc = _create_health_check(health_check)
@@ -278,17 +355,16 @@ def _get_elbs_by_names(list_of_names):
     elb_client = connection.ELBConnectionClient().client()
 
     try:
-        total_elb_list = elb_client.get_all_load_balancers()
         elb_list = elb_client.get_all_load_balancers(
             load_balancer_names=list_of_names)
     except (boto.exception.EC2ResponseError,
             boto.exception.BotoServerError,
             boto.exception.BotoClientError) as e:
-        if 'LoadBalancerNotFound' in e:
+        if e.error_code == 'LoadBalancerNotFound':
             ctx.logger.info('Unable to find load balancers matching: '
                             '{0}'.format(list_of_names))
-            ctx.logger.info('load balancers available: '
-                            '{0}'.format(total_elb_list))
+            utils.log_available_resources(
+                lambda limit: pagination.iterate_load_balancers(elb_client))
         raise NonRecoverableError('Error when accessing ELB interface '
                                   '{0}'.format(str(e)))
     return elb_list
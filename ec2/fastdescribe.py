@@ -0,0 +1,248 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+# Built-in Imports
+import os
+from io import BytesIO
+from xml.etree.cElementTree import iterparse
+
+# Cloudify imports
+from ec2 import constants
+
+
+def _text(text):
+    # boto sets an empty element to ''
+    return text or ''
+
+
+def _integer(text):
+    return int(text) if text else None
+
+
+class Record(object):
+    """A described resource, with only the fields that the plugin reads.
+
+    fields maps the path of an element under the item of the resource,
+    as a tuple of tag names, to the slot it is parsed into and the
+    function that converts its text.
+    """
+
+    __slots__ = ()
+    fields = {}
+    kind = 'Resource'
+
+    def __init__(self, fields=None):
+        for slot, _ in (fields or self.fields).values():
+            setattr(self, slot, None)
+
+    def __repr__(self):
+        return '{0}:{1}'.format(self.kind, self.id)
+
+
+class InstanceRecord(Record):
+
+    __slots__ = ('id', 'state', 'state_code', 'placement',
+                 'private_ip_address', 'ip_address',
+                 'private_dns_name', 'public_dns_name')
+    fields = {
+        ('instanceId',): ('id', _text),
+        ('instanceState', 'name'): ('state', _text),
+        ('instanceState', 'code'): ('state_code', _integer),
+        ('placement', 'availabilityZone'): ('placement', _text),
+        ('privateIpAddress',): ('private_ip_address', _text),
+        ('ipAddress',): ('ip_address', _text),
+        ('privateDnsName',): ('private_dns_name', _text),
+        ('dnsName',): ('public_dns_name', _text)
+    }
+    kind = 'Instance'
+
+
+class InstanceStatusRecord(Record):
+
+    __slots__ = ('id', 'zone', 'state_code', 'state_name')
+    fields = {
+        ('instanceId',): ('id', _text),
+        ('availabilityZone',): ('zone', _text),
+        ('instanceState', 'code'): ('state_code', _integer),
+        ('instanceState', 'name'): ('state_name', _text)
+    }
+    kind = 'InstanceStatus'
+
+
+class ResourceRecord(Record):
+    """A VPC resource. Its fields depend on the resource type, see
+    RESOURCE_DESCRIBE_ACTIONS.
+    """
+
+    __slots__ = ('id', 'state')
+
+
+class RecordList(list):
+
+    def __init__(self, records=None):
+        super(RecordList, self).__init__(records or [])
+        self.next_token = None
+
+
+INSTANCE_ITEM_PATH = ('reservationSet', 'item', 'instancesSet', 'item')
+INSTANCE_STATUS_ITEM_PATH = ('instanceStatusSet', 'item')
+
+# resource type > (describe action, ID parameter, set tag, ID tag)
+RESOURCE_DESCRIBE_ACTIONS = {
+    'vpc': ('DescribeVpcs', 'VpcId', 'vpcSet', 'vpcId'),
+    'subnet': ('DescribeSubnets', 'SubnetId', 'subnetSet', 'subnetId'),
+    'internet_gateway': ('DescribeInternetGateways', 'InternetGatewayId',
+                         'internetGatewaySet', 'internetGatewayId'),
+    'vpn_gateway': ('DescribeVpnGateways', 'VpnGatewayId',
+                    'vpnGatewaySet', 'vpnGatewayId'),
+    'customer_gateway': ('DescribeCustomerGateways', 'CustomerGatewayId',
+                         'customerGatewaySet', 'customerGatewayId'),
+    'network_acl': ('DescribeNetworkAcls', 'NetworkAclId',
+                    'networkAclSet', 'networkAclId'),
+    'route_table': ('DescribeRouteTables', 'RouteTableId',
+                    'routeTableSet', 'routeTableId'),
+    'dhcp_options': ('DescribeDhcpOptions', 'DhcpOptionsId',
+                     'dhcpOptionsSet', 'dhcpOptionsId')
+}
+
+
+def is_enabled():
+    """Whether the hot describe calls are parsed into records instead of
+    boto objects. Set AWS_FAST_DESCRIBE=1 to enable it.
+    """
+
+    return os.environ.get(
+        constants.FAST_DESCRIBE_ENV_VAR_NAME, '').lower() in \
+        constants.FAST_DESCRIBE_ENABLED_VALUES
+
+
+def parse(body, item_path, record_class, fields=None):
+    """Parses the items of a describe response into records, one element
+    at a time. The elements of an item are freed once it is parsed, so
+    the whole response tree is never built.
+
+    :param body: The XML of the response.
+    :param item_path: The tags from the response element to an item.
+    :param record_class: A subclass of Record.
+    :param fields: The fields of the records, if not record_class.fields.
+    :returns a RecordList, with the NextToken of the response.
+    """
+
+    fields = fields or record_class.fields
+    depth = len(item_path) + 1
+    records = RecordList()
+    record = None
+    path = []
+
+    for event, element in iterparse(BytesIO(body), ('start', 'end')):
+        if event == 'start':
+            # tags are namespaced, like {http://ec2...}instanceId
+            path.append(element.tag.rpartition('}')[2])
+            if record is None and len(path) == depth and \
+                    tuple(path[1:]) == item_path:
+                record = record_class(fields)
+            continue
+
+        if record is not None:
+            field = fields.get(tuple(path[depth:]))
+            if field:
+                slot, convert = field
+                setattr(record, slot, convert(element.text))
+            if len(path) == depth:
+                records.append(record)
+                record = None
+        elif len(path) == 2 and path[1] == 'nextToken':
+            records.next_token = element.text
+
+        if record is None:
+            element.clear()
+        path.pop()
+
+    return records
+
+
+def describe(client, action, params, item_path, record_class, fields=None):
+    """Makes a describe call and parses its response into records.
+
+    :raises client.ResponseError: like boto get_list, if AWS errors.
+    """
+
+    response = client.make_request(action, params, '/', 'POST')
+    body = response.read()
+
+    if not body or response.status != 200:
+        raise client.ResponseError(response.status, response.reason, body)
+
+    return parse(body, item_path, record_class, fields)
+
+
+def _get_params(client, ids_name, ids=None, filters=None,
+                max_results=None, next_token=None):
+    params = {}
+    if ids:
+        client.build_list_params(params, ids, ids_name)
+    if filters:
+        client.build_filter_params(params, filters)
+    if max_results:
+        params['MaxResults'] = max_results
+    if next_token:
+        params['NextToken'] = next_token
+    return params
+
+
+def describe_instances(ec2_client, instance_ids=None, filters=None,
+                       max_results=None, next_token=None):
+    """Like get_only_instances, but returns InstanceRecords.
+    """
+
+    return describe(
+        ec2_client, 'DescribeInstances',
+        _get_params(ec2_client, 'InstanceId', instance_ids, filters,
+                    max_results, next_token),
+        INSTANCE_ITEM_PATH, InstanceRecord)
+
+
+def describe_instance_status(ec2_client, instance_ids=None, filters=None,
+                             include_all_instances=False, max_results=None,
+                             next_token=None):
+    """Like get_all_instance_status, but returns InstanceStatusRecords.
+    """
+
+    params = _get_params(ec2_client, 'InstanceId', instance_ids, filters,
+                         max_results, next_token)
+    if include_all_instances:
+        params['IncludeAllInstances'] = 'true'
+
+    return describe(ec2_client, 'DescribeInstanceStatus', params,
+                    INSTANCE_STATUS_ITEM_PATH, InstanceStatusRecord)
+
+
+def describe_resources(client, resource_type, resource_ids=None,
+                       filters=None):
+    """Describes resources of a type of RESOURCE_DESCRIBE_ACTIONS into
+    ResourceRecords with an id and a state.
+
+    :param client: A boto VPC connection.
+    :param resource_ids: A list of IDs, or a single ID.
+    """
+
+    action, ids_name, set_tag, id_tag = \
+        RESOURCE_DESCRIBE_ACTIONS[resource_type]
+
+    return describe(
+        client, action,
+        _get_params(client, ids_name, resource_ids, filters),
+        (set_tag, 'item'), ResourceRecord,
+        {(id_tag,): ('id', _text), ('state',): ('state', _text)})
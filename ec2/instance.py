@@ -14,6 +14,8 @@
 #    * limitations under the License.
 
 import os
+import json
+import hashlib
 
 # Third-party Imports
 import boto.exception
@@ -22,10 +24,17 @@ import boto.exception
 from ec2 import utils
 from ec2 import constants
 from ec2 import connection
+from ec2 import retry
+from ec2 import coalescer
+from ec2 import inventory
+from ec2 import fastdescribe
+from ec2 import waiter
+from ec2 import statetracker
+from ec2 import tagging
 from cloudify import ctx
 from cloudify import compute
 from cloudify.exceptions import NonRecoverableError
-from cloudify.decorators import operation
+from ec2.metrics import operation
 from ec2 import passwd
 from ec2.keypair import KEYPAIR_AWS_TYPE
 
@@ -37,7 +46,10 @@ def creation_validation(**_):
     for property_key in constants.INSTANCE_REQUIRED_PROPERTIES:
         utils.validate_node_property(property_key, ctx.node.properties)
 
-    instance = _get_instance_from_id(utils.get_resource_id())
+    instance = inventory.get_resource(
+        'instance', ctx.node.properties['resource_id'],
+        lambda resource_ids:
+            _describe_instances_batch(None, resource_ids).values())
 
     if ctx.node.properties['use_external_resource'] and not instance:
         raise NonRecoverableError(
@@ -110,14 +122,19 @@ def start(start_retry_interval=30, private_key_path=None, **_):
     ctx.logger.debug('Attempting to start instance: {0}.)'.format(instance_id))
 
     try:
-        ec2_client.start_instances(instance_id)
+        retry.execute_with_retry(ec2_client.start_instances,
+                                 dict(instance_ids=instance_id))
     except (boto.exception.EC2ResponseError,
             boto.exception.BotoServerError) as e:
         raise NonRecoverableError('{0}'.format(str(e)))
+    finally:
+        _invalidate_instance_snapshot(instance_id)
+        _invalidate_instance_state(instance_id)
 
     ctx.logger.debug('Attempted to start instance {0}.'.format(instance_id))
 
-    if _get_instance_state() == constants.INSTANCE_STATE_STARTED:
+    if _wait_for_instance_state(
+            instance_id, constants.INSTANCE_STATE_STARTED):
         if ctx.node.properties['use_password']:
             _retrieve_windows_pass(ec2_client=ec2_client,
                                    instance_id=instance_id,
@@ -132,8 +149,6 @@ def start(start_retry_interval=30, private_key_path=None, **_):
 
 @operation
 def stop(**_):
-    ec2_client = connection.EC2ConnectionClient().client()
-
     instance_id = \
         utils.get_external_resource_id_or_raise(
             'stop instance', ctx.instance)
@@ -145,14 +160,18 @@ def stop(**_):
         'Attempting to stop EC2 Instance. {0}.)'.format(instance_id))
 
     try:
-        ec2_client.stop_instances(instance_id)
+        _change_instance_state(_stop_coalescer, instance_id)
     except (boto.exception.EC2ResponseError,
             boto.exception.BotoServerError) as e:
         raise NonRecoverableError('{0}'.format(str(e)))
+    finally:
+        _invalidate_instance_snapshot(instance_id)
+        _invalidate_instance_state(instance_id)
 
     ctx.logger.debug('Attempted to stop instance {0}.'.format(instance_id))
 
-    if _get_instance_state() == constants.INSTANCE_STATE_STOPPED:
+    if _wait_for_instance_state(
+            instance_id, constants.INSTANCE_STATE_STOPPED):
         _unassign_runtime_properties(
             runtime_properties=constants.INSTANCE_INTERNAL_ATTRIBUTES,
             ctx_instance=ctx.instance)
@@ -164,8 +183,6 @@ def stop(**_):
 
 @operation
 def terminate(**_):
-    ec2_client = connection.EC2ConnectionClient().client()
-
     instance_id = \
         utils.get_external_resource_id_or_raise(
             'terminate instance', ctx.instance)
@@ -177,19 +194,27 @@ def terminate(**_):
         'Attempting to terminate EC2 Instance. {0}.)'.format(instance_id))
 
     try:
-        ec2_client.terminate_instances(instance_id)
+        _change_instance_state(_terminate_coalescer, instance_id)
     except (boto.exception.EC2ResponseError,
             boto.exception.BotoServerError) as e:
         raise NonRecoverableError('{0}'.format(str(e)))
+    finally:
+        _invalidate_instance_snapshot(instance_id)
+        _invalidate_instance_state(instance_id)
 
     ctx.logger.debug(
         'Attemped to terminate instance {0}'.format(instance_id))
 
-    if _get_instance_state() == \
-            constants.INSTANCE_STATE_TERMINATED:
+    if _wait_for_instance_state(
+            instance_id, constants.INSTANCE_STATE_TERMINATED):
         ctx.logger.info('Terminated instance: {0}.'.format(instance_id))
         utils.unassign_runtime_property_from_resource(
             constants.EXTERNAL_RESOURCE_ID, ctx.instance)
+        for property_name in constants.INSTANCE_LAUNCH_PROPERTIES:
+            ctx.instance.runtime_properties.pop(property_name, None)
+        ctx.instance.runtime_properties[
+            constants.LAUNCH_GENERATION_PROPERTY] = \
+            _get_launch_generation() + 1
     else:
         return ctx.operation.retry(
             message='Waiting server to terminate. Retrying...')
@@ -198,24 +223,27 @@ def terminate(**_):
 def _assign_runtime_properties_to_instance(runtime_properties):
 
     for property_name in runtime_properties:
-        if 'ip' is property_name:
+        if 'ip' == property_name:
             ctx.instance.runtime_properties[property_name] = \
                 _get_instance_attribute('private_ip_address')
-        elif 'public_ip_address' is property_name:
+        elif 'public_ip_address' == property_name:
             ctx.instance.runtime_properties[property_name] = \
                 _get_instance_attribute('ip_address')
-        elif 'placement' is property_name:
+        elif 'placement' == property_name:
             ctx.instance.runtime_properties[property_name] = \
                 _get_instance_attribute('placement')
         else:
-            attribute = _get_instance_attribute(property_name)
+            ctx.instance.runtime_properties[property_name] = \
+                _get_instance_attribute(property_name)
 
-        ctx.logger.debug('Set {0}: {1}.'.format(property_name, attribute))
+        ctx.logger.debug('Set {0}: {1}.'.format(
+            property_name, ctx.instance.runtime_properties[property_name]))
 
 
 def _instance_started_assign_runtime_properties_and_tag(instance_id):
-    if ctx.node.properties.get('name'):
-        _add_tag(instance_id, 'Name', ctx.node.properties['name'])
+    if not utils.use_external_resource(ctx.node.properties):
+        tagging.tag_resource(
+            instance_id, name=ctx.node.properties.get('name'))
 
     _assign_runtime_properties_to_instance(
         runtime_properties=constants.INSTANCE_INTERNAL_ATTRIBUTES)
@@ -288,32 +316,186 @@ def _unassign_runtime_properties(runtime_properties, ctx_instance):
 
 def _run_instances_if_needed(ec2_client, instance_parameters):
 
-    if ctx.operation.retry_number == 0:
+    if constants.EXTERNAL_RESOURCE_ID in ctx.instance.runtime_properties:
+        return ctx.instance.runtime_properties[constants.EXTERNAL_RESOURCE_ID]
 
-        try:
-            reservation = ec2_client.run_instances(**instance_parameters)
-        except (boto.exception.EC2ResponseError,
-                boto.exception.BotoServerError) as e:
-            raise NonRecoverableError('{0}'.format(str(e)))
-        ctx.instance.runtime_properties['reservation_id'] = reservation.id
-        return reservation.instances[0].id
+    if ctx.node.properties.get('batch_launch'):
+        if 'reservation_id' in ctx.instance.runtime_properties:
+            return _get_batch_launched_instance_id(ec2_client)
+        # the user data of a reservation is shared by its instances
+        if not ctx.agent.init_script():
+            return _run_instances_in_batch(instance_parameters)
+        ctx.logger.warn(
+            'Not launching node instance {0} in a batch, because its '
+            'user data installs an agent for this node instance only.'
+            .format(ctx.instance.id))
 
-    elif constants.EXTERNAL_RESOURCE_ID not in ctx.instance.runtime_properties:
+    if not instance_parameters.get('client_token'):
+        instance_parameters['client_token'] = \
+            _get_client_token([ctx.instance.id], _get_launch_generation())
 
-        instances = _get_instances_from_reservation_id(ec2_client)
+    try:
+        reservation = retry.execute_with_retry(
+            ec2_client.run_instances, instance_parameters)
+    except (boto.exception.EC2ResponseError,
+            boto.exception.BotoServerError) as e:
+        raise NonRecoverableError('{0}'.format(str(e)))
+    ctx.instance.runtime_properties['reservation_id'] = reservation.id
+    return reservation.instances[0].id
 
-        if not instances:
-            raise NonRecoverableError(
-                'Instance failed for an unknown reason. Node ID: {0}. '
-                .format(ctx.instance.id))
-        elif len(instances) != 1:
-            raise NonRecoverableError(
-                'More than one instance was created by the install workflow. '
-                'Unable to handle request.')
 
-        return instances[0].id
+def _get_client_token(node_instance_ids, generation=0):
+    """Gets the ClientToken of a launch, so that RunInstances is
+    idempotent: a retried launch of the same node instances returns the
+    instances it launched before, also when it is retried by another
+    execution, for example after the previous one crashed.
+
+    :param node_instance_ids: The IDs of the launched node instances.
+    :param generation: The launch generation of the node instances.
+    :returns a token derived from the deployment and node instance IDs
+    and the launch generation.
+    """
+
+    return hashlib.sha1(json.dumps(
+        [ctx.deployment.id, sorted(node_instance_ids),
+         generation])).hexdigest()
+
+
+def _get_launch_generation():
+    """The number of times the instance of this node instance was
+    terminated, so that launches after a reinstall are not answered with
+    the instances launched before.
+    """
+
+    return ctx.instance.runtime_properties.get(
+        constants.LAUNCH_GENERATION_PROPERTY, 0)
+
+
+def _get_batch_launched_instance_id(ec2_client):
+    """Gets the instance launched for this node instance by a batched
+    launch, which cannot be retried with the same ClientToken when the
+    node instances of the batch changed.
+    """
+
+    instances = _get_instances_from_reservation_id(ec2_client)
+
+    if not instances:
+        raise NonRecoverableError(
+            'Instance failed for an unknown reason. Node ID: {0}. '
+            .format(ctx.instance.id))
+    elif len(instances) != 1:
+        raise NonRecoverableError(
+            'More than one instance was created by the install workflow. '
+            'Unable to handle request.')
+
+    return instances[0].id
+
+
+def _run_instances_in_batch(instance_parameters):
+    """Launches this node instance together with the other node instances
+    of the same node that are being created with identical parameters.
+
+    Only the operations that run in the same process, in the same batch
+    window, are launched together.
+
+    :param instance_parameters: The parameters to the run_instances call.
+    :returns the ID of the instance launched for this node instance.
+    """
+
+    launched = _launch_coalescer.submit(
+        _LaunchGroup(connection.EC2ConnectionClient().connection_key(),
+                     ctx.node.id, instance_parameters,
+                     _get_launch_generation()),
+        ctx.instance.id)
+
+    if not launched:
+        raise NonRecoverableError(
+            'No instance was launched for node instance {0}.'
+            .format(ctx.instance.id))
+
+    reservation_id, launch_index, instance_id = launched
 
-    return ctx.instance.runtime_properties[constants.EXTERNAL_RESOURCE_ID]
+    ctx.logger.debug(
+        'Instance {0} was launched in reservation {1} with launch index {2}.'
+        .format(instance_id, reservation_id, launch_index))
+
+    ctx.instance.runtime_properties['reservation_id'] = reservation_id
+    ctx.instance.runtime_properties['ami_launch_index'] = launch_index
+    return instance_id
+
+
+class _LaunchGroup(object):
+    """Node instances that may share a RunInstances call: same account
+    and region, same node, identical run_instances parameters and the
+    same launch generation.
+    """
+
+    def __init__(self, connection_key, node_id, parameters, generation=0):
+        self.parameters = parameters
+        self.generation = generation
+        self._key = (connection_key, node_id, generation, hashlib.sha1(
+            json.dumps(parameters, sort_keys=True, default=str)).hexdigest())
+
+    def __hash__(self):
+        return hash(self._key)
+
+    def __eq__(self, other):
+        return isinstance(other, _LaunchGroup) and self._key == other._key
+
+    def __ne__(self, other):
+        return not self == other
+
+
+def _run_instances_batch(launch_group, node_instance_ids):
+    """Launches one instance for every node instance of a launch group
+    with a single RunInstances call.
+
+    Instances are handed out by ascending ami_launch_index to the node
+    instances sorted by ID, so the assignment does not depend on the
+    order in which the node instances joined the batch.
+
+    :param launch_group: A _LaunchGroup.
+    :param node_instance_ids: The IDs of the batched node instances.
+    :returns a dict of node instance ID to a tuple of
+    (reservation ID, launch index, instance ID).
+    :raises NonRecoverableError: If Boto errors.
+    """
+
+    ec2_client = connection.EC2ConnectionClient().client()
+    count = len(node_instance_ids)
+
+    ctx.logger.info(
+        'Launching {0} instances in a single call for node instances {1}.'
+        .format(count, ', '.join(sorted(node_instance_ids))))
+
+    instance_parameters = dict(launch_group.parameters)
+    instance_parameters.update(min_count=count, max_count=count)
+    if not instance_parameters.get('client_token'):
+        instance_parameters['client_token'] = \
+            _get_client_token(node_instance_ids, launch_group.generation)
+
+    try:
+        reservation = retry.execute_with_retry(
+            ec2_client.run_instances, instance_parameters)
+    except (boto.exception.EC2ResponseError,
+            boto.exception.BotoServerError) as e:
+        raise NonRecoverableError('{0}'.format(str(e)))
+
+    instances = sorted(reservation.instances,
+                       key=lambda instance: int(instance.ami_launch_index))
+
+    return dict(
+        (node_instance_id,
+         (reservation.id, instance.ami_launch_index, instance.id))
+        for node_instance_id, instance
+        in zip(sorted(node_instance_ids), instances))
+
+
+_launch_coalescer = coalescer.Coalescer(
+    _run_instances_batch,
+    window=constants.BATCH_LAUNCH_WINDOW,
+    max_batch_size=constants.BATCH_LAUNCH_MAX_SIZE,
+    always_wait=True)
 
 
 def _handle_userdata(parameters):
@@ -340,11 +522,12 @@ def _handle_userdata(parameters):
 def _get_instances_from_reservation_id(ec2_client):
 
     try:
-        reservations = ec2_client.get_all_instances(
-            filters={
+        reservations = retry.execute_with_retry(
+            ec2_client.get_all_instances,
+            dict(filters={
                 'reservation-id':
                     ctx.instance.runtime_properties['reservation_id']
-            })
+            }))
     except (boto.exception.EC2ResponseError,
             boto.exception.BotoServerError) as e:
         raise NonRecoverableError('{0}'.format(str(e)))
@@ -352,6 +535,12 @@ def _get_instances_from_reservation_id(ec2_client):
     if len(reservations) < 1:
         return None
 
+    launch_index = ctx.instance.runtime_properties.get('ami_launch_index')
+
+    if launch_index is not None:
+        return [instance for instance in reservations[0].instances
+                if str(instance.ami_launch_index) == str(launch_index)]
+
     return reservations[0].instances
 
 
@@ -409,45 +598,147 @@ def _terminate_external_instance(instance_id):
     return True
 
 
-def _get_all_instances(list_of_instance_ids=None):
-    """Returns a list of instance objects for a list of instance IDs.
+def _get_instance_from_id(instance_id):
+    """Gets the instance ID of a EC2 Instance
 
-    :returns a list of instance objects.
+    The instance is described once per operation and then served from
+    the operation's instance snapshot, until a mutating call invalidates it.
+
+    :param instance_id: The ID of an EC2 Instance
+    :returns an ID of a an EC2 Instance or None.
+    """
+
+    if not instance_id:
+        return None
+
+    snapshot = utils.get_operation_cache(constants.INSTANCE_SNAPSHOT_CACHE)
+
+    if instance_id in snapshot:
+        return snapshot[instance_id]
+
+    instance = _describe_coalescer.submit(
+        connection.EC2ConnectionClient().connection_key(), instance_id)
+
+    if instance:
+        snapshot[instance_id] = instance
+
+    return instance
+
+
+def _describe_instances_batch(connection_key, list_of_instance_ids):
+    """Describes the instances requested concurrently by several
+    operations of this process with a single DescribeInstances.
+
+    The IDs are passed as an instance-id filter, so an ID that does
+    not exist is left out of the result instead of failing the batch.
+
+    :param connection_key: The account and region of the batch.
+    :param list_of_instance_ids: The IDs of the batched EC2 Instances.
+    :returns a dict of instance ID to instance object, or to
+    fastdescribe.InstanceRecord if AWS_FAST_DESCRIBE is set.
     :raises NonRecoverableError: If Boto errors.
     """
 
     ec2_client = connection.EC2ConnectionClient().client()
+    filters = {'instance-id': list_of_instance_ids}
 
     try:
-        reservations = ec2_client.get_all_reservations(list_of_instance_ids)
-    except boto.exception.EC2ResponseError as e:
-        if 'InvalidInstanceID.NotFound' in e:
-            instances = [instance for res in ec2_client.get_all_reservations()
-                         for instance in res.instances]
-            utils.log_available_resources(instances)
-        return None
-    except boto.exception.BotoServerError as e:
+        if fastdescribe.is_enabled():
+            instances = retry.execute_with_retry(
+                fastdescribe.describe_instances,
+                dict(ec2_client=ec2_client, filters=filters))
+        else:
+            instances = [instance for reservation in
+                         retry.execute_with_retry(
+                             ec2_client.get_all_reservations,
+                             dict(filters=filters))
+                         for instance in reservation.instances]
+    except (boto.exception.EC2ResponseError,
+            boto.exception.BotoServerError) as e:
         raise NonRecoverableError('{0}'.format(str(e)))
 
-    instances = []
+    return dict((instance.id, instance) for instance in instances)
 
-    for reservation in reservations:
-        for instance in reservation.instances:
-            instances.append(instance)
 
-    return instances
+_describe_coalescer = coalescer.Coalescer(_describe_instances_batch)
 
 
-def _get_instance_from_id(instance_id):
-    """Gets the instance ID of a EC2 Instance
+def _change_instance_state(state_coalescer, instance_id):
+    """Requests a stop or terminate of an instance. Requests made
+    concurrently by several operations of this process are sent in a
+    single API call.
 
+    :param state_coalescer: _stop_coalescer or _terminate_coalescer.
     :param instance_id: The ID of an EC2 Instance
-    :returns an ID of a an EC2 Instance or None.
+    :raises the Boto error of this instance's request.
     """
 
-    instance = _get_all_instances(list_of_instance_ids=instance_id)
+    error = state_coalescer.submit(
+        connection.EC2ConnectionClient().connection_key(), instance_id)
+
+    if error:
+        raise error
+
+
+def _change_instances_state_batch(action, list_of_instance_ids):
+    """Calls stop_instances or terminate_instances for a batch of
+    instances.
+
+    If the call for the batch fails, every instance is retried on its own,
+    so that one bad instance does not fail the requests of the others.
+
+    :param action: The name of the EC2Connection method to call.
+    :param list_of_instance_ids: The IDs of the batched EC2 Instances.
+    :returns a dict of instance ID to None, or to the Boto error of
+    that instance's request.
+    """
+
+    ec2_client = connection.EC2ConnectionClient().client()
+
+    try:
+        retry.execute_with_retry(getattr(ec2_client, action),
+                                 dict(instance_ids=list_of_instance_ids))
+    except (boto.exception.EC2ResponseError,
+            boto.exception.BotoServerError) as e:
+        if len(list_of_instance_ids) == 1:
+            return {list_of_instance_ids[0]: e}
+        ctx.logger.debug(
+            'Batched {0} failed, calling it per instance: {1}'
+            .format(action, str(e)))
+        errors = {}
+        for instance_id in list_of_instance_ids:
+            errors.update(
+                _change_instances_state_batch(action, [instance_id]))
+        return errors
+
+    return dict((instance_id, None) for instance_id in list_of_instance_ids)
+
+
+def _stop_instances_batch(connection_key, list_of_instance_ids):
+    return _change_instances_state_batch(
+        'stop_instances', list_of_instance_ids)
+
+
+def _terminate_instances_batch(connection_key, list_of_instance_ids):
+    return _change_instances_state_batch(
+        'terminate_instances', list_of_instance_ids)
+
+
+_stop_coalescer = coalescer.Coalescer(
+    _stop_instances_batch, window=constants.BATCH_TEARDOWN_WINDOW)
+_terminate_coalescer = coalescer.Coalescer(
+    _terminate_instances_batch, window=constants.BATCH_TEARDOWN_WINDOW)
 
-    return instance[0] if instance else instance
+
+def _invalidate_instance_snapshot(instance_id):
+    """Drops an instance from the operation's instance snapshot,
+    so the next read describes it again.
+
+    :param instance_id: The ID of an EC2 Instance
+    """
+
+    utils.get_operation_cache(
+        constants.INSTANCE_SNAPSHOT_CACHE).pop(instance_id, None)
 
 
 def _get_image(image_id):
@@ -464,7 +755,8 @@ def _get_image(image_id):
             'No image_id was provided.')
 
     try:
-        image_object = ec2_client.get_image(image_id)
+        image_object = retry.execute_with_retry(
+            ec2_client.get_image, dict(image_id=image_id))
     except (boto.exception.EC2ResponseError,
             boto.exception.BotoServerError) as e:
         raise NonRecoverableError('{0}.'.format(str(e)))
@@ -514,15 +806,65 @@ def _get_instance_attribute(attribute):
     return attribute
 
 
+def _wait_for_instance_state(instance_id, state_code):
+    """Waits in-process, for at most the waiter's time budget, until the
+    instance reaches a state.
+
+    Every poll reads the state tracker, so concurrent waiters share
+    their DescribeInstanceStatus calls.
+
+    :param instance_id: The ID of an EC2 Instance
+    :param state_code: The state code to wait for.
+    :returns True if the instance reached the state.
+    """
+
+    def poll():
+        _invalidate_instance_snapshot(instance_id)
+        return _get_instance_state()
+
+    return waiter.wait_for(
+        poll, lambda polled_state: polled_state == state_code) == state_code
+
+
 def _get_instance_state():
     """Gets the instance state code of a EC2 Instance
 
+    The state is read from the deployment's instance state tracker. An
+    instance the tracker does not know yet is described on its own.
+
     :returns a state code from a boto object representing an EC2 Image.
     """
+
+    instance_id = \
+        ctx.instance.runtime_properties.get(constants.EXTERNAL_RESOURCE_ID)
+
+    if instance_id:
+        state = statetracker.state_tracker.get_state(
+            _get_state_tracker_scope(), instance_id,
+            connection.EC2ConnectionClient().client)
+        if state is not None:
+            return state
+
     state = _get_instance_attribute('state_code')
     return state
 
 
+def _get_state_tracker_scope():
+    return (ctx.deployment.id,
+            connection.EC2ConnectionClient().connection_key())
+
+
+def _invalidate_instance_state(instance_id):
+    """Makes the next state read of an instance wait for a refresh of the
+    state tracker, for example after stopping the instance.
+
+    :param instance_id: The ID of an EC2 Instance
+    """
+
+    statetracker.state_tracker.invalidate(
+        _get_state_tracker_scope(), instance_id)
+
+
 def _get_instance_parameters():
     """The parameters to the run_instance boto call.
 
@@ -572,20 +914,6 @@ def _get_instance_keypair(provider_variables):
     return list_of_keypairs[0] if list_of_keypairs else None
 
 
-def _add_tag(instance_id, tag_id, tag_content):
-
-    instance = _get_instance_from_id(instance_id)
-
-    try:
-        output = instance.add_tag(tag_id, tag_content)
-    except (boto.exception.EC2ResponseError,
-            boto.exception.BotoServerError) as e:
-        raise NonRecoverableError(
-            'unable to tag instance name: {0}'.format(str(e)))
-
-    return output
-
-
 def _get_instance_subnet(provider_variables):
 
     list_of_subnets = \
@@ -0,0 +1,162 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+# Built-in Imports
+import threading
+from collections import OrderedDict
+
+# Third-party Imports
+from boto import exception
+
+# Cloudify imports
+from ec2 import retry
+from ec2 import constants
+from ec2 import coalescer
+from ec2 import connection
+from cloudify import ctx
+from cloudify.exceptions import NonRecoverableError
+
+_snapshots = OrderedDict()
+_snapshots_lock = threading.Lock()
+
+
+def get_id(resource):
+    return resource.id
+
+
+def get_name(resource):
+    return resource.name
+
+
+def get_resource(resource_type, resource_id, describe, get_resource_id=get_id):
+    """Looks up a resource in the inventory snapshot of its type, which is
+    shared by the operations of the same deployment and execution that run
+    in this process, for example the creation_validation operations of a
+    validation run.
+
+    IDs that are not in the snapshot yet are described together with the
+    IDs that concurrent operations of this process look up, in a single
+    call.
+
+    :param resource_type: The snapshot to use, for example 'volume'.
+    :param resource_id: The ID (or name) to look up.
+    :param describe: Called with a list of IDs. It returns the resources
+    found and raises the Boto error of the describe call.
+    :param get_resource_id: Returns the ID of a described resource.
+    :returns the resource or None.
+    :raises NonRecoverableError: If Boto errors.
+    """
+
+    if not resource_id:
+        return None
+
+    scope = (ctx.deployment.id, ctx.execution_id, resource_type,
+             connection.EC2ConnectionClient().connection_key())
+
+    if ctx.execution_id:
+        snapshot = _get_snapshot(scope)
+        if resource_id in snapshot:
+            return snapshot[resource_id]
+
+    try:
+        return _inventory_coalescer.submit(
+            _InventoryGroup(scope, describe, get_resource_id), resource_id)
+    except (exception.EC2ResponseError,
+            exception.BotoServerError) as e:
+        raise NonRecoverableError('{0}'.format(str(e)))
+
+
+def _get_snapshot(scope):
+    with _snapshots_lock:
+        snapshot = _snapshots.pop(scope, None)
+        if snapshot is None:
+            snapshot = {}
+            while len(_snapshots) >= constants.INVENTORY_SNAPSHOTS_MAX:
+                _snapshots.popitem(last=False)
+        _snapshots[scope] = snapshot
+        return snapshot
+
+
+class _InventoryGroup(object):
+    """The lookups of one snapshot. They are described with the describe
+    function of the operation that leads the batch.
+    """
+
+    def __init__(self, scope, describe, get_resource_id):
+        self.scope = scope
+        self.describe = describe
+        self.get_resource_id = get_resource_id
+
+    def __hash__(self):
+        return hash(self.scope)
+
+    def __eq__(self, other):
+        return isinstance(other, _InventoryGroup) and \
+            self.scope == other.scope
+
+    def __ne__(self, other):
+        return not self == other
+
+
+def _describe_batch(group, resource_ids):
+    """Describes the IDs looked up concurrently and adds them to the
+    snapshot, including the ones that were not found. Without an
+    execution ID nothing is kept.
+
+    :returns a dict of ID to resource.
+    """
+
+    found = _describe(group, resource_ids)
+
+    if group.scope[1]:
+        snapshot = _get_snapshot(group.scope)
+        for resource_id in resource_ids:
+            snapshot[resource_id] = found.get(resource_id)
+
+    return found
+
+
+def _describe(group, resource_ids):
+    """Describes a list of IDs. A describe by ID fails as a whole if one
+    of the IDs does not exist or is malformed, so then every ID is
+    described on its own.
+    """
+
+    try:
+        resources = retry.execute_with_retry(
+            group.describe, dict(resource_ids=resource_ids))
+    except (exception.EC2ResponseError,
+            exception.BotoServerError) as e:
+        if not _is_not_found(e):
+            raise
+        if len(resource_ids) == 1:
+            return {}
+        found = {}
+        for resource_id in resource_ids:
+            found.update(_describe(group, [resource_id]))
+        return found
+
+    return dict((group.get_resource_id(resource), resource)
+                for resource in resources or [])
+
+
+def _is_not_found(error):
+    error_code = '{0} {1}'.format(retry.get_error_code(error), str(error))
+    return any(token in error_code
+               for token in constants.INVENTORY_NOT_FOUND_ERROR_TOKENS)
+
+
+_inventory_coalescer = coalescer.Coalescer(
+    _describe_batch, window=constants.INVENTORY_WINDOW)
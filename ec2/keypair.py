@@ -23,9 +23,10 @@ import boto.exception
 from ec2 import utils
 from ec2 import constants
 from ec2 import connection
+from ec2 import inventory
 from cloudify import ctx
 from cloudify.exceptions import NonRecoverableError
-from cloudify.decorators import operation
+from ec2.metrics import operation
 
 KEYPAIR_AWS_TYPE = 'keypair'
 RUNTIME_PROPERTIES = [constants.AWS_TYPE_PROPERTY,
@@ -43,27 +44,28 @@ def creation_validation(**_):
     key_file = _get_path_to_key_file()
     key_file_in_filesystem = _search_for_key_file(key_file)
 
+    key_pair = inventory.get_resource(
+        'key_pair', ctx.node.properties['resource_id'],
+        lambda resource_ids: connection.EC2ConnectionClient().client()
+        .get_all_key_pairs(keynames=resource_ids),
+        inventory.get_name)
+
     if ctx.node.properties['use_external_resource']:
         if not key_file_in_filesystem:
             raise NonRecoverableError(
                 'External resource, but the key file does not exist locally.')
-        try:
-            _get_key_pair_by_id(ctx.node.properties['resource_id'])
-        except NonRecoverableError as e:
+        if not key_pair:
             raise NonRecoverableError(
                 'External resource, '
                 'but the key pair does not exist in the account: '
-                '{0}'.format(str(e)))
+                '{0} {1}'.format(constants.KEYPAIR_NOT_FOUND_ERROR,
+                                 ctx.node.properties['resource_id']))
     else:
         if key_file_in_filesystem:
             raise NonRecoverableError(
                 'Not external resource, '
                 'but the key file exists locally.')
-        try:
-            _get_key_pair_by_id(ctx.node.properties['resource_id'])
-        except NonRecoverableError:
-            pass
-        else:
+        if key_pair:
             raise NonRecoverableError(
                 'Not external resource, '
                 'but the key pair exists in the account.')
@@ -233,6 +235,9 @@ def _get_key_pair_by_id(key_pair_id):
     :raises NonRecoverableError: If EC2 finds no matching key pairs.
     """
 
+    if not key_pair_id:
+        raise NonRecoverableError('No key pair ID was provided.')
+
     ec2_client = connection.EC2ConnectionClient().client()
 
     try:
@@ -0,0 +1,283 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+# Built-in Imports
+import os
+import json
+import time
+import bisect
+import tempfile
+import functools
+import threading
+
+# Third-party Imports
+from boto import exception
+
+# Cloudify imports
+from ec2 import utils
+from ec2 import retry
+from ec2 import constants
+from cloudify import ctx
+from cloudify import decorators
+from cloudify.state import current_ctx
+
+
+class ApiMetrics(object):
+    """Counts, per API action, the calls made, their latency histogram,
+    retries, throttles, errors and response sizes.
+    """
+
+    def __init__(self, buckets=constants.METRICS_LATENCY_BUCKETS):
+        self.buckets = list(buckets)
+        self._actions = {}
+        self._lock = threading.Lock()
+
+    def record_call(self, action, seconds, response_size=0,
+                    error_code=None, throttled=False):
+        with self._lock:
+            counters = self._get_counters(action)
+            counters['calls'] += 1
+            counters['seconds'] += seconds
+            counters['max_seconds'] = max(counters['max_seconds'], seconds)
+            counters['response_bytes'] += response_size
+            counters['histogram'][
+                bisect.bisect_left(self.buckets, seconds)] += 1
+            if error_code:
+                counters['errors'] += 1
+            if throttled:
+                counters['throttles'] += 1
+
+    def record_retry(self, action):
+        with self._lock:
+            self._get_counters(action)['retries'] += 1
+
+    def get_counters(self):
+        """Returns a copy of the counters, per API action.
+        """
+
+        with self._lock:
+            return dict((action, dict(counters,
+                                      histogram=list(counters['histogram'])))
+                        for action, counters in self._actions.items())
+
+    def reset(self):
+        with self._lock:
+            self._actions.clear()
+
+    def to_prometheus(self):
+        """Renders the counters in the Prometheus text exposition format.
+        """
+
+        lines = []
+        counters = self.get_counters()
+
+        for name, key, help_text in [
+                ('calls_total', 'calls', 'API calls made.'),
+                ('errors_total', 'errors', 'API calls that failed.'),
+                ('throttles_total', 'throttles', 'API calls throttled.'),
+                ('retries_total', 'retries', 'API calls retried.'),
+                ('response_bytes_total', 'response_bytes',
+                 'Response bytes received.')]:
+            metric = '{0}_{1}'.format(constants.METRICS_PREFIX, name)
+            lines.append('# HELP {0} {1}'.format(metric, help_text))
+            lines.append('# TYPE {0} counter'.format(metric))
+            for action in sorted(counters):
+                lines.append('{0}{{action="{1}"}} {2}'.format(
+                    metric, action, counters[action][key]))
+
+        metric = '{0}_call_seconds'.format(constants.METRICS_PREFIX)
+        lines.append('# HELP {0} API call latency.'.format(metric))
+        lines.append('# TYPE {0} histogram'.format(metric))
+        for action in sorted(counters):
+            cumulative = 0
+            histogram = counters[action]['histogram']
+            for bucket, count in zip(self.buckets + ['+Inf'], histogram):
+                cumulative += count
+                lines.append('{0}_bucket{{action="{1}",le="{2}"}} {3}'.format(
+                    metric, action, bucket, cumulative))
+            lines.append('{0}_sum{{action="{1}"}} {2}'.format(
+                metric, action, counters[action]['seconds']))
+            lines.append('{0}_count{{action="{1}"}} {2}'.format(
+                metric, action, counters[action]['calls']))
+
+        return '\n'.join(lines) + '\n'
+
+    def _get_counters(self, action):
+        return self._actions.setdefault(action, dict(
+            calls=0, errors=0, throttles=0, retries=0, seconds=0.0,
+            max_seconds=0.0, response_bytes=0,
+            histogram=[0] * (len(self.buckets) + 1)))
+
+
+process_metrics = ApiMetrics()
+_local = threading.local()
+
+
+def install(connection):
+    """Records every request sent through a boto connection in the
+    process wide metrics and in the metrics of the current operation.
+
+    A call of the same action right after a retryable error on the same
+    thread is counted as a retry, which is what execute_with_retry does.
+    boto returns 4xx responses, such as RequestLimitExceeded, instead of
+    raising them, so their error code is read from the response body.
+
+    :param connection: A boto AWSQueryConnection.
+    :returns the connection.
+    """
+
+    if getattr(connection, '_metrics_installed', False):
+        return connection
+
+    make_request = connection.make_request
+
+    def measured_make_request(action, *args, **kwargs):
+        if getattr(_local, 'failed_action', None) == action:
+            for metrics in _get_all_metrics():
+                metrics.record_retry(action)
+        _local.failed_action = None
+        started = time.time()
+        response_size = 0
+        error = None
+        error_code = None
+        throttled = False
+        try:
+            response = make_request(action, *args, **kwargs)
+            response_size = int(
+                response.getheader('content-length') or 0)
+            if response.status >= 400:
+                # the body is cached for the caller, which raises it
+                error = exception.BotoServerError(
+                    response.status, response.reason, response.read())
+            return response
+        except (exception.EC2ResponseError,
+                exception.BotoServerError) as e:
+            error = e
+            raise
+        finally:
+            if error is not None:
+                error_code = retry.get_error_code(error) or str(error.status)
+                throttled = retry.is_throttling_error(error)
+                if retry.is_retryable_error(error, retry_not_found=True):
+                    _local.failed_action = action
+            seconds = time.time() - started
+            for metrics in _get_all_metrics():
+                metrics.record_call(action, seconds, response_size,
+                                    error_code, throttled)
+
+    connection.make_request = measured_make_request
+    connection._metrics_installed = True
+
+    return connection
+
+
+def get_operation_metrics():
+    """Returns the metrics of the current operation, or None outside of
+    an operation.
+    """
+
+    try:
+        current_ctx.get_ctx()
+    except RuntimeError:
+        return None
+
+    cache = utils.get_operation_cache(constants.METRICS_CACHE)
+    return cache.setdefault('metrics', ApiMetrics())
+
+
+def _get_all_metrics():
+    operation_metrics = get_operation_metrics()
+    return [process_metrics] + \
+        ([operation_metrics] if operation_metrics else [])
+
+
+def log_operation_summary():
+    """Logs the API calls made by the current operation.
+    """
+
+    operation_metrics = get_operation_metrics()
+    counters = operation_metrics.get_counters() if operation_metrics else {}
+
+    if not counters:
+        return
+
+    ctx.logger.info('AWS API calls: {0}'.format(', '.join(
+        '{0} x{1} {2:.3f}s{3}{4}'.format(
+            action, counters[action]['calls'], counters[action]['seconds'],
+            ' retries={0}'.format(counters[action]['retries'])
+            if counters[action]['retries'] else '',
+            ' throttles={0}'.format(counters[action]['throttles'])
+            if counters[action]['throttles'] else '')
+        for action in sorted(counters))))
+
+
+def get_dump_dir():
+    """Returns the directory the metrics files are written to. An empty
+    AWS_METRICS_DIR disables the files.
+    """
+
+    return os.environ.get(constants.METRICS_DIR_ENV_VAR_NAME,
+                          tempfile.gettempdir())
+
+
+def dump(directory=None):
+    """Writes the process wide metrics to <prefix>-<pid>.json and, in the
+    Prometheus text format, to <prefix>-<pid>.prom.
+
+    :returns the paths written.
+    """
+
+    directory = get_dump_dir() if directory is None else directory
+
+    if not directory:
+        return []
+
+    base_path = os.path.join(directory, '{0}-{1}'.format(
+        constants.METRICS_FILE_PREFIX, os.getpid()))
+    paths = []
+
+    for extension, content in [
+            ('json', json.dumps(dict(
+                buckets=process_metrics.buckets,
+                actions=process_metrics.get_counters()),
+                indent=2, sort_keys=True)),
+            ('prom', process_metrics.to_prometheus())]:
+        path = '{0}.{1}'.format(base_path, extension)
+        with open(path + '.tmp', 'w') as metrics_file:
+            metrics_file.write(content)
+        os.rename(path + '.tmp', path)
+        paths.append(path)
+
+    return paths
+
+
+def operation(func):
+    """cloudify.decorators.operation, which also logs the API call
+    summary of the operation and dumps the metrics when it ends.
+    """
+
+    @functools.wraps(func)
+    def measured_operation(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            log_operation_summary()
+            try:
+                dump()
+            except (IOError, OSError) as e:
+                ctx.logger.debug(
+                    'Unable to write API call metrics: {0}'.format(str(e)))
+
+    return decorators.operation(measured_operation)
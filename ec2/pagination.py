@@ -0,0 +1,184 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+# Third-party Imports
+from boto.vpc.vpc import VPC
+from boto.vpc.subnet import Subnet
+from boto.ec2.volume import Volume
+from boto.ec2.snapshot import Snapshot
+from boto.vpc.routetable import RouteTable
+from boto.vpc.networkacl import NetworkAcl
+from boto.vpc.dhcpoptions import DhcpOptions
+from boto.ec2.securitygroup import SecurityGroup
+from boto.vpc.internetgateway import InternetGateway
+
+# Cloudify imports
+from ec2 import retry
+from ec2 import constants
+
+# resource type > (describe action, boto class of its items), for the
+# describe calls that take MaxResults and NextToken, but whose boto 2
+# get_all_* method does not
+PAGED_DESCRIBE_ACTIONS = {
+    'volume': ('DescribeVolumes', Volume),
+    'snapshot': ('DescribeSnapshots', Snapshot),
+    'security_group': ('DescribeSecurityGroups', SecurityGroup),
+    'vpc': ('DescribeVpcs', VPC),
+    'subnet': ('DescribeSubnets', Subnet),
+    'route_table': ('DescribeRouteTables', RouteTable),
+    'network_acl': ('DescribeNetworkAcls', NetworkAcl),
+    'internet_gateway': ('DescribeInternetGateways', InternetGateway),
+    'dhcp_options': ('DescribeDhcpOptions', DhcpOptions)
+}
+
+
+def get_page_size(page_size=None):
+    """Keeps a page size within the MaxResults that AWS accepts.
+    """
+
+    return max(constants.MAX_RESULTS_MIN,
+               min(page_size or constants.PAGE_SIZE,
+                   constants.MAX_RESULTS_MAX))
+
+
+def iterate_pages(describe, args=None, page_size=None, retry_errors=True):
+    """Yields the pages of a describe call, one call per page, until a
+    page has no next token or the caller stops iterating.
+
+    :param describe: A function that takes max_results and next_token,
+    such as get_all_reservations.
+    :param args: A dict of the other keyword arguments of describe.
+    Describing by ID does not take MaxResults, use iterate_ids for that.
+    :param page_size: MaxResults of every call.
+    :param retry_errors: Whether to call describe with
+    retry.execute_with_retry, which needs an operation context.
+    :raises the Boto error of a call.
+    """
+
+    args = dict(args or {}, max_results=get_page_size(page_size))
+
+    while True:
+        if retry_errors:
+            page = retry.execute_with_retry(describe, args)
+        else:
+            page = describe(**args)
+        yield page
+        args['next_token'] = getattr(page, 'next_token', None)
+        if not args['next_token']:
+            return
+
+
+def iterate(describe, args=None, page_size=None, retry_errors=True):
+    """Yields the resources of a describe call. Only the current page is
+    kept in memory. See iterate_pages.
+    """
+
+    for page in iterate_pages(describe, args, page_size, retry_errors):
+        for resource in page or []:
+            yield resource
+
+
+def iterate_ids(describe, ids_argument, ids, args=None, page_size=None):
+    """Yields the resources with the given IDs, describing page_size IDs
+    per call.
+
+    :param describe: A boto get_all_* method.
+    :param ids_argument: The keyword argument of the IDs, like volume_ids.
+    :param ids: A list of IDs, or a single ID.
+    :param args: A dict of the other keyword arguments of describe.
+    :raises the Boto error of a call.
+    """
+
+    if isinstance(ids, basestring):
+        ids = [ids]
+    page_size = page_size or constants.PAGE_SIZE
+
+    for start in range(0, len(ids), page_size):
+        page_args = dict(args or {})
+        page_args[ids_argument] = ids[start:start + page_size]
+        for resource in retry.execute_with_retry(describe, page_args) or []:
+            yield resource
+
+
+def iterate_markers(describe, args=None, retry_errors=True):
+    """Yields the resources of a describe call that pages with Marker and
+    NextMarker, like get_all_load_balancers.
+    """
+
+    args = dict(args or {})
+
+    while True:
+        if retry_errors:
+            page = retry.execute_with_retry(describe, args)
+        else:
+            page = describe(**args)
+        for resource in page or []:
+            yield resource
+        args['marker'] = getattr(page, 'next_marker', None)
+        if not args['marker']:
+            return
+
+
+def get_paged_describe(client, resource_type, params=None):
+    """Makes a describe function that takes filters, max_results and
+    next_token for a resource type of PAGED_DESCRIBE_ACTIONS.
+
+    :param client: A boto EC2 or VPC connection.
+    :param params: Other request parameters, like {'Owner.1': 'self'}.
+    """
+
+    action, item_class = PAGED_DESCRIBE_ACTIONS[resource_type]
+
+    def describe(filters=None, max_results=None, next_token=None):
+        request_params = dict(params or {})
+        if filters:
+            client.build_filter_params(request_params, filters)
+        if max_results:
+            request_params['MaxResults'] = max_results
+        if next_token:
+            request_params['NextToken'] = next_token
+        return client.get_list(action, request_params,
+                               [('item', item_class)], verb='POST')
+
+    describe.__name__ = action
+    return describe
+
+
+def iterate_resources(client, resource_type, filters=None, params=None,
+                      page_size=None, retry_errors=True):
+    """Yields the resources of a type of PAGED_DESCRIBE_ACTIONS, a page
+    at a time.
+    """
+
+    return iterate(get_paged_describe(client, resource_type, params),
+                   dict(filters=filters), page_size, retry_errors)
+
+
+def iterate_instances(ec2_client, filters=None, page_size=None,
+                      retry_errors=True):
+    """Yields the instances of the reservations that match filters, a
+    page of reservations at a time.
+    """
+
+    for reservation in iterate(ec2_client.get_all_reservations,
+                               dict(filters=filters), page_size,
+                               retry_errors):
+        for instance in reservation.instances:
+            yield instance
+
+
+def iterate_load_balancers(elb_client, retry_errors=True):
+    return iterate_markers(elb_client.get_all_load_balancers,
+                           retry_errors=retry_errors)
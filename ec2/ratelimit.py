@@ -0,0 +1,238 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+# Built-in Imports
+import os
+import json
+import mmap
+import time
+import fcntl
+import struct
+import tempfile
+import threading
+
+# Cloudify imports
+from ec2 import constants
+
+HEADER = struct.Struct('>I')
+
+
+def get_action_class(action):
+    """Maps an API action name, such as DescribeInstances, to the
+    action class its rate limit is configured under.
+    """
+
+    if action in constants.RATE_LIMIT_TAG_ACTIONS:
+        return 'tag'
+    for prefix in constants.RATE_LIMIT_DESCRIBE_PREFIXES:
+        if action.startswith(prefix):
+            return 'describe'
+    return 'mutate'
+
+
+def get_rate_limits():
+    """Returns the configured action class > (rate, burst) limits.
+
+    The defaults in constants.RATE_LIMITS can be overridden per class with
+    a JSON object in the AWS_RATE_LIMITS environment variable, for example
+    {"describe": [50, 200], "tag": null}. A class set to null or to a
+    rate of 0 is not limited.
+    """
+
+    rate_limits = dict(constants.RATE_LIMITS)
+    overrides = os.environ.get(constants.RATE_LIMITS_ENV_VAR_NAME)
+
+    if overrides:
+        rate_limits.update(json.loads(overrides))
+
+    return dict((action_class, limit)
+                for action_class, limit in rate_limits.items()
+                if limit and limit[0] > 0)
+
+
+def get_state_path():
+    return os.environ.get(
+        constants.RATE_LIMIT_STATE_PATH_ENV_VAR_NAME,
+        os.path.join(tempfile.gettempdir(),
+                     constants.RATE_LIMIT_STATE_FILE_NAME))
+
+
+class SharedBuckets(object):
+    """Token buckets kept in a memory mapped file, so that every worker
+    process on the host draws from the same buckets.
+
+    The file holds a length prefixed JSON object mapping a bucket key to
+    its [tokens, last refill time]. Access is serialized with flock
+    between processes and with a lock between threads. If the file cannot
+    be used, the buckets are kept in this process only.
+    """
+
+    def __init__(self, path, size=constants.RATE_LIMIT_STATE_SIZE):
+        self.path = path
+        self.size = size
+        self._map = None
+        self._file = None
+        self._local_state = None
+        self._lock = threading.Lock()
+
+    def reserve(self, key, rate, burst):
+        """Takes a token from the bucket of key.
+
+        The bucket may go into debt, so that callers are served in the
+        order they asked and each only needs a single round trip.
+
+        :returns the number of seconds to wait before using the token.
+        """
+
+        with self._lock:
+            self._open()
+            if self._map is not None:
+                fcntl.flock(self._file, fcntl.LOCK_EX)
+            try:
+                state = self._load()
+                now = time.time()
+                tokens, last_refill = state.get(key, (burst, now))
+                tokens = min(
+                    burst, tokens + max(0, now - last_refill) * rate) - 1
+                state[key] = [tokens, now]
+                self._store(state)
+            finally:
+                if self._map is not None:
+                    fcntl.flock(self._file, fcntl.LOCK_UN)
+
+        return max(0.0, -tokens / float(rate))
+
+    def _open(self):
+        if self._map is not None or self._local_state is not None:
+            return
+        try:
+            self._file = open(self.path, 'a+b')
+            if os.fstat(self._file.fileno()).st_size < self.size:
+                fcntl.flock(self._file, fcntl.LOCK_EX)
+                try:
+                    if os.fstat(self._file.fileno()).st_size < self.size:
+                        self._file.truncate(self.size)
+                finally:
+                    fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._map = mmap.mmap(self._file.fileno(), self.size)
+        except (IOError, OSError, mmap.error):
+            self._local_state = {}
+
+    def _load(self):
+        if self._map is None:
+            return self._local_state
+        length, = HEADER.unpack_from(self._map, 0)
+        if not 0 < length <= self.size - HEADER.size:
+            return {}
+        try:
+            return json.loads(
+                self._map[HEADER.size:HEADER.size + length])
+        except ValueError:
+            return {}
+
+    def _store(self, state):
+        if self._map is None:
+            return
+        data = json.dumps(state)
+        if len(data) > self.size - HEADER.size:
+            data = '{}'
+        self._map[HEADER.size:HEADER.size + len(data)] = data
+        HEADER.pack_into(self._map, 0, len(data))
+
+
+class RateLimiter(object):
+    """Blocks API calls until their region and action class have a token.
+    """
+
+    def __init__(self, buckets=None):
+        self.buckets = buckets
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, region, action):
+        """Waits until a call of action may be sent to region.
+
+        :returns the number of seconds waited.
+        """
+
+        action_class = get_action_class(action)
+        limit = get_rate_limits().get(action_class)
+        if not limit:
+            return 0.0
+
+        if self.buckets is None:
+            self.buckets = SharedBuckets(get_state_path())
+
+        wait = self.buckets.reserve(
+            '{0}:{1}'.format(region, action_class), *limit)
+        if wait:
+            time.sleep(wait)
+        self._count(action_class, wait)
+
+        return wait
+
+    def get_wait_counters(self):
+        """Returns, per action class, how many calls were made, how many
+        of them had to wait and for how long in total and at most.
+        """
+
+        with self._lock:
+            return dict((action_class, dict(counters))
+                        for action_class, counters in self._counters.items())
+
+    def reset_wait_counters(self):
+        with self._lock:
+            self._counters.clear()
+
+    def _count(self, action_class, wait):
+        with self._lock:
+            counters = self._counters.setdefault(
+                action_class,
+                dict(calls=0, waits=0, wait_seconds=0.0, max_wait=0.0))
+            counters['calls'] += 1
+            if wait:
+                counters['waits'] += 1
+                counters['wait_seconds'] += wait
+                counters['max_wait'] = max(counters['max_wait'], wait)
+
+
+rate_limiter = RateLimiter()
+
+
+def install(connection, limiter=None):
+    """Makes every request sent through a boto connection wait for the
+    rate limiter first.
+
+    :param connection: A boto AWSQueryConnection.
+    :param limiter: Defaults to the process wide rate_limiter.
+    :returns the connection.
+    """
+
+    if getattr(connection, '_rate_limited', False):
+        return connection
+
+    limiter = limiter or rate_limiter
+    region = getattr(getattr(connection, 'region', None), 'name', None) or \
+        getattr(connection, 'host', None)
+    make_request = connection.make_request
+
+    def rate_limited_make_request(action, *args, **kwargs):
+        limiter.acquire(region, action)
+        return make_request(action, *args, **kwargs)
+
+    connection.make_request = rate_limited_make_request
+    connection._rate_limited = True
+
+    return connection
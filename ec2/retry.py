@@ -0,0 +1,130 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+# Built-in Imports
+import os
+import math
+import time
+import random
+
+# Third-party Imports
+from boto import exception
+
+# Cloudify imports
+from ec2 import constants
+from cloudify import ctx
+from cloudify.exceptions import RecoverableError
+
+
+def get_error_code(error):
+    """Returns the AWS error code of a boto error, such as
+    RequestLimitExceeded or InvalidInstanceID.NotFound.
+    """
+
+    error_code = getattr(error, 'error_code', None)
+
+    if not error_code:
+        for code in constants.THROTTLING_ERROR_CODES + \
+                constants.TRANSIENT_ERROR_CODES:
+            if '<Code>{0}</Code>'.format(code) in str(error):
+                return code
+
+    return error_code
+
+
+def is_throttling_error(error):
+    return get_error_code(error) in constants.THROTTLING_ERROR_CODES
+
+
+def is_transient_error(error):
+    status = getattr(error, 'status', None)
+    return get_error_code(error) in constants.TRANSIENT_ERROR_CODES or \
+        (isinstance(status, int) and status >= 500)
+
+
+def is_eventual_consistency_error(error):
+    error_code = get_error_code(error)
+    return bool(error_code) and error_code.endswith('.NotFound')
+
+
+def is_retryable_error(error, retry_not_found=False):
+    """Checks whether an error is worth retrying in-process.
+
+    :param error: A boto exception.
+    :param retry_not_found: Whether *.NotFound codes should be treated as
+    eventual consistency. Only set it when the resource is known to exist,
+    for example right after creating it.
+    :returns boolean.
+    """
+
+    if not isinstance(error, (exception.EC2ResponseError,
+                              exception.BotoServerError)):
+        return False
+
+    return is_throttling_error(error) or is_transient_error(error) or \
+        (retry_not_found and is_eventual_consistency_error(error))
+
+
+def get_time_budget():
+    """Returns the in-process retry time budget in seconds.
+    """
+
+    return float(os.environ.get(constants.RETRY_TIME_BUDGET_ENV_VAR_NAME,
+                                constants.RETRY_TIME_BUDGET))
+
+
+def execute_with_retry(fn, args=None, retry_not_found=False,
+                       time_budget=None):
+    """Calls fn, retrying throttling, transient and (optionally) eventual
+    consistency errors with decorrelated jitter exponential backoff.
+
+    :param fn: The boto function to call.
+    :param args: A dict of keyword arguments for fn.
+    :param retry_not_found: See is_retryable_error.
+    :param time_budget: Seconds to keep retrying for. Defaults to
+    get_time_budget().
+    :returns the output of fn.
+    :raises RecoverableError: If the budget ran out while the error was
+    still retryable. retry_after suggests when to try again.
+    :raises the original boto exception if it is not retryable.
+    """
+
+    if time_budget is None:
+        time_budget = get_time_budget()
+
+    deadline = time.time() + time_budget
+    delay = constants.RETRY_BASE_DELAY
+
+    while True:
+        try:
+            return fn(**args) if args else fn()
+        except (exception.EC2ResponseError,
+                exception.BotoServerError) as e:
+            if not is_retryable_error(e, retry_not_found):
+                raise
+            delay = min(constants.RETRY_MAX_DELAY,
+                        random.uniform(constants.RETRY_BASE_DELAY,
+                                       delay * 3))
+            if time.time() + delay > deadline:
+                raise RecoverableError(
+                    'AWS call {0} did not succeed within {1} seconds: {2}'
+                    .format(getattr(fn, '__name__', fn),
+                            time_budget, str(e)),
+                    retry_after=int(math.ceil(delay)))
+            ctx.logger.debug(
+                'Retrying {0} in {1:.2f} seconds, because of {2}.'
+                .format(getattr(fn, '__name__', fn), delay,
+                        get_error_code(e)))
+            time.sleep(delay)
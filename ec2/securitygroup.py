@@ -23,9 +23,13 @@ import boto.exception
 from ec2 import utils
 from ec2 import constants
 from ec2 import connection
+from ec2 import retry
+from ec2 import inventory
+from ec2 import pagination
+from ec2 import tagging
 from cloudify import ctx
 from cloudify.exceptions import NonRecoverableError
-from cloudify.decorators import operation
+from ec2.metrics import operation
 
 
 @operation
@@ -36,7 +40,7 @@ def creation_validation(**_):
     for property_key in constants.SECURITY_GROUP_REQUIRED_PROPERTIES:
         utils.validate_node_property(property_key, ctx.node.properties)
 
-    security_group = _get_security_group_from_id(
+    security_group = _get_security_group_for_validation(
         utils.get_resource_id())
 
     if ctx.node.properties['use_external_resource'] and not security_group:
@@ -84,6 +88,7 @@ def create(**_):
     _create_group_rules(group_object)
     utils.set_external_resource_id(
         group_object.id, ctx.instance, external=False)
+    tagging.tag_resource(group_object.id)
 
 
 @operation
@@ -144,41 +149,50 @@ def _delete_security_group(group_id):
 def _create_group_rules(group_object):
     """For each rule listed in the blueprint,
     this will add the rule to the group with the given id.
+
+    The source groups of all rules are resolved up front, and the rules
+    are authorized with a few AuthorizeSecurityGroupIngress calls that
+    each carry several IpPermissions.
+
     :param group: The group object that you want to add rules to.
     :raises NonRecoverableError: src_group_id OR ip_protocol,
     from_port, to_port, and cidr_ip are not provided.
     """
 
-    for rule in ctx.node.properties['rules']:
+    rules = ctx.node.properties['rules']
 
-        if 'src_group_id' in rule:
+    for rule in rules:
+        if 'src_group_id' in rule and 'cidr_ip' in rule:
+            raise NonRecoverableError(
+                'You need to pass either src_group_id OR cidr_ip.')
+        elif 'src_group_id' not in rule and 'cidr_ip' not in rule:
+            raise NonRecoverableError(
+                'You need to pass either src_group_id OR cidr_ip.')
 
-            if 'cidr_ip' in rule:
-                raise NonRecoverableError(
-                    'You need to pass either src_group_id OR cidr_ip.')
+    src_groups = _get_src_groups(
+        group_object,
+        [rule['src_group_id'] for rule in rules if 'src_group_id' in rule])
 
-            if not group_object.vpc_id:
-                src_group_object = \
-                    _get_security_group_from_id(
-                        rule['src_group_id'])
-            else:
-                src_group_object = _get_vpc_security_group_from_name(
-                    rule['src_group_id'])
+    permissions = []
 
+    for rule in rules:
+        src_group_object = None
+
+        if 'src_group_id' in rule:
+            src_group_object = src_groups.get(rule['src_group_id'])
             if not src_group_object:
                 raise NonRecoverableError(
                     'Supplied src_group_id {0} doesn ot exist in '
                     'the given account.'.format(rule['src_group_id']))
 
-            del rule['src_group_id']
-            rule['src_group'] = src_group_object
+        permissions.append((rule, src_group_object))
 
-        elif 'cidr_ip' not in rule:
-            raise NonRecoverableError(
-                'You need to pass either src_group_id OR cidr_ip.')
+    chunk_size = constants.SECURITY_GROUP_RULES_PER_CALL
 
+    for index in range(0, len(permissions), chunk_size):
         try:
-            group_object.authorize(**rule)
+            _authorize_ingress(
+                group_object, permissions[index:index + chunk_size])
         except (boto.exception.EC2ResponseError,
                 boto.exception.BotoServerError) as e:
             raise NonRecoverableError('{0}'.format(str(e)))
@@ -187,6 +201,106 @@ def _create_group_rules(group_object):
             raise
 
 
+def _get_src_groups(group_object, list_of_src_group_ids):
+    """Resolves the src_group_id of every rule with as few describes
+    as possible.
+
+    Like _get_security_group_from_id, a src_group_id of a non VPC group
+    may be an ID or a name, while that of a VPC group is a name.
+
+    :param group_object: The group that the rules are added to.
+    :param list_of_src_group_ids: The src_group_id of every rule.
+    :returns a dict of src_group_id to security group object.
+    """
+
+    src_groups = {}
+    group_ids = []
+    group_names = []
+
+    for src_group_id in set(list_of_src_group_ids):
+        if not group_object.vpc_id and \
+                re.match(r'^sg\-[0-9a-z]{8}$', src_group_id):
+            group_ids.append(src_group_id)
+        else:
+            group_names.append(src_group_id)
+
+    if group_ids:
+        for group in _get_all_security_groups(
+                filters={'group-id': group_ids}) or []:
+            src_groups[group.id] = group
+
+    if group_names:
+        src_groups.update(_get_security_groups_from_names(
+            group_names, group_object.vpc_id))
+
+    return src_groups
+
+
+def _authorize_ingress(group_object, permissions):
+    """Adds several rules to a group with one AuthorizeSecurityGroupIngress
+    call, and then to the group object, like SecurityGroup.authorize does.
+
+    :param group_object: The group that the rules are added to.
+    :param permissions: A list of (rule, src_group_object or None).
+    :returns True if successful.
+    """
+
+    ec2_client = connection.EC2ConnectionClient().client()
+
+    if group_object.vpc_id:
+        params = {'GroupId': group_object.id}
+    else:
+        params = {'GroupName': group_object.name}
+
+    added_rules = []
+
+    for index, (rule, src_group_object) in enumerate(permissions, 1):
+        prefix = 'IpPermissions.{0}.'.format(index)
+        src_group_name = src_group_owner_id = src_group_group_id = None
+        cidr_ips = rule.get('cidr_ip')
+
+        if rule.get('ip_protocol'):
+            params[prefix + 'IpProtocol'] = rule['ip_protocol']
+        if rule.get('from_port') is not None:
+            params[prefix + 'FromPort'] = rule['from_port']
+        if rule.get('to_port') is not None:
+            params[prefix + 'ToPort'] = rule['to_port']
+
+        if src_group_object:
+            cidr_ips = None
+            src_group_owner_id = src_group_object.owner_id
+            params[prefix + 'Groups.1.UserId'] = src_group_owner_id
+            if not group_object.vpc_id:
+                src_group_name = src_group_object.name
+                params[prefix + 'Groups.1.GroupName'] = src_group_name
+            else:
+                src_group_group_id = src_group_object.id
+                params[prefix + 'Groups.1.GroupId'] = src_group_group_id
+
+        if not isinstance(cidr_ips, list):
+            cidr_ips = [cidr_ips]
+
+        for cidr_index, cidr_ip in enumerate(cidr_ips, 1):
+            if cidr_ip:
+                params['{0}IpRanges.{1}.CidrIp'.format(
+                    prefix, cidr_index)] = cidr_ip
+            added_rules.append(
+                (rule.get('ip_protocol'), rule.get('from_port'),
+                 rule.get('to_port'), src_group_name, src_group_owner_id,
+                 cidr_ip, src_group_group_id))
+
+    status = retry.execute_with_retry(
+        ec2_client.get_status,
+        dict(action='AuthorizeSecurityGroupIngress',
+             params=params, verb='POST'))
+
+    if status:
+        for added_rule in added_rules:
+            group_object.add_rule(*added_rule)
+
+    return status
+
+
 def _create_external_securitygroup(name):
     """If use_external_resource is True, this will set the runtime_properties,
     and then exit.
@@ -228,6 +342,27 @@ def _delete_external_securitygroup():
     return True
 
 
+def _get_security_group_for_validation(group_id_or_name):
+    """Looks up a security group by ID or name in the validation
+    inventory.
+
+    :param group_id_or_name: The ID or name of a security group.
+    :returns The boto security group object or None.
+    """
+
+    if re.match(r'^sg\-[0-9a-z]{8}$', group_id_or_name):
+        return inventory.get_resource(
+            'security_group', group_id_or_name,
+            lambda resource_ids: connection.EC2ConnectionClient().client()
+            .get_all_security_groups(group_ids=resource_ids))
+
+    return inventory.get_resource(
+        'security_group_name', group_id_or_name,
+        lambda resource_ids: connection.EC2ConnectionClient().client()
+        .get_all_security_groups(groupnames=resource_ids),
+        inventory.get_name)
+
+
 def _get_security_group_from_id(group_id):
     """Returns the security group object for a given security group id.
 
@@ -260,19 +395,48 @@ def _get_security_group_from_name(group_name):
     return group[0] if group else group
 
 
-def _get_vpc_security_group_from_name(name):
-    groups = _get_all_security_groups()
-    for group in groups:
-        if group.name == name:
-            return group
-    return None
+def _get_security_groups_from_names(list_of_group_names, vpc_id=None):
+    """Returns the security group objects for a list of group names.
+
+    Groups are looked up with server side group-name (and vpc-id) filters
+    and kept in a name index for the rest of the operation, so only names
+    that were not looked up yet are described. Without a vpc_id, only
+    groups outside any VPC match.
+
+    :param list_of_group_names: A list of security group names.
+    :param vpc_id: Only look for the groups in this VPC.
+    :returns a dict of group name to security group object, for the
+    groups that were found.
+    """
+
+    name_index = utils.get_operation_cache(
+        constants.SECURITY_GROUP_NAME_CACHE)
+
+    missing_names = [name for name in set(list_of_group_names)
+                     if (vpc_id, name) not in name_index]
+
+    if missing_names:
+        filters = {'group-name': missing_names}
+        if vpc_id:
+            filters['vpc-id'] = vpc_id
+        for group in _get_all_security_groups(filters=filters) or []:
+            if group.vpc_id == vpc_id:
+                name_index[(vpc_id, group.name)] = group
+
+    return dict((name, name_index[(vpc_id, name)])
+                for name in list_of_group_names
+                if (vpc_id, name) in name_index)
 
 
-def _get_all_security_groups(list_of_group_names=None, list_of_group_ids=None):
+def _get_all_security_groups(list_of_group_names=None, list_of_group_ids=None,
+                             filters=None):
     """Returns a list of security groups for a given list of group names and IDs.
 
     :param list_of_group_names: A list of security group names.
     :param list_of_group_ids: A list of security group IDs.
+    :param filters: Server side filters, such as group-name or vpc-id.
+    Groups that are looked up by filters only are described a page at a
+    time.
     :returns A list of security group objects.
     :raises NonRecoverableError: If Boto errors.
     """
@@ -280,13 +444,19 @@ def _get_all_security_groups(list_of_group_names=None, list_of_group_ids=None):
     ec2_client = connection.EC2ConnectionClient().client()
 
     try:
-        groups = ec2_client.get_all_security_groups(
-            groupnames=list_of_group_names,
-            group_ids=list_of_group_ids)
+        if list_of_group_names or list_of_group_ids:
+            groups = ec2_client.get_all_security_groups(
+                groupnames=list_of_group_names,
+                group_ids=list_of_group_ids,
+                filters=filters)
+        else:
+            groups = list(pagination.iterate_resources(
+                ec2_client, 'security_group', filters=filters))
     except boto.exception.EC2ResponseError as e:
-        if 'InvalidGroup.NotFound' in e:
-            groups = ec2_client.get_all_security_groups()
-            utils.log_available_resources(groups)
+        if e.error_code == 'InvalidGroup.NotFound':
+            utils.log_available_resources(
+                lambda limit: pagination.iterate_resources(
+                    ec2_client, 'security_group', page_size=limit + 1))
         return None
     except boto.exception.BotoServerError as e:
         raise NonRecoverableError('{0}'.format(str(e)))
@@ -0,0 +1,164 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+# Built-in Imports
+import re
+import time
+import functools
+import threading
+
+# Third-party Imports
+from boto import exception
+
+# Cloudify imports
+from ec2 import retry
+from ec2 import constants
+from ec2 import fastdescribe
+from cloudify import ctx
+
+
+class _Scope(object):
+
+    def __init__(self):
+        self.states = {}
+        self.instance_ids = set()
+        self.refreshed = 0
+        self.lock = threading.Lock()
+
+
+class InstanceStateTracker(object):
+    """Keeps the state of the instances of a deployment in one map, shared
+    by all operations of the process.
+
+    The map is refreshed with DescribeInstanceStatus calls that include
+    stopped and pending instances. Only the instances read or invalidated
+    in a scope are described, up to INSTANCE_STATUS_IDS_PAGE_SIZE IDs per
+    call, so the states of N instances cost N / 100 calls per refresh
+    instead of N describes, whatever else runs in the account.
+    A state is served from the map for max_age seconds after the refresh
+    that observed it. A state invalidated after a mutating call is only
+    served again by a refresh that started after the invalidation.
+    """
+
+    def __init__(self, max_age=constants.INSTANCE_STATE_MAX_AGE):
+        self.max_age = max_age
+        self._scopes = {}
+        self._lock = threading.Lock()
+
+    def get_state(self, scope, instance_id, get_client):
+        """Returns the state code of a tracked instance.
+
+        :param scope: Instances are tracked and refreshed together per
+        scope, for example per deployment, account and region.
+        :param instance_id: The ID of an EC2 Instance.
+        :param get_client: Returns the EC2 connection to refresh with.
+        :returns the state code, or None if DescribeInstanceStatus does not
+        know the instance (yet) or could not be called.
+        """
+
+        tracked = self._get_scope(scope)
+
+        with tracked.lock:
+            if instance_id not in tracked.instance_ids:
+                # refreshes before now did not describe the instance
+                self._track(tracked, instance_id)
+            state = self._get_fresh(tracked, instance_id)
+            if state is not None or self._is_refreshed(tracked, instance_id):
+                return state
+            self._refresh(tracked, get_client())
+            return self._get_fresh(tracked, instance_id)
+
+    def invalidate(self, scope, instance_id):
+        """Forgets the state of an instance, for example after stopping it.
+        """
+
+        tracked = self._get_scope(scope)
+
+        with tracked.lock:
+            self._track(tracked, instance_id)
+
+    def _track(self, tracked, instance_id):
+        tracked.instance_ids.add(instance_id)
+        tracked.states[instance_id] = (None, time.time())
+
+    def _get_scope(self, scope):
+        with self._lock:
+            return self._scopes.setdefault(scope, _Scope())
+
+    def _get_fresh(self, tracked, instance_id):
+        state, observed = tracked.states.get(instance_id, (None, 0))
+        if state is not None and time.time() - observed <= self.max_age:
+            return state
+        return None
+
+    def _is_refreshed(self, tracked, instance_id):
+        """Whether a recent refresh already missed the instance, so that
+        instances it does not know yet do not refresh on every read.
+        """
+
+        _, observed = tracked.states.get(instance_id, (None, 0))
+        return tracked.refreshed >= observed and \
+            time.time() - tracked.refreshed <= self.max_age
+
+    def _refresh(self, tracked, ec2_client):
+        started = time.time()
+        tracked.refreshed = started
+        instance_ids = sorted(tracked.instance_ids)
+        page_size = constants.INSTANCE_STATUS_IDS_PAGE_SIZE
+        describe = ec2_client.get_all_instance_status
+        if fastdescribe.is_enabled():
+            describe = functools.partial(
+                fastdescribe.describe_instance_status, ec2_client)
+        statuses = []
+        try:
+            # all pages are read before any state is updated
+            for start in range(0, len(instance_ids), page_size):
+                statuses.extend(self._describe_page(
+                    describe, instance_ids[start:start + page_size]))
+        except (exception.EC2ResponseError,
+                exception.BotoServerError) as e:
+            ctx.logger.debug(
+                'Unable to refresh instance states: {0}'.format(str(e)))
+            return
+
+        for status in statuses:
+            if tracked.states.get(status.id, (None, 0))[1] <= started:
+                tracked.states[status.id] = (status.state_code, started)
+
+    def _describe_page(self, describe, instance_ids):
+        """Describes the states of a page of instance IDs. An instance that
+        is not visible yet, right after it was launched, fails the whole
+        call, so the page is described again without the IDs that AWS
+        reports missing.
+        """
+
+        def describe_ids(ids):
+            return retry.execute_with_retry(
+                describe, dict(instance_ids=ids, include_all_instances=True))
+
+        try:
+            return describe_ids(instance_ids)
+        except exception.EC2ResponseError as e:
+            if e.error_code != 'InvalidInstanceID.NotFound':
+                raise
+            missing = set(re.findall(r'i-[0-9a-f]+', str(e.message)))
+            found = [instance_id for instance_id in instance_ids
+                     if instance_id not in missing]
+            if len(found) == len(instance_ids):
+                raise
+            return describe_ids(found) if found else []
+
+
+state_tracker = InstanceStateTracker()
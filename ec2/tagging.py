@@ -0,0 +1,81 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+# Third-party Imports
+from boto import exception
+
+# Cloudify imports
+from ec2 import retry
+from ec2 import constants
+from ec2 import connection
+from cloudify import ctx
+from cloudify.exceptions import NonRecoverableError
+
+
+def get_tags(name=None):
+    """Gets the tags of a resource created by the current node instance:
+    its deployment and node instance IDs, a Name if given and the tags in
+    the node's tags property, which override the others.
+
+    :param name: The value of the Name tag, for example the node's
+    name property.
+    :returns a dict of tag key to value.
+    """
+
+    tags = {
+        constants.DEPLOYMENT_ID_TAG: ctx.deployment.id,
+        constants.NODE_INSTANCE_ID_TAG: ctx.instance.id
+    }
+
+    if name:
+        tags['Name'] = name
+
+    tags.update(ctx.node.properties.get('tags') or {})
+
+    return dict((key, value) for key, value in tags.items()
+                if value is not None)
+
+
+def tag_resource(resource_id, name=None):
+    """Tags a resource created by the current node instance, see get_tags.
+
+    The resource is not described first. Every resource is tagged with
+    its own CreateTags call, because the cloudify-node-instance-id tag
+    differs between node instances.
+
+    :param resource_id: The ID of the EC2 or VPC resource.
+    :param name: The value of the Name tag.
+    :raises NonRecoverableError: If the resource could not be tagged.
+    """
+
+    tags = get_tags(name)
+
+    if not tags:
+        return
+
+    ec2_client = connection.EC2ConnectionClient().client()
+
+    try:
+        retry.execute_with_retry(
+            ec2_client.create_tags,
+            dict(resource_ids=[resource_id], tags=tags),
+            retry_not_found=True)
+    except (exception.EC2ResponseError,
+            exception.BotoServerError) as e:
+        raise NonRecoverableError(
+            'Unable to tag resource {0}: {1}'.format(resource_id, str(e)))
+
+    ctx.logger.debug(
+        'Tagged resource {0} with {1}.'.format(resource_id, tags))
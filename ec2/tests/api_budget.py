@@ -0,0 +1,141 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+# Built-in Imports
+import os
+import json
+import math
+import time
+import weakref
+import testtools
+
+# Third Party Imports
+import mock
+
+# Cloudify Imports is imported and used in operations
+from ec2 import utils
+from ec2 import metrics
+from ec2 import constants
+from ec2 import statetracker
+from cloudify.state import current_ctx
+
+# Extra calls per API action allowed over the budget.
+CALLS_TOLERANCE_ENV_VAR_NAME = 'AWS_API_BUDGET_CALLS_TOLERANCE'
+CALLS_TOLERANCE = 0
+# Wall time may grow to budget * factor + slack seconds.
+LATENCY_FACTOR_ENV_VAR_NAME = 'AWS_API_BUDGET_LATENCY_FACTOR'
+LATENCY_FACTOR = 3.0
+LATENCY_SLACK = 1.0
+# Set to rewrite the budget files with the measured calls and times.
+UPDATE_ENV_VAR_NAME = 'AWS_API_BUDGET_UPDATE'
+
+
+class ApiBudgetTestCase(testtools.TestCase):
+    """Runs operations against moto and compares the API calls they make,
+    per action, and their wall time to the budget in budget_path.
+
+    To accept a change in the calls, rerun the tests with
+    AWS_API_BUDGET_UPDATE=1 and commit the budget file.
+    """
+
+    budget_path = None
+
+    def setUp(self):
+        super(ApiBudgetTestCase, self).setUp()
+        # rate limiter waits are not part of an operation's budget
+        no_rate_limits = json.dumps(
+            dict.fromkeys(constants.RATE_LIMITS.keys()))
+        for patcher in [
+                mock.patch.dict(
+                    os.environ, {constants.METRICS_DIR_ENV_VAR_NAME: '',
+                                 constants.RATE_LIMITS_ENV_VAR_NAME:
+                                 no_rate_limits}),
+                mock.patch.object(statetracker, 'state_tracker',
+                                  statetracker.InstanceStateTracker())]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def measure(self, name, operation, *args, **kwargs):
+        """Calls an operation and checks its API calls and wall time
+        against the budget called name.
+
+        :returns the output of the operation.
+        """
+
+        api_metrics = metrics.ApiMetrics()
+
+        # every operation starts with empty operation caches, as it does
+        # with a context of its own
+        with mock.patch.object(metrics, 'process_metrics', api_metrics), \
+                mock.patch.object(utils, '_operation_caches',
+                                  weakref.WeakKeyDictionary()):
+            started = time.time()
+            output = operation(*args, **kwargs)
+            seconds = time.time() - started
+
+        # the operation decorator clears the context when it returns
+        if 'ctx' in kwargs:
+            current_ctx.set(ctx=kwargs['ctx'])
+
+        calls = dict((action, counters['calls']) for action, counters
+                     in api_metrics.get_counters().items())
+
+        if os.environ.get(UPDATE_ENV_VAR_NAME):
+            self._update_budget(name, calls, seconds)
+        else:
+            self.assert_within_budget(name, calls, seconds)
+
+        return output
+
+    def assert_within_budget(self, name, calls, seconds):
+        budget = self._load_budgets().get(name)
+
+        if budget is None:
+            self.fail('There is no API budget for {0} in {1}. Rerun with '
+                      '{2}=1 to add it.'.format(
+                          name, self.budget_path, UPDATE_ENV_VAR_NAME))
+
+        tolerance = int(os.environ.get(
+            CALLS_TOLERANCE_ENV_VAR_NAME, CALLS_TOLERANCE))
+        over_budget = dict(
+            (action, '{0} > {1}'.format(count, budget['calls'].get(action, 0)))
+            for action, count in calls.items()
+            if count > budget['calls'].get(action, 0) + tolerance)
+
+        if over_budget:
+            self.fail('{0} made more API calls than budgeted: {1}'.format(
+                name, over_budget))
+
+        max_seconds = budget['seconds'] * float(os.environ.get(
+            LATENCY_FACTOR_ENV_VAR_NAME, LATENCY_FACTOR)) + LATENCY_SLACK
+
+        if seconds > max_seconds:
+            self.fail('{0} took {1:.2f} seconds, more than {2:.2f}.'.format(
+                name, seconds, max_seconds))
+
+    def _load_budgets(self):
+        if not os.path.exists(self.budget_path):
+            return {}
+        with open(self.budget_path) as budget_file:
+            return json.load(budget_file)
+
+    def _update_budget(self, name, calls, seconds):
+        budgets = self._load_budgets()
+        budgets[name] = dict(calls=calls,
+                             seconds=math.ceil(seconds * 100) / 100)
+        with open(self.budget_path, 'w') as budget_file:
+            json.dump(budgets, budget_file, indent=2, sort_keys=True,
+                      separators=(',', ': '))
+            budget_file.write('\n')
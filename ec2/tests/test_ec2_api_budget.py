@@ -0,0 +1,212 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+# Built-in Imports
+import os
+import shutil
+import tempfile
+
+# Third Party Imports
+from moto import mock_ec2
+from moto import mock_elb
+import mock
+
+# Cloudify Imports is imported and used in operations
+from ec2 import ebs
+from ec2 import keypair
+from ec2 import instance
+from ec2 import elasticip
+from ec2 import constants
+from ec2 import connection
+from ec2 import securitygroup
+from ec2 import elasticloadbalancer
+from ec2.tests.api_budget import ApiBudgetTestCase
+from cloudify.state import current_ctx
+from cloudify.mocks import MockCloudifyContext
+
+TEST_AMI_IMAGE_ID = 'ami-e214778a'
+TEST_INSTANCE_TYPE = 't1.micro'
+TEST_ZONE = 'us-east-1a'
+TEST_DEVICE = '/dev/sdf'
+
+
+class TestApiBudget(ApiBudgetTestCase):
+    """Checks the API calls of the lifecycle operations of every EC2
+    node type against ec2/tests/api_budget.json.
+    """
+
+    budget_path = os.path.join(os.path.dirname(__file__), 'api_budget.json')
+
+    def mock_ctx(self, test_name, properties, runtime_properties=None):
+        test_properties = {
+            constants.AWS_CONFIG_PROPERTY: {},
+            'use_external_resource': False,
+            'resource_id': ''
+        }
+        test_properties.update(properties)
+
+        ctx = MockCloudifyContext(
+            node_id=test_name,
+            properties=test_properties,
+            runtime_properties=runtime_properties,
+            operation={'retry_number': 0}
+        )
+        current_ctx.set(ctx=ctx)
+        return ctx
+
+    def mock_relationship_ctx(self, test_name, source, target):
+        ctx = MockCloudifyContext(
+            node_id=test_name, source=source, target=target)
+        current_ctx.set(ctx=ctx)
+        return ctx
+
+    def mock_instance_ctx(self, test_name, instance_id=None):
+        ctx = self.mock_ctx(test_name, {
+            'image_id': TEST_AMI_IMAGE_ID,
+            'instance_type': TEST_INSTANCE_TYPE,
+            'name': test_name,
+            'cloudify_agent': {},
+            'agent_config': {},
+            'use_password': False,
+            'parameters': {
+                'placement': TEST_ZONE,
+                'instance_initiated_shutdown_behavior': 'stop'
+            }
+        }, runtime_properties={constants.EXTERNAL_RESOURCE_ID: instance_id}
+            if instance_id else None)
+        ctx.node.type_hierarchy = ['cloudify.nodes.Compute']
+        return ctx
+
+    def run_instance(self):
+        return connection.EC2ConnectionClient().client().run_instances(
+            TEST_AMI_IMAGE_ID, instance_type=TEST_INSTANCE_TYPE,
+            placement=TEST_ZONE).instances[0].id
+
+    @mock_ec2
+    def test_instance_lifecycle(self):
+        ctx = self.mock_instance_ctx('test_instance_lifecycle')
+
+        # moto does not know the test image
+        with mock.patch('ec2.instance._get_image',
+                        return_value=mock.Mock(state='available')):
+            self.measure('ec2.instance.creation_validation',
+                         instance.creation_validation, ctx=ctx)
+        self.measure('ec2.instance.run_instances',
+                     instance.run_instances, ctx=ctx)
+        self.measure('ec2.instance.start', instance.start, ctx=ctx)
+        self.measure('ec2.instance.stop', instance.stop, ctx=ctx)
+        self.measure('ec2.instance.terminate', instance.terminate, ctx=ctx)
+
+    @mock_ec2
+    def test_keypair_lifecycle(self):
+        private_key_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, private_key_dir)
+        ctx = self.mock_ctx('test_keypair_lifecycle', {
+            'resource_id': 'test_keypair_lifecycle',
+            'private_key_path': os.path.join(
+                private_key_dir, 'test_keypair_lifecycle.pem')
+        })
+
+        self.measure('ec2.keypair.creation_validation',
+                     keypair.creation_validation, ctx=ctx)
+        self.measure('ec2.keypair.create', keypair.create, ctx=ctx)
+        self.measure('ec2.keypair.delete', keypair.delete, ctx=ctx)
+
+    @mock_ec2
+    def test_securitygroup_lifecycle(self):
+        ctx = self.mock_ctx('test_securitygroup_lifecycle', {
+            'resource_id': 'test_securitygroup_lifecycle',
+            'description': 'API budget.',
+            'rules': [
+                {'ip_protocol': 'tcp', 'from_port': port, 'to_port': port,
+                 'cidr_ip': '127.0.0.1/32'} for port in ['22', '80']
+            ]
+        })
+
+        self.measure('ec2.securitygroup.creation_validation',
+                     securitygroup.creation_validation, ctx=ctx)
+        self.measure('ec2.securitygroup.create', securitygroup.create,
+                     ctx=ctx)
+        self.measure('ec2.securitygroup.delete', securitygroup.delete,
+                     ctx=ctx)
+
+    @mock_ec2
+    def test_ebs_lifecycle(self):
+        ctx = self.mock_ctx('test_ebs_lifecycle', {
+            'size': 1,
+            'zone': TEST_ZONE,
+            'device': TEST_DEVICE
+        })
+        instance_ctx = self.mock_instance_ctx(
+            'test_ebs_lifecycle_instance', self.run_instance())
+        instance_ctx.instance.runtime_properties['placement'] = TEST_ZONE
+
+        self.measure('ec2.ebs.creation_validation',
+                     ebs.creation_validation, ctx=ctx)
+        self.measure('ec2.ebs.create', ebs.create, dict(), ctx=ctx)
+        self.measure('ec2.ebs.create_snapshot',
+                     ebs.create_snapshot, dict(), ctx=ctx)
+        relationship_ctx = self.mock_relationship_ctx(
+            'test_ebs_lifecycle_attachment', ctx, instance_ctx)
+        self.measure('ec2.ebs.attach', ebs.attach, ctx=relationship_ctx)
+        self.measure('ec2.ebs.detach', ebs.detach, dict(force=True),
+                     ctx=relationship_ctx)
+        self.measure('ec2.ebs.delete', ebs.delete, ctx=ctx)
+
+    @mock_ec2
+    def test_elasticip_lifecycle(self):
+        ctx = self.mock_ctx('test_elasticip_lifecycle', {'domain': 'vpc'})
+        instance_ctx = self.mock_instance_ctx(
+            'test_elasticip_lifecycle_instance', self.run_instance())
+
+        self.measure('ec2.elasticip.creation_validation',
+                     elasticip.creation_validation, ctx=ctx)
+        self.measure('ec2.elasticip.allocate', elasticip.allocate, ctx=ctx)
+        relationship_ctx = self.mock_relationship_ctx(
+            'test_elasticip_lifecycle_association', instance_ctx, ctx)
+        self.measure('ec2.elasticip.associate', elasticip.associate,
+                     ctx=relationship_ctx)
+        self.measure('ec2.elasticip.disassociate', elasticip.disassociate,
+                     ctx=relationship_ctx)
+        self.measure('ec2.elasticip.release', elasticip.release, ctx=ctx)
+
+    @mock_ec2
+    @mock_elb
+    def test_elb_lifecycle(self):
+        ctx = self.mock_ctx('test_elb_lifecycle', {
+            'resource_id': 'budgetelb',
+            'elb_name': 'budgetelb',
+            'zones': TEST_ZONE,
+            'listeners': [[80, 8080, 'http']],
+            'security_groups': [],
+            'health_checks': [{'target': 'HTTP:8080/health'}]
+        }, runtime_properties={'instance_list': []})
+        instance_ctx = self.mock_instance_ctx(
+            'test_elb_lifecycle_instance', self.run_instance())
+
+        self.measure('ec2.elasticloadbalancer.creation_validation',
+                     elasticloadbalancer.creation_validation, ctx=ctx)
+        self.measure('ec2.elasticloadbalancer.create_elb',
+                     elasticloadbalancer.create_elb, ctx=ctx)
+        relationship_ctx = self.mock_relationship_ctx(
+            'test_elb_lifecycle_member', instance_ctx, ctx)
+        self.measure('ec2.elasticloadbalancer.add_instance_to_elb',
+                     elasticloadbalancer.add_instance_to_elb,
+                     ctx=relationship_ctx)
+        self.measure('ec2.elasticloadbalancer.remove_instance_from_elb',
+                     elasticloadbalancer.remove_instance_from_elb,
+                     ctx=relationship_ctx)
+        self.measure('ec2.elasticloadbalancer.delete_elb',
+                     elasticloadbalancer.delete_elb, ctx=ctx)
@@ -0,0 +1,213 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+# Built-in Imports
+import threading
+import testtools
+
+# Third Party Imports
+from moto import mock_ec2
+import mock
+
+# Cloudify Imports is imported and used in operations
+from ec2 import constants
+from ec2 import coalescer
+from ec2 import connection
+from ec2 import instance
+from cloudify.state import current_ctx
+from cloudify.mocks import MockCloudifyContext
+from cloudify.exceptions import NonRecoverableError
+
+TEST_AMI_IMAGE_ID = 'ami-e214778a'
+TEST_INSTANCE_TYPE = 't1.micro'
+
+
+class TestCoalescer(testtools.TestCase):
+
+    def _submit_concurrently(self, batcher, group, items):
+        results = {}
+
+        def submit(item):
+            results[item] = batcher.submit(group, item)
+
+        threads = [threading.Thread(target=submit, args=(item,))
+                   for item in items]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_single_caller_does_not_wait(self):
+        calls = []
+
+        def batch_function(group, items):
+            calls.append(items)
+            return dict((item, item.upper()) for item in items)
+
+        batcher = coalescer.Coalescer(batch_function, window=60)
+        self.assertEqual('A', batcher.submit('group', 'a'))
+        self.assertEqual([['a']], calls)
+
+    def test_concurrent_callers_are_batched(self):
+        calls = []
+        release = threading.Event()
+
+        def batch_function(group, items):
+            calls.append(sorted(items))
+            release.wait(5)
+            return dict((item, item.upper()) for item in items)
+
+        batcher = coalescer.Coalescer(batch_function, window=1)
+        first = threading.Thread(target=batcher.submit, args=('g', 'a'))
+        first.start()
+        results = {}
+
+        def submit(item):
+            results[item] = batcher.submit('g', item)
+
+        others = [threading.Thread(target=submit, args=(item,))
+                  for item in ['b', 'c', 'd']]
+        for thread in others:
+            thread.start()
+        release.set()
+        first.join()
+        for thread in others:
+            thread.join()
+
+        self.assertEqual({'b': 'B', 'c': 'C', 'd': 'D'}, results)
+        self.assertLessEqual(len(calls), 3)
+        self.assertEqual(
+            ['a', 'b', 'c', 'd'], sorted(sum(calls, [])))
+
+    def test_always_wait_batches_staggered_callers(self):
+        calls = []
+
+        def batch_function(group, items):
+            calls.append(sorted(items))
+            return dict((item, item) for item in items)
+
+        batcher = coalescer.Coalescer(
+            batch_function, window=5, max_batch_size=2, always_wait=True)
+        first = threading.Thread(target=batcher.submit, args=('g', 'a'))
+        first.start()
+        self.assertEqual('b', batcher.submit('g', 'b'))
+        first.join()
+        self.assertEqual([['a', 'b']], calls)
+
+    def test_max_batch_size(self):
+        calls = []
+
+        def batch_function(group, items):
+            calls.append(items)
+            return dict((item, item) for item in items)
+
+        batcher = coalescer.Coalescer(
+            batch_function, window=0.2, max_batch_size=2)
+        results = self._submit_concurrently(
+            batcher, 'g', ['a', 'b', 'c', 'd', 'e'])
+        self.assertEqual(5, len(results))
+        self.assertTrue(all(len(items) <= 2 for items in calls))
+
+    def test_error_is_raised_to_every_caller(self):
+
+        def batch_function(group, items):
+            raise NonRecoverableError('boom')
+
+        batcher = coalescer.Coalescer(batch_function)
+        self.assertRaises(NonRecoverableError, batcher.submit, 'g', 'a')
+
+
+class TestDescribeCoalescer(testtools.TestCase):
+
+    def mock_ctx(self, test_name):
+        return MockCloudifyContext(
+            node_id=test_name,
+            properties={
+                constants.AWS_CONFIG_PROPERTY: {},
+                'use_external_resource': False,
+                'resource_id': ''
+            }
+        )
+
+    @mock_ec2
+    def test_describe_instances_batch(self):
+        ctx = self.mock_ctx('test_describe_instances_batch')
+        current_ctx.set(ctx=ctx)
+        ec2_client = connection.EC2ConnectionClient().client()
+        reservation = ec2_client.run_instances(
+            TEST_AMI_IMAGE_ID, instance_type=TEST_INSTANCE_TYPE,
+            min_count=2, max_count=2)
+        instance_ids = [i.id for i in reservation.instances]
+        output = instance._describe_instances_batch(
+            'group', instance_ids + ['i-0123abcd'])
+        self.assertEqual(sorted(instance_ids), sorted(output.keys()))
+
+    @mock_ec2
+    def test_terminate_batch_isolates_bad_instance(self):
+        ctx = self.mock_ctx('test_terminate_batch_isolates_bad_instance')
+        current_ctx.set(ctx=ctx)
+        ec2_client = connection.EC2ConnectionClient().client()
+        reservation = ec2_client.run_instances(
+            TEST_AMI_IMAGE_ID, instance_type=TEST_INSTANCE_TYPE,
+            min_count=2, max_count=2)
+        instance_ids = [i.id for i in reservation.instances]
+        output = instance._terminate_instances_batch(
+            'group', instance_ids + ['i-0123abcd'])
+        self.assertEqual(None, output[instance_ids[0]])
+        self.assertEqual(None, output[instance_ids[1]])
+        self.assertIn('InvalidInstanceID.NotFound',
+                      str(output['i-0123abcd']))
+
+    @mock_ec2
+    def test_concurrent_terminates_are_batched(self):
+        ctx = self.mock_ctx('test_concurrent_terminates_are_batched')
+        current_ctx.set(ctx=ctx)
+        ec2_client = connection.EC2ConnectionClient().client()
+        reservation = ec2_client.run_instances(
+            TEST_AMI_IMAGE_ID, instance_type=TEST_INSTANCE_TYPE,
+            min_count=3, max_count=3)
+        contexts = []
+        for reserved in reservation.instances:
+            node_ctx = self.mock_ctx(reserved.id)
+            node_ctx.instance.runtime_properties['aws_resource_id'] = \
+                reserved.id
+            contexts.append(node_ctx)
+        errors = []
+
+        def terminate(node_ctx):
+            try:
+                instance.terminate(ctx=node_ctx)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=terminate, args=(context,))
+                   for context in contexts]
+        with mock.patch.object(
+                instance._terminate_coalescer, 'batch_function',
+                side_effect=instance._terminate_instances_batch) as batch:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual([], errors)
+        self.assertLessEqual(batch.call_count, 2)
+        self.assertEqual(
+            sorted(i.id for i in reservation.instances),
+            sorted(sum([call[0][1] for call in batch.call_args_list], [])))
+        for state in ec2_client.get_all_instance_status(
+                include_all_instances=True):
+            self.assertEqual('terminated', state.state_name)
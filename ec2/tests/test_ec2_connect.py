@@ -95,3 +95,38 @@ class TestConnection(testtools.TestCase):
         self.assertEqual(
             ec2_client.DefaultRegionName,
             ec2_client.region.name)
+
+    @mock_ec2
+    def test_connection_reused_for_same_config(self):
+        ctx = self.get_mock_context('test_connection_reused_for_same_config')
+        current_ctx.set(ctx=ctx)
+        ec2_client = connection.EC2ConnectionClient().client()
+        self.assertIs(ec2_client, connection.EC2ConnectionClient().client())
+
+    @mock_ec2
+    def test_connection_not_reused_for_other_config(self):
+        ctx = self.get_mock_context(
+            'test_connection_not_reused_for_other_config')
+        current_ctx.set(ctx=ctx)
+        ec2_client = connection.EC2ConnectionClient().client()
+        ctx.node.properties[constants.AWS_CONFIG_PROPERTY] = {
+            'ec2_region_name': 'us-west-2'
+        }
+        other_client = connection.EC2ConnectionClient().client()
+        self.assertIsNot(ec2_client, other_client)
+        self.assertEqual('us-west-2', other_client.region.name)
+
+    def test_connection_registry_max_size(self):
+        registry = connection.ConnectionRegistry(max_size=2)
+        first = registry.get('first', object)
+        registry.get('second', object)
+        registry.get('first', object)
+        registry.get('third', object)
+        self.assertEqual(2, len(registry))
+        self.assertIs(first, registry.get('first', object))
+
+    def test_connection_registry_idle_eviction(self):
+        registry = connection.ConnectionRegistry(idle_timeout=-1)
+        first = registry.get('first', object)
+        self.assertIsNot(first, registry.get('first', object))
+        self.assertEqual(1, len(registry))
@@ -14,10 +14,14 @@
 #    * limitations under the License.
 
 # Built-in Imports
+import os
+import logging
 import testtools
 
 # Third Party Imports
+import mock
 from boto.ec2 import EC2Connection
+from boto.exception import EC2ResponseError
 from moto import mock_ec2
 
 # Cloudify Imports is imported and used in operations
@@ -36,6 +40,10 @@ TEST_SIZE = 2
 TEST_DEVICE = '/dev/null'
 BAD_VOLUME_ID = 'vol-a51c05d7'
 BAD_INSTANCE_ID = 'i-4339wSD9'
+NOT_FOUND_RESPONSE = '''<?xml version="1.0" encoding="UTF-8"?>
+<Response><Errors><Error><Code>{0}</Code>
+<Message>The ID does not exist</Message></Error></Errors>
+<RequestID>0123</RequestID></Response>'''
 
 
 class TestEBS(testtools.TestCase):
@@ -492,3 +500,32 @@ class TestEBS(testtools.TestCase):
         self.assertIn(
             constants.VOLUME_SNAPSHOT_ATTRIBUTE,
             ctx.instance.runtime_properties)
+
+    @mock_ec2
+    def test_get_volumes_not_found_logs_available_volumes(self):
+        """ this tests that a volume that does not exist logs the
+        available volumes, capped at the diagnostics limit
+        """
+
+        ctx = self.mock_ctx(
+            'test_get_volumes_not_found_logs_available_volumes')
+        current_ctx.set(ctx=ctx)
+        ec2_client = EC2Connection()
+        for _ in range(3):
+            ec2_client.create_volume(TEST_SIZE, TEST_ZONE)
+        self.addCleanup(ctx.logger.setLevel, ctx.logger.level)
+        ctx.logger.setLevel(logging.DEBUG)
+        error = EC2ResponseError(
+            400, 'Bad Request',
+            NOT_FOUND_RESPONSE.format('InvalidVolume.NotFound'))
+
+        with mock.patch.dict(os.environ, {
+                constants.AVAILABLE_RESOURCES_LOG_LIMIT_ENV_VAR_NAME: '2'}), \
+                mock.patch.object(EC2Connection, 'get_all_volumes',
+                                  side_effect=error), \
+                mock.patch.object(ctx.logger, 'debug') as mock_debug:
+            self.assertIsNone(ebs._get_volumes([BAD_VOLUME_ID]))
+
+        message = '\n'.join(call[0][0] for call in mock_debug.call_args_list)
+        self.assertEqual(2, message.count('Volume:'))
+        self.assertIn('more than 2 resources', message)
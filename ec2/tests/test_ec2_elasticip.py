@@ -14,11 +14,14 @@
 #    * limitations under the License.
 
 # Built-in Imports
+import os
+import logging
 import testtools
 
 # Third Party Imports
 from boto.ec2 import EC2Connection
 from moto import mock_ec2
+import mock
 
 # Cloudify Imports is imported and used in operations
 from ec2 import elasticip
@@ -517,3 +520,27 @@ class TestElasticIP(testtools.TestCase):
         output = \
             elasticip._disassociate_external_elasticip_or_instance()
         self.assertEqual(False, output)
+
+    @mock_ec2
+    def test_get_all_addresses_not_found_logs_available_addresses(self):
+        """ this tests that an address that does not exist logs the
+        available addresses, capped at the diagnostics limit
+        """
+
+        ctx = self.mock_ctx(
+            'test_get_all_addresses_not_found_logs_available_addresses')
+        current_ctx.set(ctx=ctx)
+        ec2_client = EC2Connection()
+        for _ in range(3):
+            ec2_client.allocate_address()
+        self.addCleanup(ctx.logger.setLevel, ctx.logger.level)
+        ctx.logger.setLevel(logging.DEBUG)
+
+        with mock.patch.dict(os.environ, {
+                constants.AVAILABLE_RESOURCES_LOG_LIMIT_ENV_VAR_NAME: '2'}), \
+                mock.patch.object(ctx.logger, 'debug') as mock_debug:
+            self.assertIsNone(elasticip._get_all_addresses('1.2.3.4'))
+
+        message = '\n'.join(call[0][0] for call in mock_debug.call_args_list)
+        self.assertEqual(2, message.count('Address:'))
+        self.assertIn('more than 2 resources', message)
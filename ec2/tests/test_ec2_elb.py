@@ -14,12 +14,16 @@
 #    * limitations under the License.
 
 # Built-in Imports
+import os
+import logging
 import testtools
+import threading
 
 # Third Party Imports
 from moto import mock_elb
 from moto import mock_ec2
 import boto
+import boto.ec2.elb
 import mock
 
 # Cloudify Imports is imported and used in operations
@@ -223,6 +227,75 @@ class TestLoadBalancer(testtools.TestCase):
                          len(ctx.target.instance.runtime_properties.get(
                              'instance_list')))
 
+    @mock_ec2
+    @mock_elb
+    def test_concurrent_adds_are_batched(self):
+        self._create_external_elb()
+        contexts = []
+        for index in range(3):
+            instance_id = self._create_external_instance().id
+            instance_ctx = self.mock_instance_ctx(
+                'source_test_concurrent_adds_{0}'.format(index),
+                instance_id=instance_id, use_external_resource=True)
+            elb_ctx = self.mock_elb_ctx(
+                'target_test_concurrent_adds_{0}'.format(index),
+                use_external_resource=True, instance_list=[])
+            contexts.append(self.mock_relationship_context(
+                'test_concurrent_adds_{0}'.format(index),
+                instance_context=instance_ctx, elb_context=elb_ctx))
+        errors = []
+
+        def add(relationship_ctx):
+            try:
+                elasticloadbalancer.add_instance_to_elb(ctx=relationship_ctx)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=add, args=(context,))
+                   for context in contexts]
+        with mock.patch.object(
+                elasticloadbalancer._register_coalescer, 'batch_function',
+                side_effect=elasticloadbalancer._register_instances_batch) \
+                as batch:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual([], errors)
+        self.assertLessEqual(batch.call_count, 2)
+        registered = self._get_elb_instances()
+        for context in contexts:
+            instance_id = \
+                context.source.instance.runtime_properties['aws_resource_id']
+            self.assertIn(instance_id, registered)
+            self.assertEqual(
+                [instance_id],
+                context.target.instance.runtime_properties['instance_list'])
+
+    @mock_elb
+    def test_registration_batch_isolates_bad_instance(self):
+        ctx = self.mock_elb_ctx('test_registration_batch_isolates')
+        current_ctx.set(ctx=ctx)
+
+        def register_instances(load_balancer_name, instances):
+            if 'i-bad' in instances:
+                raise boto.exception.BotoServerError(400, 'InvalidInstance')
+            return instances
+
+        with mock.patch('ec2.connection.ELBConnectionClient.client') \
+                as client:
+            client.return_value.register_instances.side_effect = \
+                register_instances
+            output = elasticloadbalancer._register_instances_batch(
+                ('key', 'myelb'), ['i-good', 'i-bad'])
+
+        self.assertIsNone(output['i-good'])
+        self.assertIsInstance(output['i-bad'],
+                              boto.exception.BotoServerError)
+        self.assertEqual(3,
+                         client.return_value.register_instances.call_count)
+
     @mock_ec2
     @mock_elb
     def test_delete_external_elb(self):
@@ -244,6 +317,18 @@ class TestLoadBalancer(testtools.TestCase):
                           elasticloadbalancer._get_elbs_by_names,
                           ['fake'])
 
+    @mock_elb
+    def test_get_elbs_by_names_single_call(self):
+        ctx = self.mock_elb_ctx('test_get_elbs_by_names_single_call')
+        self._create_external_elb()
+        current_ctx.set(ctx=ctx)
+        with mock.patch('boto.ec2.elb.ELBConnection.get_all_load_balancers',
+                        autospec=True,
+                        side_effect=boto.ec2.elb.ELBConnection.
+                        get_all_load_balancers) as describe:
+            elasticloadbalancer._get_elbs_by_names(['myelb'])
+        self.assertEqual(1, describe.call_count)
+
     @mock_elb
     def test_get_instance_list(self):
         ctx = self.mock_elb_ctx('test_get_instance_list')
@@ -311,3 +396,26 @@ class TestLoadBalancer(testtools.TestCase):
         self.assertRaises(NonRecoverableError,
                           elasticloadbalancer.create_elb,
                           ctx=ctx)
+
+    @mock_elb
+    def test_get_elbs_by_names_not_found_logs_available_elbs(self):
+        ctx = self.mock_elb_ctx(
+            'test_get_elbs_by_names_not_found_logs_available_elbs')
+        current_ctx.set(ctx=ctx)
+        elb_client = boto.connect_elb()
+        for name in ['elb-a', 'elb-b', 'elb-c']:
+            elb_client.create_load_balancer(
+                name=name, zones='us-east-1a', listeners=[[80, 8080, 'http']])
+        self.addCleanup(ctx.logger.setLevel, ctx.logger.level)
+        ctx.logger.setLevel(logging.DEBUG)
+
+        with mock.patch.dict(os.environ, {
+                constants.AVAILABLE_RESOURCES_LOG_LIMIT_ENV_VAR_NAME: '2'}), \
+                mock.patch.object(ctx.logger, 'debug') as mock_debug:
+            self.assertRaises(NonRecoverableError,
+                              elasticloadbalancer._get_elbs_by_names,
+                              ['missing'])
+
+        message = '\n'.join(call[0][0] for call in mock_debug.call_args_list)
+        self.assertEqual(2, message.count('LoadBalancer:'))
+        self.assertIn('more than 2 resources', message)
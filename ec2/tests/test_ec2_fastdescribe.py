@@ -0,0 +1,203 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+# Built-in Imports
+import os
+import testtools
+
+# Third Party Imports
+import mock
+from moto import mock_ec2
+from boto.ec2 import EC2Connection
+from boto.vpc import VPCConnection
+from boto.exception import EC2ResponseError
+
+# Cloudify Imports is imported and used in operations
+from ec2 import instance
+from ec2 import constants
+from ec2 import fastdescribe
+from core.base import AwsBaseNode
+from cloudify.state import current_ctx
+from cloudify.mocks import MockCloudifyContext
+
+TEST_AMI_IMAGE_ID = 'ami-e214778a'
+INSTANCE_FIELDS = ['id', 'state', 'state_code', 'placement',
+                   'private_ip_address', 'ip_address',
+                   'private_dns_name', 'public_dns_name']
+PAGED_RESPONSE = '''<?xml version="1.0" encoding="UTF-8"?>
+<DescribeInstancesResponse xmlns="http://ec2.amazonaws.com/doc/2015-10-01/">
+  <reservationSet>
+    <item>
+      <instancesSet>
+        <item>
+          <instanceId>i-0123abcd</instanceId>
+          <instanceState><code>80</code><name>stopped</name></instanceState>
+          <privateIpAddress>10.0.0.1</privateIpAddress>
+          <ipAddress/>
+          <networkInterfaceSet>
+            <item>
+              <privateIpAddress>10.0.0.2</privateIpAddress>
+            </item>
+          </networkInterfaceSet>
+        </item>
+      </instancesSet>
+    </item>
+  </reservationSet>
+  <nextToken>token</nextToken>
+</DescribeInstancesResponse>'''
+
+ERROR_RESPONSE = '''<?xml version="1.0" encoding="UTF-8"?>
+<Response><Errors><Error><Code>InvalidVpcID.NotFound</Code>
+<Message>The vpc ID 'vpc-abcd1234' does not exist</Message></Error></Errors>
+<RequestID>0123</RequestID></Response>'''
+
+
+class TestFastDescribe(testtools.TestCase):
+
+    def setUp(self):
+        super(TestFastDescribe, self).setUp()
+        current_ctx.set(ctx=MockCloudifyContext(
+            node_id='test_fastdescribe',
+            properties={'resource_id': '', 'use_external_resource': True,
+                        'aws_config': {}}))
+        self.addCleanup(current_ctx.clear)
+
+    def enable(self):
+        patcher = mock.patch.dict(
+            os.environ, {constants.FAST_DESCRIBE_ENV_VAR_NAME: '1'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_is_enabled(self):
+        with mock.patch.dict(os.environ):
+            os.environ.pop(constants.FAST_DESCRIBE_ENV_VAR_NAME, None)
+            self.assertFalse(fastdescribe.is_enabled())
+            os.environ[constants.FAST_DESCRIBE_ENV_VAR_NAME] = 'True'
+            self.assertTrue(fastdescribe.is_enabled())
+
+    @mock_ec2
+    def test_instance_records_match_boto_instances(self):
+        ec2_client = EC2Connection()
+        ec2_client.run_instances(TEST_AMI_IMAGE_ID, min_count=3, max_count=3)
+        stopped = ec2_client.run_instances(TEST_AMI_IMAGE_ID).instances[0]
+        ec2_client.stop_instances(stopped.id)
+
+        records = fastdescribe.describe_instances(ec2_client)
+        instances = ec2_client.get_only_instances()
+
+        self.assertEqual(4, len(records))
+        for record, boto_instance in zip(records, instances):
+            for field in INSTANCE_FIELDS:
+                self.assertEqual(getattr(boto_instance, field),
+                                 getattr(record, field), field)
+
+        self.assertEqual(
+            [stopped.id],
+            [record.id for record in fastdescribe.describe_instances(
+                ec2_client, instance_ids=stopped.id)])
+
+    @mock_ec2
+    def test_instance_status_records_match_boto_statuses(self):
+        ec2_client = EC2Connection()
+        ec2_client.run_instances(TEST_AMI_IMAGE_ID, min_count=2, max_count=2)
+
+        records = fastdescribe.describe_instance_status(
+            ec2_client, include_all_instances=True)
+        statuses = ec2_client.get_all_instance_status(
+            include_all_instances=True)
+
+        self.assertEqual(
+            [(status.id, status.zone, status.state_code, status.state_name)
+             for status in statuses],
+            [(record.id, record.zone, record.state_code, record.state_name)
+             for record in records])
+
+    def test_nested_items_and_next_token(self):
+        records = fastdescribe.parse(
+            PAGED_RESPONSE, fastdescribe.INSTANCE_ITEM_PATH,
+            fastdescribe.InstanceRecord)
+
+        self.assertEqual('token', records.next_token)
+        self.assertEqual(1, len(records))
+        record = records[0]
+        self.assertEqual(80, record.state_code)
+        self.assertEqual('10.0.0.1', record.private_ip_address)
+        self.assertEqual('', record.ip_address)
+        self.assertIsNone(record.placement)
+        self.assertEqual('Instance:i-0123abcd', repr(record))
+        self.assertFalse(hasattr(record, '__dict__'))
+
+    @mock_ec2
+    def test_resource_records(self):
+        vpc_client = VPCConnection()
+        vpc = vpc_client.create_vpc('10.0.0.0/16')
+        subnet = vpc_client.create_subnet(vpc.id, '10.0.0.0/24')
+
+        vpcs = fastdescribe.describe_resources(vpc_client, 'vpc', vpc.id)
+        subnets = fastdescribe.describe_resources(
+            vpc_client, 'subnet', filters={'vpc-id': vpc.id})
+
+        self.assertEqual(
+            [(found.id, found.state) for found in vpc_client.get_all_vpcs(
+                vpc_ids=[vpc.id])],
+            [(record.id, record.state) for record in vpcs])
+        self.assertEqual([subnet.id], [record.id for record in subnets])
+
+    def test_errors_are_raised_like_boto(self):
+        vpc_client = VPCConnection()
+        response = mock.Mock(status=400, reason='Bad Request')
+        response.read.return_value = ERROR_RESPONSE
+
+        with mock.patch.object(vpc_client, 'make_request',
+                               return_value=response) as make_request:
+            error = self.assertRaises(
+                EC2ResponseError, fastdescribe.describe_resources,
+                vpc_client, 'vpc', ['vpc-abcd1234'])
+
+        self.assertEqual('InvalidVpcID.NotFound', error.error_code)
+        make_request.assert_called_once_with(
+            'DescribeVpcs', {'VpcId.1': 'vpc-abcd1234'}, '/', 'POST')
+
+    @mock_ec2
+    def test_batch_describe_returns_records_when_enabled(self):
+        self.enable()
+        ec2_client = EC2Connection()
+        reservation = ec2_client.run_instances(
+            TEST_AMI_IMAGE_ID, min_count=2, max_count=2)
+        ids = [boto_instance.id for boto_instance in reservation.instances]
+
+        instances = instance._describe_instances_batch(None, ids)
+
+        self.assertEqual(sorted(ids), sorted(instances.keys()))
+        for record in instances.values():
+            self.assertIsInstance(record, fastdescribe.InstanceRecord)
+            self.assertEqual('running', record.state)
+
+    @mock_ec2
+    def test_resource_exists_uses_records_when_enabled(self):
+        self.enable()
+        vpc_client = VPCConnection()
+        vpc = vpc_client.create_vpc('10.0.0.0/16')
+
+        node = AwsBaseNode('vpc', [], client=vpc_client)
+        node.get_all_handler = {'function': mock.Mock(),
+                                'argument': 'vpc_ids'}
+        node.not_found_error = 'InvalidVpcID.NotFound'
+
+        node.resource_id = vpc.id
+        self.assertTrue(node.resource_exists())
+        node.resource_id = 'vpc-abcd1234'
+        self.assertFalse(node.resource_exists())
+        self.assertFalse(node.get_all_handler['function'].called)
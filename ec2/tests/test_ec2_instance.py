@@ -16,6 +16,7 @@
 # Built-in Imports
 import testtools
 import tempfile
+import threading
 
 # Third Party Imports
 from moto import mock_ec2
@@ -25,6 +26,7 @@ import mock
 from ec2 import constants
 from ec2 import connection
 from ec2 import instance
+from ec2 import statetracker
 from cloudify.context import BootstrapContext
 from cloudify.state import current_ctx
 from cloudify.mocks import MockCloudifyContext
@@ -208,6 +210,161 @@ class TestInstance(testtools.TestCase):
         self.assertIn('aws_resource_id',
                       ctx.instance.runtime_properties.keys())
 
+    @mock_ec2
+    def test_run_instances_batch_launch(self):
+        """ this tests that node instances of a node with batch_launch
+        are launched with a single call and get distinct instances
+        assigned by launch index
+        """
+
+        contexts = []
+        for node_instance_id in ['vm_c', 'vm_a', 'vm_b']:
+            ctx = self.mock_ctx(node_instance_id)
+            ctx._node_name = 'vm'
+            ctx.node.properties['batch_launch'] = True
+            contexts.append(ctx)
+        errors = []
+
+        def create(ctx):
+            try:
+                instance.run_instances(ctx=ctx)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=create, args=(node_ctx,))
+                   for node_ctx in contexts]
+        with mock.patch.object(
+                instance._launch_coalescer, 'batch_function',
+                side_effect=instance._run_instances_batch) as batch:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual([], errors)
+        self.assertEqual(1, batch.call_count)
+        instance_ids = set(
+            ctx.instance.runtime_properties['aws_resource_id']
+            for ctx in contexts)
+        self.assertEqual(3, len(instance_ids))
+        for ctx in contexts:
+            self.assertIn('ami_launch_index',
+                          ctx.instance.runtime_properties)
+
+    @mock_ec2
+    def test_run_instances_batch_launch_with_agent_init_script(self):
+        """ this tests that a node instance whose user data installs an
+        agent is launched on its own, without waiting for a batch
+        """
+
+        ctx = self.mock_ctx('test_run_instances_batch_launch_agent')
+        ctx.node.properties['batch_launch'] = True
+        ctx.agent.init_script = lambda: 'SCRIPT'
+        current_ctx.set(ctx=ctx)
+
+        with mock.patch.object(instance._launch_coalescer,
+                               'submit') as submit:
+            instance.run_instances(ctx=ctx)
+
+        self.assertFalse(submit.called)
+        self.assertIn('aws_resource_id', ctx.instance.runtime_properties)
+
+    @mock.patch('ec2.connection.EC2ConnectionClient.client')
+    def test_run_instances_batch_assigns_by_launch_index(self, mock_client):
+        """ this tests that launched instances are handed to the
+        node instances sorted by id in launch index order
+        """
+
+        ctx = self.mock_ctx('test_run_instances_batch_assigns')
+        current_ctx.set(ctx=ctx)
+        launched = []
+        for instance_id, launch_index in [('i-2', '2'), ('i-0', '0'),
+                                          ('i-1', '1')]:
+            launched.append(mock.Mock(id=instance_id,
+                                      ami_launch_index=launch_index))
+        mock_client.return_value.run_instances.return_value = \
+            mock.Mock(id='r-1', instances=launched)
+
+        launch_group = instance._LaunchGroup(
+            'key', 'vm', {'image_id': TEST_AMI_IMAGE_ID})
+        output = instance._run_instances_batch(
+            launch_group, ['vm_c', 'vm_a', 'vm_b'])
+
+        mock_client.return_value.run_instances.assert_called_once_with(
+            image_id=TEST_AMI_IMAGE_ID, min_count=3, max_count=3,
+            client_token=instance._get_client_token(
+                ['vm_a', 'vm_b', 'vm_c']))
+        self.assertEqual({'vm_a': ('r-1', '0', 'i-0'),
+                          'vm_b': ('r-1', '1', 'i-1'),
+                          'vm_c': ('r-1', '2', 'i-2')}, output)
+        self.assertEqual(launch_group, instance._LaunchGroup(
+            'key', 'vm', {'image_id': TEST_AMI_IMAGE_ID}))
+        self.assertNotEqual(launch_group, instance._LaunchGroup(
+            'key', 'vm', {'image_id': 'ami-other'}))
+
+    def test_run_instances_client_token(self):
+        """ this tests that a retried launch calls run_instances with
+        the same client token instead of looking for the reservation
+        """
+
+        ctx = self.mock_ctx('test_run_instances_client_token')
+        current_ctx.set(ctx=ctx)
+        ec2_client = mock.Mock()
+        ec2_client.run_instances.return_value = mock.Mock(
+            id='r-1', instances=[mock.Mock(id='i-1')])
+
+        for _ in range(2):
+            self.assertEqual('i-1', instance._run_instances_if_needed(
+                ec2_client, {'image_id': TEST_AMI_IMAGE_ID}))
+
+        self.assertEqual(2, ec2_client.run_instances.call_count)
+        tokens = set(kwargs['client_token'] for _, kwargs
+                     in ec2_client.run_instances.call_args_list)
+        self.assertEqual(
+            set([instance._get_client_token([ctx.instance.id])]), tokens)
+        self.assertFalse(ec2_client.get_all_instances.called)
+
+        instance._run_instances_if_needed(
+            ec2_client, {'image_id': TEST_AMI_IMAGE_ID,
+                         'client_token': 'user-token'})
+        _, kwargs = ec2_client.run_instances.call_args
+        self.assertEqual('user-token', kwargs['client_token'])
+
+    def test_client_token_of_retry_in_new_execution(self):
+        """ this tests that a launch retried by another execution, or
+        after a reinstall, gets the expected client token
+        """
+
+        ctx = self.mock_ctx('test_client_token_of_retry')
+        ctx._deployment_id = 'deployment'
+        ctx._execution_id = 'install'
+        current_ctx.set(ctx=ctx)
+        ec2_client = mock.Mock()
+        ec2_client.run_instances.return_value = mock.Mock(
+            id='r-1', instances=[mock.Mock(id='i-1')])
+
+        instance._run_instances_if_needed(
+            ec2_client, {'image_id': TEST_AMI_IMAGE_ID})
+        ctx._execution_id = 'install-resumed'
+        ctx.instance.runtime_properties.clear()
+        instance._run_instances_if_needed(
+            ec2_client, {'image_id': TEST_AMI_IMAGE_ID})
+
+        first, retried = [kwargs['client_token'] for _, kwargs
+                          in ec2_client.run_instances.call_args_list]
+        self.assertEqual(first, retried)
+
+        ctx.instance.runtime_properties.clear()
+        ctx.instance.runtime_properties[
+            constants.LAUNCH_GENERATION_PROPERTY] = 1
+        instance._run_instances_if_needed(
+            ec2_client, {'image_id': TEST_AMI_IMAGE_ID})
+        _, kwargs = ec2_client.run_instances.call_args
+        self.assertNotEqual(first, kwargs['client_token'])
+        self.assertNotEqual(
+            instance._LaunchGroup('key', 'vm', {}),
+            instance._LaunchGroup('key', 'vm', {}, 1))
+
     @mock_ec2
     def test_with_userdata_clean(self):
         """ this tests that handle user data returns the expected output
@@ -311,6 +468,57 @@ class TestInstance(testtools.TestCase):
         state = instance_object.update()
         self.assertEqual(state, 'running')
         self.assertNotIn('Name', instance_object.tags)
+        self.assertEqual(
+            instance_object.private_dns_name,
+            ctx.instance.runtime_properties['private_dns_name'])
+        self.assertEqual(
+            instance_object.private_ip_address,
+            ctx.instance.runtime_properties['ip'])
+
+    @mock_ec2
+    def test_stop_after_start(self):
+        """ this tests that stop unassigns the runtime properties that
+        start assigned
+        """
+
+        ctx = self.mock_ctx('test_stop_after_start')
+        current_ctx.set(ctx=ctx)
+
+        ec2_client = connection.EC2ConnectionClient().client()
+        reservation = ec2_client.run_instances(
+            TEST_AMI_IMAGE_ID, instance_type=TEST_INSTANCE_TYPE)
+        instance_id = reservation.instances[0].id
+        ctx.instance.runtime_properties['aws_resource_id'] = instance_id
+        instance.start(ctx=ctx)
+        instance.stop(ctx=ctx)
+        for property_name in constants.INSTANCE_INTERNAL_ATTRIBUTES:
+            self.assertNotIn(property_name, ctx.instance.runtime_properties)
+
+    @mock_ec2
+    @mock.patch('ec2.ratelimit.rate_limiter.acquire', return_value=0.0)
+    @mock.patch('ec2.waiter.time.sleep')
+    def test_stop_waits_in_process(self, mock_sleep, *_):
+        """ this tests that stop polls the instance state in-process
+        instead of retrying the operation
+        """
+
+        ctx = self.mock_ctx('test_stop_waits_in_process')
+        current_ctx.set(ctx=ctx)
+
+        ec2_client = connection.EC2ConnectionClient().client()
+        reservation = ec2_client.run_instances(
+            TEST_AMI_IMAGE_ID, instance_type=TEST_INSTANCE_TYPE)
+        instance_id = reservation.instances[0].id
+        ctx.instance.runtime_properties['aws_resource_id'] = instance_id
+        for property_name in constants.INSTANCE_INTERNAL_ATTRIBUTES:
+            ctx.instance.runtime_properties[property_name] = '0.0.0.0'
+        states = [64, 64, constants.INSTANCE_STATE_STOPPED]
+        with mock.patch('ec2.instance._get_instance_state',
+                        side_effect=states), \
+                mock.patch.object(ctx.operation, 'retry') as mock_retry:
+            instance.stop(ctx=ctx)
+        self.assertEqual(2, mock_sleep.call_count)
+        self.assertFalse(mock_retry.called)
 
     @mock_ec2
     def test_terminate_clean(self):
@@ -326,11 +534,15 @@ class TestInstance(testtools.TestCase):
             TEST_AMI_IMAGE_ID, instance_type=TEST_INSTANCE_TYPE)
         instance_id = reservation.instances[0].id
         ctx.instance.runtime_properties['aws_resource_id'] = instance_id
+        ctx.instance.runtime_properties['reservation_id'] = reservation.id
         instance.terminate(ctx=ctx)
         reservations = ec2_client.get_all_reservations(instance_id)
         instance_object = reservations[0].instances[0]
         state = instance_object.update()
         self.assertEqual(state, 'terminated')
+        self.assertNotIn('reservation_id', ctx.instance.runtime_properties)
+        self.assertEqual(1, ctx.instance.runtime_properties[
+            constants.LAUNCH_GENERATION_PROPERTY])
 
     @mock_ec2
     def test_start_bad_id(self):
@@ -488,19 +700,6 @@ class TestInstance(testtools.TestCase):
             property_name)
         self.assertRegexpMatches(dns_name, FQDN)
 
-    @mock_ec2
-    def test_get_all_instances_bad_id(self):
-        """this checks that _get_all_instances returns None
-        when there is no such instance.
-        """
-
-        ctx = self.mock_ctx('test_get_all_instances_bad_id')
-        current_ctx.set(ctx=ctx)
-
-        output = instance._get_all_instances(
-            list_of_instance_ids='test_get_all_instances_bad_id')
-        self.assertIsNone(output)
-
     @mock_ec2
     def test_get_instance_attribute_no_instance(self):
         """ This tests that _get_instance_attribute raises an
@@ -554,6 +753,22 @@ class TestInstance(testtools.TestCase):
                 'Invalid id:'):
             instance.creation_validation(ctx=ctx)
 
+    @mock_ec2
+    @mock.patch('ec2.instance._get_image',
+                return_value=mock.Mock(state='available'))
+    def test_creation_validation_empty_resource_id(self, *_):
+        """This tests that creation validation does not describe
+        instances when no resource_id is given.
+        """
+
+        ctx = self.mock_ctx('test_creation_validation_empty_resource_id')
+        current_ctx.set(ctx=ctx)
+        with mock.patch.object(
+                instance._describe_coalescer, 'batch_function') \
+                as mock_describe:
+            instance.creation_validation(ctx=ctx)
+        self.assertFalse(mock_describe.called)
+
     @mock_ec2
     def test_start_and_tag_name(self):
         """ this tests that the instance start function
@@ -575,3 +790,55 @@ class TestInstance(testtools.TestCase):
         instance_object = reservations[0].instances[0]
         self.assertEquals(instance_object.tags.get('Name'),
                           ctx.node.properties['name'])
+
+    @mock_ec2
+    def test_start_external_instance_is_not_tagged(self):
+        """ this tests that starting an external instance does not
+        tag it.
+        """
+
+        ctx = self.mock_ctx('test_start_external_instance_is_not_tagged')
+        ctx.node.properties['name'] = 'test_start_external'
+        current_ctx.set(ctx=ctx)
+
+        ec2_client = connection.EC2ConnectionClient().client()
+        reservation = ec2_client.run_instances(
+            TEST_AMI_IMAGE_ID, instance_type=TEST_INSTANCE_TYPE)
+        instance_id = reservation.instances[0].id
+        ctx.node.properties['use_external_resource'] = True
+        ctx.node.properties['resource_id'] = instance_id
+        ctx.instance.runtime_properties['aws_resource_id'] = instance_id
+        instance.start(ctx=ctx)
+        reservations = ec2_client.get_all_reservations(instance_id)
+        self.assertEqual({}, reservations[0].instances[0].tags)
+
+    @mock_ec2
+    def test_start_describes_instance_once_per_state_change(self):
+        """ this tests that start serves attribute reads from the
+        operation's instance snapshot and state reads from the
+        state tracker.
+        """
+
+        ctx = self.mock_ctx('test_start_describes_instance_once')
+        ctx.node.properties['name'] = 'test_start_describes_instance_once'
+        current_ctx.set(ctx=ctx)
+
+        ec2_client = connection.EC2ConnectionClient().client()
+        reservation = ec2_client.run_instances(
+            TEST_AMI_IMAGE_ID, instance_type=TEST_INSTANCE_TYPE)
+        instance_id = reservation.instances[0].id
+        ctx.instance.runtime_properties['aws_resource_id'] = instance_id
+        ec2_client.stop_instances(instance_id)
+        tracker_patch = mock.patch.object(
+            statetracker, 'state_tracker',
+            statetracker.InstanceStateTracker())
+        tracker_patch.start()
+        self.addCleanup(tracker_patch.stop)
+
+        with mock.patch.object(
+                instance._describe_coalescer, 'batch_function',
+                side_effect=instance._describe_instances_batch) \
+                as mock_describe:
+            instance.start(ctx=ctx)
+        self.assertEqual(1, mock_describe.call_count)
+        self.assertIn('ip', ctx.instance.runtime_properties)
@@ -0,0 +1,93 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+# Built-in Imports
+import uuid
+import testtools
+
+# Third Party Imports
+import mock
+from moto import mock_ec2
+from boto.exception import EC2ResponseError
+
+# Cloudify Imports is imported and used in operations
+from ec2 import inventory
+from ec2 import constants
+from ec2 import connection
+from cloudify.state import current_ctx
+from cloudify.mocks import MockCloudifyContext
+
+
+class TestInventory(testtools.TestCase):
+
+    def setUp(self):
+        super(TestInventory, self).setUp()
+        self.ctx = MockCloudifyContext(
+            node_id='test_inventory',
+            deployment_id='test_deployment',
+            execution_id=str(uuid.uuid4()),
+            properties={constants.AWS_CONFIG_PROPERTY: {}})
+        current_ctx.set(ctx=self.ctx)
+
+    def describe(self, existing):
+        def describe(resource_ids):
+            missing = set(resource_ids) - set(existing)
+            if missing:
+                raise EC2ResponseError(
+                    400, 'Bad Request',
+                    '<Code>InvalidVolume.NotFound</Code>')
+            return [mock.Mock(id=resource_id) for resource_id in resource_ids]
+        return mock.Mock(side_effect=describe)
+
+    def test_no_id_no_call(self):
+        describe = self.describe([])
+        self.assertIsNone(inventory.get_resource('volume', '', describe))
+        self.assertFalse(describe.called)
+
+    def test_snapshot_is_shared_by_execution(self):
+        describe = self.describe(['vol-1'])
+        self.assertEqual('vol-1', inventory.get_resource(
+            'volume', 'vol-1', describe).id)
+        self.assertIsNone(inventory.get_resource('volume', 'vol-2', describe))
+        self.assertEqual('vol-1', inventory.get_resource(
+            'volume', 'vol-1', describe).id)
+        self.assertIsNone(inventory.get_resource('volume', 'vol-2', describe))
+        self.assertEqual(2, describe.call_count)
+
+    def test_missing_id_falls_back_per_id(self):
+        describe = self.describe(['vol-1', 'vol-2'])
+        group = inventory._InventoryGroup(
+            ('test_deployment', self.ctx.execution_id, 'volume', 'key'),
+            describe, inventory.get_id)
+
+        found = inventory._describe_batch(group, ['vol-1', 'vol-2', 'vol-3'])
+
+        self.assertEqual(['vol-1', 'vol-2'], sorted(found))
+        self.assertEqual(4, describe.call_count)
+        self.assertEqual(
+            ['vol-1', 'vol-2', 'vol-3'],
+            sorted(describe.call_args_list[0][1]['resource_ids']))
+
+    @mock_ec2
+    def test_volume_validation_uses_snapshot(self):
+        ec2_client = connection.EC2ConnectionClient().client()
+        volume = ec2_client.create_volume(1, 'us-east-1a')
+        describe = mock.Mock(side_effect=lambda resource_ids:
+                             ec2_client.get_all_volumes(
+                                 volume_ids=resource_ids))
+        for _ in range(3):
+            self.assertEqual(volume.id, inventory.get_resource(
+                'volume', volume.id, describe).id)
+        self.assertEqual(1, describe.call_count)
@@ -0,0 +1,166 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+# Built-in Imports
+import os
+import json
+import shutil
+import tempfile
+import testtools
+
+# Third Party Imports
+import mock
+from boto.exception import EC2ResponseError
+
+# Cloudify Imports is imported and used in operations
+from ec2 import metrics
+from ec2 import constants
+from cloudify.state import current_ctx
+from cloudify.mocks import MockCloudifyContext
+
+THROTTLED_BODY = '<Response><Errors><Error><Code>RequestLimitExceeded' \
+    '</Code><Message>Request limit exceeded.</Message></Error></Errors>' \
+    '</Response>'
+
+
+class TestMetrics(testtools.TestCase):
+
+    def setUp(self):
+        super(TestMetrics, self).setUp()
+        process_metrics = metrics.ApiMetrics()
+        patcher = mock.patch('ec2.metrics.process_metrics', process_metrics)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.process_metrics = process_metrics
+        self.ctx = MockCloudifyContext(node_id='test_metrics',
+                                       deployment_id='test_metrics')
+        current_ctx.set(ctx=self.ctx)
+        self.addCleanup(current_ctx.clear)
+
+    def get_connection(self, responses):
+        connection = mock.Mock(spec=['make_request'])
+        connection.make_request.side_effect = responses
+        return metrics.install(connection)
+
+    def get_response(self, size):
+        response = mock.Mock(status=200)
+        response.getheader.return_value = str(size)
+        return response
+
+    def test_calls_are_counted_per_action(self):
+        connection = self.get_connection(
+            [self.get_response(100), self.get_response(50),
+             self.get_response(10)])
+
+        connection.make_request('DescribeInstances')
+        connection.make_request('DescribeInstances')
+        connection.make_request('CreateTags')
+
+        counters = self.process_metrics.get_counters()
+        self.assertEqual(2, counters['DescribeInstances']['calls'])
+        self.assertEqual(150, counters['DescribeInstances']['response_bytes'])
+        self.assertEqual(2, sum(counters['DescribeInstances']['histogram']))
+        self.assertEqual(1, counters['CreateTags']['calls'])
+        self.assertEqual(
+            counters, metrics.get_operation_metrics().get_counters())
+
+    def test_install_is_idempotent(self):
+        connection = self.get_connection([self.get_response(1)])
+        metrics.install(connection)
+
+        connection.make_request('DescribeVolumes')
+
+        self.assertEqual(
+            1, self.process_metrics.get_counters()['DescribeVolumes']['calls'])
+
+    def test_throttles_and_retries_are_counted(self):
+        connection = self.get_connection(
+            [EC2ResponseError(503, 'Service Unavailable', THROTTLED_BODY),
+             self.get_response(1)])
+
+        self.assertRaises(EC2ResponseError,
+                          connection.make_request, 'RunInstances')
+        connection.make_request('RunInstances')
+
+        counters = self.process_metrics.get_counters()['RunInstances']
+        self.assertEqual(2, counters['calls'])
+        self.assertEqual(1, counters['errors'])
+        self.assertEqual(1, counters['throttles'])
+        self.assertEqual(1, counters['retries'])
+
+    def test_throttled_responses_are_counted(self):
+        throttled = mock.Mock(status=400, reason='Bad Request')
+        throttled.getheader.return_value = str(len(THROTTLED_BODY))
+        throttled.read.return_value = THROTTLED_BODY
+        connection = self.get_connection([throttled, self.get_response(1)])
+
+        self.assertIs(throttled, connection.make_request('DescribeVolumes'))
+        connection.make_request('DescribeVolumes')
+
+        counters = self.process_metrics.get_counters()['DescribeVolumes']
+        self.assertEqual(2, counters['calls'])
+        self.assertEqual(1, counters['errors'])
+        self.assertEqual(1, counters['throttles'])
+        self.assertEqual(1, counters['retries'])
+
+    def test_latency_histogram_buckets(self):
+        api_metrics = metrics.ApiMetrics(buckets=[0.1, 1])
+        api_metrics.record_call('DescribeImages', 0.05)
+        api_metrics.record_call('DescribeImages', 0.5)
+        api_metrics.record_call('DescribeImages', 5)
+
+        counters = api_metrics.get_counters()['DescribeImages']
+        self.assertEqual([1, 1, 1], counters['histogram'])
+        self.assertEqual(5, counters['max_seconds'])
+
+        prometheus = api_metrics.to_prometheus()
+        self.assertIn('cloudify_aws_api_call_seconds_bucket'
+                      '{action="DescribeImages",le="1"} 2', prometheus)
+        self.assertIn('cloudify_aws_api_call_seconds_bucket'
+                      '{action="DescribeImages",le="+Inf"} 3', prometheus)
+        self.assertIn('cloudify_aws_api_calls_total'
+                      '{action="DescribeImages"} 3', prometheus)
+
+    def test_dump(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.process_metrics.record_call('DescribeVolumes', 0.2, 10)
+
+        paths = metrics.dump(directory)
+
+        self.assertEqual(
+            [os.path.join(directory, '{0}-{1}.{2}'.format(
+                constants.METRICS_FILE_PREFIX, os.getpid(), extension))
+             for extension in ['json', 'prom']], paths)
+        with open(paths[0]) as metrics_file:
+            dumped = json.load(metrics_file)
+        self.assertEqual(1, dumped['actions']['DescribeVolumes']['calls'])
+        self.assertEqual([], metrics.dump(''))
+
+    @mock.patch('ec2.metrics.ctx')
+    def test_operation_logs_summary(self, mock_ctx):
+
+        @metrics.operation
+        def describe(**_):
+            self.process_metrics.record_call('DescribeVolumes', 0.2)
+            metrics.get_operation_metrics().record_call(
+                'DescribeVolumes', 0.2)
+
+        with mock.patch.dict(
+                os.environ, {constants.METRICS_DIR_ENV_VAR_NAME: ''}):
+            describe(ctx=self.ctx)
+
+        mock_ctx.logger.info.assert_called_once_with(
+            'AWS API calls: DescribeVolumes x1 0.200s')
@@ -0,0 +1,146 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+# Built-in Imports
+import itertools
+import testtools
+
+# Third Party Imports
+import mock
+from moto import mock_ec2
+from boto.ec2 import EC2Connection
+from boto.vpc import VPCConnection
+
+# Cloudify Imports is imported and used in operations
+from ec2 import pagination
+from cloudify.state import current_ctx
+from cloudify.mocks import MockCloudifyContext
+
+TEST_AMI_IMAGE_ID = 'ami-e214778a'
+
+
+class Page(list):
+
+    def __init__(self, resources, next_token=None, next_marker=None):
+        super(Page, self).__init__(resources)
+        self.next_token = next_token
+        self.next_marker = next_marker
+
+
+class TestPagination(testtools.TestCase):
+
+    def setUp(self):
+        super(TestPagination, self).setUp()
+        current_ctx.set(ctx=MockCloudifyContext(node_id='test_pagination'))
+        self.addCleanup(current_ctx.clear)
+
+    def run_instances(self, ec2_client, reservations):
+        for _ in range(reservations):
+            ec2_client.run_instances(TEST_AMI_IMAGE_ID)
+
+    @mock_ec2
+    def test_instances_are_described_a_page_at_a_time(self):
+        ec2_client = EC2Connection()
+        self.run_instances(ec2_client, 12)
+
+        with mock.patch.object(
+                ec2_client, 'get_all_reservations',
+                wraps=ec2_client.get_all_reservations) as describe:
+            instances = list(pagination.iterate_instances(
+                ec2_client, page_size=5))
+
+        self.assertEqual(12, len(set(instance.id for instance in instances)))
+        self.assertEqual(3, describe.call_count)
+        for _, kwargs in describe.call_args_list:
+            self.assertEqual(5, kwargs['max_results'])
+
+    @mock_ec2
+    def test_iteration_stops_with_the_caller(self):
+        ec2_client = EC2Connection()
+        self.run_instances(ec2_client, 12)
+
+        with mock.patch.object(
+                ec2_client, 'get_all_reservations',
+                wraps=ec2_client.get_all_reservations) as describe:
+            instances = list(itertools.islice(
+                pagination.iterate_instances(ec2_client, page_size=5), 3))
+
+        self.assertEqual(3, len(instances))
+        self.assertEqual(1, describe.call_count)
+
+    def test_page_size_is_kept_within_max_results(self):
+        self.assertEqual(5, pagination.get_page_size(1))
+        self.assertEqual(1000, pagination.get_page_size(5000))
+        self.assertEqual(100, pagination.get_page_size())
+
+    def test_ids_are_described_a_page_at_a_time(self):
+        describe = mock.Mock(side_effect=lambda volume_ids: volume_ids)
+        ids = ['vol-{0}'.format(index) for index in range(7)]
+
+        self.assertEqual(ids, list(pagination.iterate_ids(
+            describe, 'volume_ids', ids, page_size=3)))
+        self.assertEqual(
+            [ids[0:3], ids[3:6], ids[6:]],
+            [kwargs['volume_ids'] for _, kwargs in describe.call_args_list])
+
+        describe.reset_mock()
+        self.assertEqual(['vol-0'], list(pagination.iterate_ids(
+            describe, 'volume_ids', 'vol-0')))
+        describe.assert_called_once_with(volume_ids=['vol-0'])
+
+    def test_paged_describe_sends_max_results_and_next_token(self):
+        ec2_client = EC2Connection()
+        pages = [Page(['vol-1', 'vol-2'], next_token='token'),
+                 Page(['vol-3'])]
+
+        with mock.patch.object(ec2_client, 'get_list',
+                               side_effect=pages) as get_list:
+            volumes = list(pagination.iterate_resources(
+                ec2_client, 'volume', filters={'status': 'available'},
+                page_size=10))
+
+        self.assertEqual(['vol-1', 'vol-2', 'vol-3'], volumes)
+        first, second = [args for args, _ in get_list.call_args_list]
+        self.assertEqual('DescribeVolumes', first[0])
+        self.assertEqual(
+            {'Filter.1.Name': 'status', 'Filter.1.Value.1': 'available',
+             'MaxResults': 10}, first[1])
+        self.assertEqual('token', second[1]['NextToken'])
+
+    def test_markers_are_followed(self):
+        elb_client = mock.Mock()
+        elb_client.get_all_load_balancers.side_effect = [
+            Page(['elb-1'], next_marker='marker'), Page(['elb-2'])]
+
+        self.assertEqual(['elb-1', 'elb-2'], list(
+            pagination.iterate_load_balancers(elb_client)))
+        _, kwargs = elb_client.get_all_load_balancers.call_args
+        self.assertEqual('marker', kwargs['marker'])
+
+    @mock_ec2
+    def test_resources_are_filtered_server_side(self):
+        vpc_client = VPCConnection()
+        vpc = vpc_client.create_vpc('10.0.0.0/16')
+        vpc_client.create_vpc('10.1.0.0/16')
+
+        vpcs = list(pagination.iterate_resources(
+            vpc_client, 'vpc', filters={'vpc-id': vpc.id}))
+        route_tables = list(pagination.iterate_resources(
+            vpc_client, 'route_table', filters={'vpc-id': vpc.id}))
+
+        self.assertEqual([vpc.id], [found.id for found in vpcs])
+        self.assertEqual('10.0.0.0/16', vpcs[0].cidr_block)
+        self.assertEqual([vpc.id], list(set(
+            route_table.vpc_id for route_table in route_tables)))
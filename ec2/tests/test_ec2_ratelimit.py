@@ -0,0 +1,105 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+# Built-in Imports
+import os
+import shutil
+import tempfile
+import testtools
+
+# Third Party Imports
+import mock
+
+# Cloudify Imports is imported and used in operations
+from ec2 import ratelimit
+from ec2 import constants
+
+
+class TestRateLimit(testtools.TestCase):
+
+    def setUp(self):
+        super(TestRateLimit, self).setUp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.state_path = os.path.join(self.temp_dir, 'state')
+
+    def test_action_class(self):
+        self.assertEqual('describe',
+                         ratelimit.get_action_class('DescribeInstances'))
+        self.assertEqual('describe',
+                         ratelimit.get_action_class('GetConsoleOutput'))
+        self.assertEqual('tag', ratelimit.get_action_class('CreateTags'))
+        self.assertEqual('mutate',
+                         ratelimit.get_action_class('RunInstances'))
+
+    def test_rate_limits_env_override(self):
+        overrides = '{"describe": [50, 200], "tag": null}'
+        with mock.patch.dict(
+                os.environ,
+                {constants.RATE_LIMITS_ENV_VAR_NAME: overrides}):
+            rate_limits = ratelimit.get_rate_limits()
+        self.assertEqual([50, 200], rate_limits['describe'])
+        self.assertNotIn('tag', rate_limits)
+        self.assertEqual(constants.RATE_LIMITS['mutate'],
+                         rate_limits['mutate'])
+
+    def test_burst_then_wait(self):
+        buckets = ratelimit.SharedBuckets(self.state_path)
+        with mock.patch('ec2.ratelimit.time.time', return_value=1000.0):
+            for _ in range(3):
+                self.assertEqual(0, buckets.reserve('r:mutate', 2, 3))
+            self.assertEqual(0.5, buckets.reserve('r:mutate', 2, 3))
+            self.assertEqual(1.0, buckets.reserve('r:mutate', 2, 3))
+        with mock.patch('ec2.ratelimit.time.time', return_value=1010.0):
+            self.assertEqual(0, buckets.reserve('r:mutate', 2, 3))
+
+    def test_buckets_shared_through_file(self):
+        first_process = ratelimit.SharedBuckets(self.state_path)
+        second_process = ratelimit.SharedBuckets(self.state_path)
+        with mock.patch('ec2.ratelimit.time.time', return_value=1000.0):
+            self.assertEqual(0, first_process.reserve('r:describe', 1, 1))
+            self.assertEqual(1.0, second_process.reserve('r:describe', 1, 1))
+            self.assertEqual(0, second_process.reserve('s:describe', 1, 1))
+
+    def test_unusable_state_file_falls_back_to_process(self):
+        buckets = ratelimit.SharedBuckets(
+            os.path.join(self.temp_dir, 'missing', 'state'))
+        with mock.patch('ec2.ratelimit.time.time', return_value=1000.0):
+            self.assertEqual(0, buckets.reserve('r:describe', 1, 1))
+            self.assertEqual(1.0, buckets.reserve('r:describe', 1, 1))
+
+    def test_install_waits_and_counts(self):
+        limiter = ratelimit.RateLimiter(
+            ratelimit.SharedBuckets(self.state_path))
+        connection = mock.Mock(spec=['make_request', 'region'])
+        connection.region.name = 'us-east-1'
+        make_request = connection.make_request
+        ratelimit.install(connection, limiter)
+        ratelimit.install(connection, limiter)
+
+        with mock.patch.dict(constants.RATE_LIMITS, mutate=(10, 1)), \
+                mock.patch('ec2.ratelimit.time.sleep') as mock_sleep:
+            connection.make_request('RunInstances', {})
+            connection.make_request('TerminateInstances', {})
+
+        self.assertEqual(2, make_request.call_count)
+        make_request.assert_called_with('TerminateInstances', {})
+        self.assertEqual(1, mock_sleep.call_count)
+        counters = limiter.get_wait_counters()['mutate']
+        self.assertEqual(2, counters['calls'])
+        self.assertEqual(1, counters['waits'])
+        self.assertGreater(counters['wait_seconds'], 0)
+        limiter.reset_wait_counters()
+        self.assertEqual({}, limiter.get_wait_counters())
@@ -0,0 +1,92 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+# Built-in Imports
+import testtools
+
+# Third Party Imports
+import mock
+from boto.exception import EC2ResponseError
+
+# Cloudify Imports is imported and used in operations
+from ec2 import retry
+from cloudify.state import current_ctx
+from cloudify.mocks import MockCloudifyContext
+from cloudify.exceptions import RecoverableError
+
+ERROR_BODY = '''<?xml version="1.0" encoding="UTF-8"?>
+<Response><Errors><Error><Code>{0}</Code><Message>{0}</Message>
+</Error></Errors><RequestID>1</RequestID></Response>'''
+
+
+def ec2_error(code, status=400):
+    return EC2ResponseError(status, 'reason', ERROR_BODY.format(code))
+
+
+class TestRetry(testtools.TestCase):
+
+    def setUp(self):
+        super(TestRetry, self).setUp()
+        current_ctx.set(ctx=MockCloudifyContext(node_id='test_retry'))
+
+    def test_classification(self):
+        self.assertTrue(retry.is_throttling_error(
+            ec2_error('RequestLimitExceeded', 503)))
+        self.assertTrue(retry.is_transient_error(
+            ec2_error('InternalError', 500)))
+        self.assertTrue(retry.is_eventual_consistency_error(
+            ec2_error('InvalidInstanceID.NotFound')))
+        self.assertFalse(retry.is_retryable_error(
+            ec2_error('InvalidInstanceID.NotFound')))
+        self.assertTrue(retry.is_retryable_error(
+            ec2_error('InvalidInstanceID.NotFound'), retry_not_found=True))
+        self.assertFalse(retry.is_retryable_error(
+            ec2_error('InvalidParameterValue')))
+
+    @mock.patch('ec2.retry.time.sleep')
+    def test_retries_throttling_until_success(self, mock_sleep):
+        fn = mock.Mock(side_effect=[ec2_error('Throttling'),
+                                    ec2_error('RequestLimitExceeded'),
+                                    'output'])
+        output = retry.execute_with_retry(fn, dict(instance_ids='i-1'))
+        self.assertEqual('output', output)
+        self.assertEqual(3, fn.call_count)
+        self.assertEqual(2, mock_sleep.call_count)
+        fn.assert_called_with(instance_ids='i-1')
+
+    @mock.patch('ec2.retry.time.sleep')
+    def test_non_retryable_error_is_raised(self, mock_sleep):
+        fn = mock.Mock(side_effect=ec2_error('InvalidParameterValue'))
+        self.assertRaises(EC2ResponseError, retry.execute_with_retry, fn)
+        self.assertEqual(1, fn.call_count)
+        self.assertFalse(mock_sleep.called)
+
+    @mock.patch('ec2.retry.time.sleep')
+    def test_budget_exhausted_raises_recoverable(self, mock_sleep):
+        fn = mock.Mock(side_effect=ec2_error('RequestLimitExceeded'))
+        ex = self.assertRaises(RecoverableError, retry.execute_with_retry,
+                               fn, time_budget=0)
+        self.assertIsNotNone(ex.retry_after)
+        self.assertIn('RequestLimitExceeded', ex.message)
+
+    def test_backoff_stays_within_bounds(self):
+        delays = []
+        fn = mock.Mock(side_effect=[ec2_error('Throttling')] * 10 + ['ok'])
+        with mock.patch('ec2.retry.time.sleep', side_effect=delays.append):
+            retry.execute_with_retry(fn, time_budget=1000)
+        self.assertEqual(10, len(delays))
+        for delay in delays:
+            self.assertGreaterEqual(delay, retry.constants.RETRY_BASE_DELAY)
+            self.assertLessEqual(delay, retry.constants.RETRY_MAX_DELAY)
@@ -14,19 +14,31 @@
 #    * limitations under the License.
 
 # Built-in Imports
+import os
+import logging
 import testtools
 
 # Third Party Imports
+import boto.vpc
 from moto import mock_ec2
+import mock
+from boto.ec2 import EC2Connection
+from boto.exception import EC2ResponseError
 
 # Cloudify Imports is imported and used in operations
 from ec2 import constants
+from ec2 import utils
 from ec2 import connection
 from ec2 import securitygroup
 from cloudify.state import current_ctx
 from cloudify.mocks import MockCloudifyContext
 from cloudify.exceptions import NonRecoverableError
 
+NOT_FOUND_RESPONSE = '''<?xml version="1.0" encoding="UTF-8"?>
+<Response><Errors><Error><Code>{0}</Code>
+<Message>The ID does not exist</Message></Error></Errors>
+<RequestID>0123</RequestID></Response>'''
+
 
 class TestSecurityGroup(testtools.TestCase):
 
@@ -357,6 +369,95 @@ class TestSecurityGroup(testtools.TestCase):
             str(ec2_client.get_all_security_groups(
                 groupnames='test_create_group_rules_src_group')[0].rules))
 
+    @mock_ec2
+    def test_create_group_rules_batched(self):
+        """ This tests that _create_group_rules resolves all source
+        groups with one describe and authorizes the rules in chunks.
+        """
+
+        ec2_client = connection.EC2ConnectionClient().client()
+        test_properties = self.get_mock_properties()
+        ctx = self.security_group_mock(
+            'test_create_group_rules_batched', test_properties)
+        current_ctx.set(ctx=ctx)
+        src_groups = [
+            ec2_client.create_security_group('src{0}'.format(i), 'test')
+            for i in range(3)]
+        ctx.node.properties['rules'] = [
+            {'ip_protocol': 'tcp', 'from_port': port, 'to_port': port,
+             'src_group_id': src_groups[port % 3].id}
+            for port in range(1000, 1025)]
+        group = ec2_client.create_security_group(
+            'test_create_group_rules_batched', 'this is test')
+
+        with mock.patch.object(
+                securitygroup, '_get_all_security_groups',
+                wraps=securitygroup._get_all_security_groups) as describe, \
+                mock.patch.object(
+                    securitygroup, '_authorize_ingress',
+                    wraps=securitygroup._authorize_ingress) as authorize:
+            securitygroup._create_group_rules(group)
+
+        self.assertEqual(1, describe.call_count)
+        self.assertEqual(2, authorize.call_count)
+        self.assertEqual(25, len(ec2_client.get_all_security_groups(
+            groupnames='test_create_group_rules_batched')[0].rules))
+
+    @mock_ec2
+    def test_create_group_rules_rollback(self):
+        """ This tests that the group is deleted when adding
+        the rules fails unexpectedly.
+        """
+
+        ec2_client = connection.EC2ConnectionClient().client()
+        test_properties = self.get_mock_properties()
+        ctx = self.security_group_mock(
+            'test_create_group_rules_rollback', test_properties)
+        current_ctx.set(ctx=ctx)
+        group = ec2_client.create_security_group(
+            'test_create_group_rules_rollback', 'this is test')
+
+        with mock.patch.object(securitygroup, '_authorize_ingress',
+                               side_effect=ValueError('boom')):
+            self.assertRaises(ValueError,
+                              securitygroup._create_group_rules, group)
+
+        self.assertFalse(securitygroup._get_security_group_from_id(
+            group.id))
+
+    @mock_ec2
+    def test_get_security_groups_from_names_in_vpc(self):
+        """ This tests that VPC groups are looked up by name within
+        the given VPC and then served from the operation's name index.
+        """
+
+        test_properties = self.get_mock_properties()
+        ctx = self.security_group_mock(
+            'test_get_security_groups_from_names_in_vpc', test_properties)
+        current_ctx.set(ctx=ctx)
+        ec2_client = connection.EC2ConnectionClient().client()
+        vpc_client = boto.vpc.VPCConnection()
+        vpc_ids = [vpc_client.create_vpc(cidr).id
+                   for cidr in ['10.0.0.0/16', '10.1.0.0/16']]
+        groups = [ec2_client.create_security_group(
+            'web', 'this is test', vpc_id=vpc_id) for vpc_id in vpc_ids]
+
+        with mock.patch.object(
+                securitygroup, '_get_all_security_groups',
+                wraps=securitygroup._get_all_security_groups) as describe:
+            for _ in range(3):
+                output = securitygroup._get_security_groups_from_names(
+                    ['web'], vpc_ids[1])
+                self.assertEqual(groups[1].id, output['web'].id)
+            self.assertEqual(
+                {}, securitygroup._get_security_groups_from_names(
+                    ['missing'], vpc_ids[1]))
+
+        self.assertEqual(2, describe.call_count)
+        self.assertEqual(
+            {'group-name': ['web'], 'vpc-id': vpc_ids[1]},
+            describe.call_args_list[0][1]['filters'])
+
     @mock_ec2
     def test_create_external_securitygroup_not_external(self):
         """ This checks that _create_external_securitygroup
@@ -392,3 +493,66 @@ class TestSecurityGroup(testtools.TestCase):
 
         output = securitygroup._delete_external_securitygroup()
         self.assertEqual(False, output)
+
+    @mock_ec2
+    def test_get_security_groups_from_names_outside_vpc(self):
+        """ This tests that without a VPC, a name only matches the group
+        outside any VPC, and not a VPC group with the same name.
+        """
+
+        test_properties = self.get_mock_properties()
+        ctx = self.security_group_mock(
+            'test_get_security_groups_from_names_outside_vpc',
+            test_properties)
+        current_ctx.set(ctx=ctx)
+        ec2_client = connection.EC2ConnectionClient().client()
+        vpc_id = boto.vpc.VPCConnection().create_vpc('10.0.0.0/16').id
+        vpc_group = ec2_client.create_security_group(
+            'web', 'this is test', vpc_id=vpc_id)
+        ec2_client.create_security_group(
+            'db', 'this is test', vpc_id=vpc_id)
+
+        self.assertEqual(
+            {}, securitygroup._get_security_groups_from_names(['web', 'db']))
+
+        group = ec2_client.create_security_group('web', 'this is test')
+        utils.get_operation_cache(
+            constants.SECURITY_GROUP_NAME_CACHE).clear()
+        output = securitygroup._get_security_groups_from_names(
+            ['web', 'db'])
+        self.assertEqual(['web'], output.keys())
+        self.assertEqual(group.id, output['web'].id)
+        output = securitygroup._get_security_groups_from_names(
+            ['web'], vpc_id)
+        self.assertEqual(vpc_group.id, output['web'].id)
+
+    @mock_ec2
+    def test_get_all_security_groups_not_found_logs_available_groups(self):
+        """ This tests that a group that does not exist logs the
+        available groups, capped at the diagnostics limit.
+        """
+
+        test_properties = self.get_mock_properties()
+        ctx = self.security_group_mock(
+            'test_get_all_security_groups_not_found', test_properties)
+        current_ctx.set(ctx=ctx)
+        ec2_client = connection.EC2ConnectionClient().client()
+        for name in ['a', 'b', 'c']:
+            ec2_client.create_security_group(name, 'this is test')
+        self.addCleanup(ctx.logger.setLevel, ctx.logger.level)
+        ctx.logger.setLevel(logging.DEBUG)
+        error = EC2ResponseError(
+            400, 'Bad Request',
+            NOT_FOUND_RESPONSE.format('InvalidGroup.NotFound'))
+
+        with mock.patch.dict(os.environ, {
+                constants.AVAILABLE_RESOURCES_LOG_LIMIT_ENV_VAR_NAME: '2'}), \
+                mock.patch.object(EC2Connection, 'get_all_security_groups',
+                                  side_effect=error), \
+                mock.patch.object(ctx.logger, 'debug') as mock_debug:
+            self.assertIsNone(securitygroup._get_all_security_groups(
+                list_of_group_ids=['sg-12345678']))
+
+        message = '\n'.join(call[0][0] for call in mock_debug.call_args_list)
+        self.assertIn('SecurityGroup:', message)
+        self.assertIn('more than 2 resources', message)
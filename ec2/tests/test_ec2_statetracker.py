@@ -0,0 +1,127 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+# Built-in Imports
+import os
+import testtools
+
+# Third Party Imports
+import mock
+from boto.ec2 import instancestatus
+from boto.exception import EC2ResponseError
+
+# Cloudify Imports is imported and used in operations
+from ec2 import constants
+from ec2 import statetracker
+from cloudify.state import current_ctx
+from cloudify.mocks import MockCloudifyContext
+
+NOT_FOUND_RESPONSE = """<?xml version="1.0" encoding="UTF-8"?>
+<Response><Errors><Error><Code>InvalidInstanceID.NotFound</Code>
+<Message>The instance ID 'i-2' does not exist</Message></Error></Errors>
+<RequestID>0123</RequestID></Response>"""
+
+
+def status_page(states, next_token=None):
+    page = instancestatus.InstanceStatusSet()
+    for instance_id, state_code in states:
+        page.append(instancestatus.InstanceStatus(
+            id=instance_id, state_code=state_code))
+    page.next_token = next_token
+    return page
+
+
+class TestInstanceStateTracker(testtools.TestCase):
+
+    def setUp(self):
+        super(TestInstanceStateTracker, self).setUp()
+        current_ctx.set(ctx=MockCloudifyContext(node_id='test_tracker'))
+        self.tracker = statetracker.InstanceStateTracker(max_age=60)
+        self.client = mock.Mock()
+        # the client mocks the boto method, not the response
+        patcher = mock.patch.dict(os.environ)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        os.environ.pop(constants.FAST_DESCRIBE_ENV_VAR_NAME, None)
+
+    def get_state(self, instance_id):
+        return self.tracker.get_state(
+            'scope', instance_id, lambda: self.client)
+
+    def test_refreshes_tracked_instances_in_pages(self):
+        self.client.get_all_instance_status.side_effect = [
+            status_page([('i-1', 16), ('i-2', 80)]), status_page([('i-3', 0)])
+        ]
+        self.tracker.invalidate('scope', 'i-2')
+        self.tracker.invalidate('scope', 'i-3')
+
+        with mock.patch.object(
+                constants, 'INSTANCE_STATUS_IDS_PAGE_SIZE', 2):
+            self.assertEqual(16, self.get_state('i-1'))
+
+        self.assertEqual(
+            [['i-1', 'i-2'], ['i-3']],
+            [kwargs['instance_ids'] for _, kwargs in
+             self.client.get_all_instance_status.call_args_list])
+        _, kwargs = self.client.get_all_instance_status.call_args
+        self.assertTrue(kwargs['include_all_instances'])
+
+        self.assertEqual(80, self.get_state('i-2'))
+        self.assertEqual(0, self.get_state('i-3'))
+        self.assertEqual(2, self.client.get_all_instance_status.call_count)
+
+    def test_new_instance_is_described_by_a_refresh(self):
+        self.client.get_all_instance_status.side_effect = [
+            status_page([('i-1', 16)]),
+            status_page([('i-1', 16), ('i-2', 0)])]
+
+        self.assertEqual(16, self.get_state('i-1'))
+        self.assertEqual(0, self.get_state('i-2'))
+        _, kwargs = self.client.get_all_instance_status.call_args
+        self.assertEqual(['i-1', 'i-2'], kwargs['instance_ids'])
+
+    def test_instances_that_are_not_visible_yet_are_skipped(self):
+        self.tracker.invalidate('scope', 'i-2')
+        self.client.get_all_instance_status.side_effect = [
+            EC2ResponseError(400, 'Bad Request', NOT_FOUND_RESPONSE),
+            status_page([('i-1', 16)])]
+
+        self.assertEqual(16, self.get_state('i-1'))
+        self.assertEqual(
+            [['i-1', 'i-2'], ['i-1']],
+            [kwargs['instance_ids'] for _, kwargs in
+             self.client.get_all_instance_status.call_args_list])
+
+    def test_invalidated_state_is_refreshed(self):
+        self.client.get_all_instance_status.side_effect = [
+            status_page([('i-1', 16)]), status_page([('i-1', 64)])]
+
+        self.assertEqual(16, self.get_state('i-1'))
+        self.assertEqual(16, self.get_state('i-1'))
+        self.tracker.invalidate('scope', 'i-1')
+        self.assertEqual(64, self.get_state('i-1'))
+        self.assertEqual(2, self.client.get_all_instance_status.call_count)
+
+    def test_unknown_instance(self):
+        self.client.get_all_instance_status.return_value = \
+            status_page([('i-1', 16)])
+        self.assertIsNone(self.get_state('i-2'))
+        self.assertIsNone(self.get_state('i-2'))
+        self.assertEqual(1, self.client.get_all_instance_status.call_count)
+
+    def test_describe_error(self):
+        self.client.get_all_instance_status.side_effect = \
+            EC2ResponseError(403, 'Forbidden')
+        self.assertIsNone(self.get_state('i-1'))
@@ -0,0 +1,110 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+# Built-in Imports
+import testtools
+
+# Third Party Imports
+from moto import mock_ec2
+import mock
+from boto.exception import EC2ResponseError
+
+# Cloudify Imports is imported and used in operations
+from ec2 import ebs
+from ec2 import tagging
+from ec2 import constants
+from ec2 import connection
+from cloudify.state import current_ctx
+from cloudify.mocks import MockCloudifyContext
+from cloudify.exceptions import NonRecoverableError
+
+
+class TestTagging(testtools.TestCase):
+
+    def mock_ctx(self, test_name, tags=None):
+        """ Creates a mock context for the tagging tests
+        """
+
+        test_properties = {
+            constants.AWS_CONFIG_PROPERTY: {},
+            'use_external_resource': False,
+            'resource_id': '',
+            'size': 1,
+            'zone': 'us-east-1a',
+            'device': '/dev/sdf',
+            'tags': tags or {}
+        }
+
+        ctx = MockCloudifyContext(
+            node_id=test_name,
+            deployment_id='test_deployment',
+            properties=test_properties
+        )
+        current_ctx.set(ctx=ctx)
+        return ctx
+
+    def test_get_tags(self):
+        self.mock_ctx('test_get_tags', tags={'Name': 'user', 'team': 'a'})
+        self.assertEqual({
+            constants.DEPLOYMENT_ID_TAG: 'test_deployment',
+            constants.NODE_INSTANCE_ID_TAG: 'test_get_tags',
+            'Name': 'user',
+            'team': 'a'
+        }, tagging.get_tags(name='vm'))
+
+    @mock.patch('ec2.connection.EC2ConnectionClient.client')
+    def test_tag_resource(self, mock_client):
+        self.mock_ctx('test_tag_resource', tags={'team': 'a'})
+        tagging.tag_resource('vol-1', name='volume')
+        mock_client.return_value.create_tags.assert_called_once_with(
+            resource_ids=['vol-1'], tags=tagging.get_tags(name='volume'))
+
+    @mock.patch('ec2.connection.EC2ConnectionClient.client')
+    def test_tag_resource_error(self, mock_client):
+        self.mock_ctx('test_tag_resource_error')
+        mock_client.return_value.create_tags.side_effect = \
+            EC2ResponseError(400, 'Bad Request')
+        ex = self.assertRaises(
+            NonRecoverableError, tagging.tag_resource, 'vol-1')
+        self.assertIn('Unable to tag resource vol-1', ex.message)
+
+    @mock_ec2
+    def test_created_volume_is_tagged(self):
+        ctx = self.mock_ctx('test_created_volume_is_tagged',
+                            tags={'team': 'a'})
+        ebs.create(args={}, ctx=ctx)
+        volume_id = ctx.instance.runtime_properties['aws_resource_id']
+        current_ctx.set(ctx=ctx)
+
+        ec2_client = connection.EC2ConnectionClient().client()
+        volume = ec2_client.get_all_volumes(volume_ids=[volume_id])[0]
+        self.assertEqual('a', volume.tags.get('team'))
+        self.assertEqual('test_deployment',
+                         volume.tags.get(constants.DEPLOYMENT_ID_TAG))
+
+    @mock_ec2
+    def test_volume_id_is_recorded_when_tagging_fails(self):
+        ctx = self.mock_ctx('test_volume_id_is_recorded_when_tagging_fails')
+        with mock.patch('ec2.tagging.tag_resource',
+                        side_effect=NonRecoverableError('tagging')):
+            self.assertRaises(
+                NonRecoverableError, ebs.create, args={}, ctx=ctx)
+        volume_id = ctx.instance.runtime_properties['aws_resource_id']
+        current_ctx.set(ctx=ctx)
+
+        ec2_client = connection.EC2ConnectionClient().client()
+        self.assertEqual(
+            [volume_id],
+            [volume.id for volume in ec2_client.get_all_volumes()])
@@ -14,10 +14,14 @@
 #    * limitations under the License.
 
 # Builtin Imports
+import os
+import json
+import logging
 import tempfile
 import testtools
 
 # Third Party Imports
+import mock
 from moto import mock_ec2
 from boto.ec2 import EC2Connection
 
@@ -87,6 +91,133 @@ class TestUtils(testtools.TestCase):
         current_ctx.set(ctx=ctx)
         utils.log_available_resources(list_of_resources)
 
+    def test_log_available_resources_capped(self):
+        ctx = self.mock_ctx('test_log_available_resources_capped')
+        current_ctx.set(ctx=ctx)
+        self.addCleanup(ctx.logger.setLevel, ctx.logger.level)
+        ctx.logger.setLevel(logging.DEBUG)
+        list_of_resources = ['Resource:{0}'.format(i) for i in range(100)]
+        with mock.patch.object(ctx.logger, 'debug') as mock_debug:
+            utils.log_available_resources(list_of_resources, limit=30)
+        message = '\n'.join(call[0][0] for call in mock_debug.call_args_list)
+        self.assertIn('Resource:29', message)
+        self.assertNotIn('Resource:30', message)
+        self.assertIn('more than 30 resources', message)
+        self.assertGreater(mock_debug.call_count, 1)
+
+    def test_log_available_resources_disabled(self):
+        ctx = self.mock_ctx('test_log_available_resources_disabled')
+        current_ctx.set(ctx=ctx)
+        self.addCleanup(ctx.logger.setLevel, ctx.logger.level)
+        ctx.logger.setLevel(logging.DEBUG)
+        fetch = mock.Mock(return_value=['Resource:0'])
+        with mock.patch.dict(os.environ, {
+                constants.AVAILABLE_RESOURCES_LOG_LIMIT_ENV_VAR_NAME: '0'}):
+            utils.log_available_resources(fetch)
+        self.assertFalse(fetch.called)
+        utils.log_available_resources(fetch)
+        fetch.assert_called_once_with(
+            constants.AVAILABLE_RESOURCES_LOG_LIMIT)
+
+    def test_runtime_property_collection(self):
+        ctx = self.mock_ctx('test_runtime_property_collection')
+        current_ctx.set(ctx=ctx)
+        ctx.instance.runtime_properties['instance_list'] = ['i-1', 'i-2']
+        collection = utils.get_runtime_property_collection(
+            ctx.instance, 'instance_list')
+        self.assertIs(collection, utils.get_runtime_property_collection(
+            ctx.instance, 'instance_list'))
+
+        self.assertIn('i-2', collection)
+        self.assertTrue(collection.add('i-3'))
+        self.assertFalse(collection.add('i-1'))
+        self.assertTrue(collection.remove('i-2'))
+        self.assertFalse(collection.remove('i-4'))
+        self.assertEqual(['i-1', 'i-3'],
+                         ctx.instance.runtime_properties['instance_list'])
+        self.assertEqual(['i-1', 'i-3'], json.loads(json.dumps(
+            ctx.instance.runtime_properties['instance_list'])))
+
+        ctx.instance.runtime_properties['instance_list'] = ['i-5']
+        self.assertNotIn('i-1', collection)
+        self.assertEqual(['i-5'], list(collection))
+
+    def test_runtime_property_collection_deduplicates(self):
+        ctx = self.mock_ctx('test_runtime_property_collection_deduplicates')
+        current_ctx.set(ctx=ctx)
+        ctx.instance.runtime_properties['instance_list'] = \
+            ['i-1', 'i-2', 'i-1']
+        collection = utils.RuntimePropertyCollection(
+            ctx.instance, 'instance_list')
+
+        self.assertEqual(['i-1', 'i-2'], list(collection))
+        self.assertFalse(collection.add('i-2'))
+        self.assertEqual(['i-1', 'i-2', 'i-1'],
+                         ctx.instance.runtime_properties['instance_list'])
+        self.assertTrue(collection.add('i-3'))
+        self.assertFalse(collection.add('i-3'))
+        self.assertEqual(['i-1', 'i-2', 'i-3'],
+                         ctx.instance.runtime_properties['instance_list'])
+
+    def test_runtime_property_collection_keeps_its_index(self):
+        ctx = self.mock_ctx('test_runtime_property_collection_index')
+        current_ctx.set(ctx=ctx)
+        ctx.instance.runtime_properties['instance_list'] = \
+            ['i-{0}'.format(number) for number in range(100)]
+        key = mock.Mock(side_effect=lambda item: item)
+        self.assertTrue(utils.RuntimePropertyCollection(
+            ctx.instance, 'instance_list', key=key).add('i-100'))
+        self.assertEqual(101, key.call_count)
+
+        # a later operation reads the runtime properties from storage
+        runtime_properties = json.loads(json.dumps(
+            ctx.instance.runtime_properties))
+        ctx.instance.runtime_properties.clear()
+        ctx.instance.runtime_properties.update(runtime_properties)
+        key.reset_mock()
+        collection = utils.RuntimePropertyCollection(
+            ctx.instance, 'instance_list', key=key)
+
+        self.assertTrue(collection.remove('i-50'))
+        self.assertNotIn('i-50', collection)
+        self.assertIn('i-99', collection)
+        self.assertLess(key.call_count, 10)
+        items = ctx.instance.runtime_properties['instance_list']
+        self.assertEqual(100, len(items))
+        self.assertEqual('i-100', items[50])
+        self.assertEqual(
+            dict((item, position) for position, item in enumerate(items)),
+            ctx.instance.runtime_properties['instance_list_index'])
+
+    def test_runtime_property_collection_rebuilds_a_stale_index(self):
+        ctx = self.mock_ctx('test_runtime_property_collection_stale')
+        current_ctx.set(ctx=ctx)
+        collection = utils.RuntimePropertyCollection(
+            ctx.instance, 'instance_list')
+        collection.add('i-1')
+        collection.add('i-2')
+        # changed without the collection, keeping the length
+        ctx.instance.runtime_properties['instance_list'] = ['i-2', 'i-3']
+
+        self.assertNotIn('i-1', collection)
+        self.assertTrue(collection.remove('i-2'))
+        self.assertEqual(['i-3'],
+                         ctx.instance.runtime_properties['instance_list'])
+
+    def test_runtime_property_collection_of_dicts(self):
+        ctx = self.mock_ctx('test_runtime_property_collection_of_dicts')
+        current_ctx.set(ctx=ctx)
+        collection = utils.RuntimePropertyCollection(
+            ctx.instance, 'routes',
+            key=lambda route: json.dumps(route, sort_keys=True))
+        route = {'destination_cidr_block': '10.0.0.0/16',
+                 'gateway_id': 'igw-1'}
+        self.assertTrue(collection.add(route))
+        self.assertIn(dict(route), collection)
+        self.assertEqual(1, len(collection))
+        self.assertTrue(collection.remove(dict(route)))
+        self.assertEqual([], ctx.instance.runtime_properties['routes'])
+
     @mock_ec2
     def test_get_provider_variable(self):
         ctx = self.mock_ctx('test_get_provider_variables')
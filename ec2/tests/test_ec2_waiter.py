@@ -0,0 +1,63 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+# Built-in Imports
+import os
+import testtools
+
+# Third Party Imports
+import mock
+
+# Cloudify Imports is imported and used in operations
+from ec2 import waiter
+from ec2 import constants
+from cloudify.state import current_ctx
+from cloudify.mocks import MockCloudifyContext
+
+
+class TestWaiter(testtools.TestCase):
+
+    def setUp(self):
+        super(TestWaiter, self).setUp()
+        current_ctx.set(ctx=MockCloudifyContext(node_id='test_waiter'))
+
+    @mock.patch('ec2.waiter.time.sleep')
+    def test_done_on_first_poll(self, mock_sleep):
+        poll = mock.Mock(return_value=16)
+        self.assertEqual(16, waiter.wait_for(poll, lambda s: s == 16))
+        self.assertEqual(1, poll.call_count)
+        self.assertFalse(mock_sleep.called)
+
+    def test_backs_off_until_done(self):
+        sleeps = []
+        poll = mock.Mock(side_effect=[0, 0, 0, 0, 16])
+        with mock.patch('ec2.waiter.time.sleep', side_effect=sleeps.append):
+            self.assertEqual(16, waiter.wait_for(
+                poll, lambda s: s == 16, time_budget=1000))
+        self.assertEqual(4, len(sleeps))
+        self.assertLessEqual(sleeps[0], constants.WAITER_INITIAL_INTERVAL)
+        for sleep in sleeps:
+            self.assertLessEqual(sleep, constants.WAITER_MAX_INTERVAL)
+        self.assertGreater(
+            sleeps[-1], constants.WAITER_INITIAL_INTERVAL / 2.0)
+
+    @mock.patch('ec2.waiter.time.sleep')
+    def test_budget_exhausted(self, mock_sleep):
+        poll = mock.Mock(return_value=0)
+        with mock.patch.dict(os.environ, {
+                constants.WAITER_TIME_BUDGET_ENV_VAR_NAME: '0'}):
+            self.assertEqual(0, waiter.wait_for(poll, lambda s: s == 16))
+        self.assertEqual(1, poll.call_count)
+        self.assertFalse(mock_sleep.called)
@@ -15,12 +15,19 @@
 
 # Built-in Imports
 import os
+import logging
+import weakref
+import itertools
 
 # Cloudify Imports
 from ec2 import constants
 from cloudify import ctx
+from cloudify.state import current_ctx
 from cloudify.exceptions import NonRecoverableError
 
+# Caches that live only as long as the operation context that created them.
+_operation_caches = weakref.WeakKeyDictionary()
+
 
 def validate_node_property(key, ctx_node_properties):
     """Checks if the node property exists in the blueprint.
@@ -33,16 +40,63 @@ def validate_node_property(key, ctx_node_properties):
             '{0} is a required input. Unable to create.'.format(key))
 
 
-def log_available_resources(list_of_resources):
+def get_operation_cache(cache_name):
+    """Returns a dictionary that is shared by everything running in the
+    current operation and discarded together with its context.
+
+    :param cache_name: A string naming the cache.
+    :returns a dict.
+    """
+
+    caches = _operation_caches.setdefault(current_ctx.get_ctx(), {})
+    return caches.setdefault(cache_name, {})
+
+
+def get_available_resources_log_limit():
+    """Returns how many available resources are logged when a resource
+    is not found. 0 disables these diagnostics.
+    """
+
+    return int(os.environ.get(
+        constants.AVAILABLE_RESOURCES_LOG_LIMIT_ENV_VAR_NAME,
+        constants.AVAILABLE_RESOURCES_LOG_LIMIT))
+
+
+def log_available_resources(list_of_resources, limit=None):
     """This logs a list of available resources.
+
+    At most limit resources are logged, a few lines per log message.
+
+    :param list_of_resources: An iterable of resources, or a callable that
+    takes limit and returns one, so that nothing is fetched when these
+    diagnostics are disabled or debug logging is off.
+    :param limit: Defaults to get_available_resources_log_limit().
     """
 
-    message = 'Available resources: \n'
+    if limit is None:
+        limit = get_available_resources_log_limit()
+
+    if limit <= 0 or not ctx.logger.isEnabledFor(logging.DEBUG):
+        return
 
-    for resource in list_of_resources:
-        message = '{0}{1}\n'.format(message, resource)
+    if callable(list_of_resources):
+        list_of_resources = list_of_resources(limit)
 
-    ctx.logger.debug(message)
+    lines = ['Available resources: ']
+
+    for index, resource in enumerate(
+            itertools.islice(list_of_resources, limit + 1)):
+        if index == limit:
+            lines.append('(more than {0} resources, the rest are not '
+                         'listed)'.format(limit))
+            break
+        lines.append('{0}'.format(resource))
+        if len(lines) >= constants.AVAILABLE_RESOURCES_LOG_LINES:
+            ctx.logger.debug('\n'.join(lines))
+            lines = []
+
+    if lines:
+        ctx.logger.debug('\n'.join(lines))
 
 
 def get_external_resource_id_or_raise(operation, ctx_instance):
@@ -84,6 +138,146 @@ def set_external_resource_id(value, ctx_instance, external=True):
     ctx_instance.runtime_properties[constants.EXTERNAL_RESOURCE_ID] = value
 
 
+class RuntimePropertyCollection(object):
+    """A collection kept in a list runtime property, with an index of
+    item key to list position saved beside it, in the runtime property
+    RUNTIME_PROPERTY_INDEX_NAME.
+
+    The list is still saved as a plain list, so deployments created
+    before this class existed and code that reads the list directly keep
+    working. Their index is built the first time the collection reads the
+    list, and rebuilt only if the index no longer matches the list, for
+    example after the list was changed without the collection.
+
+    Membership tests, adds and removes take O(1): each computes the key
+    of one or two items and changes one entry of the list and the index.
+    Items are kept in the order they were added, except that a remove
+    moves the last item into the place of the removed one.
+
+    The collection holds at most one item per key: add does not append an
+    item whose key is already in the collection, and a list saved with
+    duplicates is written back without them on the next add or remove.
+    """
+
+    def __init__(self, ctx_instance, property_name, key=None):
+        """
+        :param ctx_instance: The CTX Node-Instance Context.
+        :param property_name: The name of the list runtime property.
+        :param key: Returns the key of an item as a string, because the
+        index is saved as JSON. Defaults to the item itself.
+        """
+
+        self.ctx_instance = ctx_instance
+        self.property_name = property_name
+        self.index_name = constants.RUNTIME_PROPERTY_INDEX_NAME.format(
+            property_name)
+        self.key = key or (lambda item: item)
+
+    def add(self, item):
+        """Appends item, unless an item with the same key is already in
+        the collection.
+
+        :returns True if the item was added, False if it is a duplicate.
+        """
+
+        item_key = self.key(item)
+        items, index = self._load(item_key)
+
+        if item_key in index:
+            return False
+
+        index[item_key] = len(items)
+        items.append(item)
+        self._save(items, index)
+        return True
+
+    def remove(self, item):
+        """Removes the item with the key of item, if there is one.
+
+        :returns True if the item was removed.
+        """
+
+        item_key = self.key(item)
+        items, index = self._load(item_key)
+
+        if item_key not in index:
+            return False
+
+        position = index.pop(item_key)
+        last_item = items.pop()
+        if position < len(items):
+            items[position] = last_item
+            index[self.key(last_item)] = position
+        self._save(items, index)
+        return True
+
+    def __contains__(self, item):
+        item_key = self.key(item)
+        return item_key in self._load(item_key)[1]
+
+    def __iter__(self):
+        return iter(self._load()[0])
+
+    def __len__(self):
+        return len(self._load()[0])
+
+    def _load(self, item_key=None):
+        """Returns the saved list and index, rebuilding the index if it
+        does not match the list. The position of item_key, if indexed,
+        is checked against the list.
+        """
+
+        runtime_properties = self.ctx_instance.runtime_properties
+        items = runtime_properties.get(self.property_name)
+        index = runtime_properties.get(self.index_name)
+
+        if items is None:
+            return [], {}
+
+        if index is not None and len(index) == len(items):
+            position = index.get(item_key)
+            if position is None or (position < len(items) and self.key(
+                    items[position]) == item_key):
+                return items, index
+
+        index = {}
+        unique_items = []
+        for item in items:
+            key = self.key(item)
+            if key not in index:
+                index[key] = len(unique_items)
+                unique_items.append(item)
+        if len(unique_items) == len(items):
+            unique_items = items
+        return unique_items, index
+
+    def _save(self, items, index):
+        # assigning the values also marks the runtime properties as changed
+        self.ctx_instance.runtime_properties[self.property_name] = items
+        self.ctx_instance.runtime_properties[self.index_name] = index
+
+
+def get_runtime_property_collection(ctx_instance, property_name, key=None):
+    """Returns the RuntimePropertyCollection of a list runtime property,
+    shared by the callers of the same operation.
+
+    :param ctx_instance: The CTX Node-Instance Context.
+    :param property_name: The name of the list runtime property.
+    :param key: See RuntimePropertyCollection.
+    :returns a RuntimePropertyCollection.
+    """
+
+    collections = get_operation_cache(
+        constants.RUNTIME_PROPERTY_COLLECTION_CACHE)
+    cache_key = (ctx_instance.id, property_name)
+
+    if cache_key not in collections:
+        collections[cache_key] = RuntimePropertyCollection(
+            ctx_instance, property_name, key)
+
+    return collections[cache_key]
+
+
 def unassign_runtime_properties_from_resource(property_names, ctx_instance):
     for property_name in property_names:
         if property_name in ctx_instance.runtime_properties:
@@ -0,0 +1,70 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+# Built-in Imports
+import os
+import time
+import random
+
+# Cloudify imports
+from ec2 import constants
+from cloudify import ctx
+
+
+def get_time_budget():
+    """Returns how many seconds an operation may wait in-process for a
+    state transition before falling back to ctx.operation.retry.
+    """
+
+    return float(os.environ.get(constants.WAITER_TIME_BUDGET_ENV_VAR_NAME,
+                                constants.WAITER_TIME_BUDGET))
+
+
+def wait_for(poll, is_done, time_budget=None):
+    """Polls until is_done(poll()) or the time budget runs out.
+
+    The first poll is made right away. After that the interval starts
+    at WAITER_INITIAL_INTERVAL and grows by WAITER_BACKOFF_FACTOR, with
+    jitter, up to WAITER_MAX_INTERVAL.
+
+    :param poll: Returns the current value, for example a state code.
+    :param is_done: Returns True if a polled value is the one waited for.
+    :param time_budget: Seconds to wait for. Defaults to get_time_budget().
+    :returns the last polled value.
+    """
+
+    if time_budget is None:
+        time_budget = get_time_budget()
+
+    started = time.time()
+    deadline = started + time_budget
+    interval = constants.WAITER_INITIAL_INTERVAL
+    polls = 1
+    value = poll()
+
+    while not is_done(value):
+        sleep = random.uniform(interval / 2.0, interval)
+        if time.time() + sleep > deadline:
+            ctx.logger.debug(
+                'Stopped waiting after {0} polls in {1:.1f} seconds.'
+                .format(polls, time.time() - started))
+            break
+        time.sleep(sleep)
+        interval = min(constants.WAITER_MAX_INTERVAL,
+                       interval * constants.WAITER_BACKOFF_FACTOR)
+        polls += 1
+        value = poll()
+
+    return value
@@ -23,6 +23,7 @@ from boto.vpc import VPCConnection
 from boto.ec2.elb import connect_to_region as connect_to_elb_region
 from boto.exception import EC2ResponseError
 
+from ec2 import pagination
 from cosmo_tester.framework.handlers import (
     BaseHandler,
     BaseCloudifyInputsConfigReader)
@@ -408,15 +409,24 @@ class EC2Handler(BaseHandler):
             'region': region
         }
 
+    def _iterate(self, client, resource_type, **kwargs):
+        return pagination.iterate_resources(
+            client, resource_type, retry_errors=False, **kwargs)
+
+    def _default_vpc(self, vpc_client):
+        return next((vpc for vpc in self._iterate(vpc_client, 'vpc')
+                     if vpc.is_default), None)
+
     def _security_groups(self, ec2_client):
         return [(security_group.id, security_group.id)
-                for security_group in ec2_client.get_all_security_groups()
+                for security_group in self._iterate(
+                    ec2_client, 'security_group')
                 if 'default' not in security_group.name]
 
     def _instances(self, ec2_client):
-        return [(instance[0].id, instance[0].id)
-                for instance in
-                [res.instances for res in ec2_client.get_all_reservations()]]
+        return [(instance.id, instance.id)
+                for instance in pagination.iterate_instances(
+                    ec2_client, retry_errors=False)]
 
     def _key_pairs(self, ec2_client):
         return [(kp.name, kp.name)
@@ -428,40 +438,35 @@ class EC2Handler(BaseHandler):
 
     def _volumes(self, ec2_client):
         return [(vol.id, vol.id)
-                for vol in ec2_client.get_all_volumes()]
+                for vol in self._iterate(ec2_client, 'volume')]
 
     def _snapshots(self, ec2_client):
         return [(ss.id, ss.id)
-                for ss in ec2_client.get_all_snapshots(owner='self')]
+                for ss in self._iterate(ec2_client, 'snapshot',
+                                        params={'Owner.1': 'self'})]
 
     def _elbs(self, elb_client):
         return [(elb.name, elb.name)
-                for elb in elb_client.get_all_load_balancers()]
+                for elb in pagination.iterate_load_balancers(
+                    elb_client, retry_errors=False)]
 
     def _vpcs(self, vpc_client):
         return [(vpc.id, vpc.id)
-                for vpc in vpc_client.get_all_vpcs()
+                for vpc in self._iterate(vpc_client, 'vpc')
                 if not vpc.is_default]
 
     def _subnets(self, vpc_client):
-        default_vpc = ''
-        vpcs = vpc_client.get_all_vpcs()
-        for vpc in vpcs:
-            if vpc.is_default:
-                default_vpc = vpc.id
+        default_vpc = self._default_vpc(vpc_client)
+        default_vpc_id = default_vpc.id if default_vpc else ''
         return [(subnet.id, subnet.id)
-                for subnet in vpc_client.get_all_subnets()
-                if subnet.vpc_id != default_vpc]
+                for subnet in self._iterate(vpc_client, 'subnet')
+                if subnet.vpc_id != default_vpc_id]
 
     def _internet_gateways(self, vpc_client):
-        default_vpc_id = ''
-        all_vpcs = vpc_client.get_all_vpcs()
-        all_internet_gateways = vpc_client.get_all_internet_gateways()
+        default_vpc = self._default_vpc(vpc_client)
+        default_vpc_id = default_vpc.id if default_vpc else ''
         not_default_internet_gateways = []
-        for vpc in all_vpcs:
-            if vpc.is_default:
-                default_vpc_id = vpc.id
-        for ig in all_internet_gateways:
+        for ig in self._iterate(vpc_client, 'internet_gateway'):
             for attachment in ig.attachments:
                 if attachment.vpc_id != default_vpc_id:
                     not_default_internet_gateways.append((ig.id, ig.id))
@@ -476,34 +481,25 @@ class EC2Handler(BaseHandler):
                 for customer_gateway in vpc_client.get_all_customer_gateways()]
 
     def _network_acls(self, vpc_client):
-        default_vpc = ''
-        vpcs = vpc_client.get_all_vpcs()
-        for vpc in vpcs:
-            if vpc.is_default:
-                default_vpc = vpc.id
+        default_vpc = self._default_vpc(vpc_client)
+        default_vpc_id = default_vpc.id if default_vpc else ''
         return [(network_acl.id, network_acl.id)
-                for network_acl in vpc_client.get_all_network_acls()
-                if network_acl.vpc_id != default_vpc]
+                for network_acl in self._iterate(vpc_client, 'network_acl')
+                if network_acl.vpc_id != default_vpc_id]
 
     def _dhcp_options_sets(self, vpc_client):
-        default_dopt = ''
-        vpcs = vpc_client.get_all_vpcs()
-        for vpc in vpcs:
-            if vpc.is_default:
-                default_dopt = vpc.dhcp_options_id
+        default_vpc = self._default_vpc(vpc_client)
+        default_dopt = default_vpc.dhcp_options_id if default_vpc else ''
         return [(dopt.id, dopt.id) for dopt
-                in vpc_client.get_all_dhcp_options()
+                in self._iterate(vpc_client, 'dhcp_options')
                 if dopt.id != default_dopt]
 
     def _route_tables(self, vpc_client):
-        default_vpc = ''
-        vpcs = vpc_client.get_all_vpcs()
-        for vpc in vpcs:
-            if vpc.is_default:
-                default_vpc = vpc.id
+        default_vpc = self._default_vpc(vpc_client)
+        default_vpc_id = default_vpc.id if default_vpc else ''
         return [(rtb.id, rtb.id) for rtb
-                in vpc_client.get_all_route_tables()
-                if rtb.vpc_id != default_vpc and not any(
+                in self._iterate(vpc_client, 'route_table')
+                if rtb.vpc_id != default_vpc_id and not any(
                 association.main for association in rtb.associations)]
 
     def _remove_keys(self, dct, keys):
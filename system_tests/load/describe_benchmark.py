@@ -0,0 +1,196 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""Describe response parsing benchmark.
+
+Compares the boto object path, which parses a describe response with the
+SAX handler of boto into Instance and InstanceStatus objects, with the
+records of ec2.fastdescribe (AWS_FAST_DESCRIBE=1). The responses are
+those of an in-process moto account with the given number of instances,
+so only parsing is measured, not the API calls.
+
+Example:
+
+    python -m system_tests.load.describe_benchmark --instances 5000
+"""
+
+# Built-in Imports
+import os
+import sys
+import time
+import argparse
+import xml.sax
+
+# Third Party Imports
+from moto import mock_ec2
+from boto.handler import XmlHandler
+from boto.resultset import ResultSet
+from boto.ec2 import EC2Connection
+from boto.ec2.instance import Reservation
+from boto.ec2.instancestatus import InstanceStatus
+
+# Cloudify Imports
+from ec2 import fastdescribe
+
+TEST_AMI_IMAGE_ID = 'ami-e214778a'
+# instances launched per RunInstances
+LAUNCH_BATCH_SIZE = 500
+
+
+def get_responses(instances):
+    """Launches instances in moto and returns the bodies of describing
+    all of them, by action.
+    """
+
+    ec2_client = EC2Connection()
+
+    for launched in range(0, instances, LAUNCH_BATCH_SIZE):
+        count = min(LAUNCH_BATCH_SIZE, instances - launched)
+        ec2_client.run_instances(
+            TEST_AMI_IMAGE_ID, min_count=count, max_count=count)
+
+    responses = {}
+    for action, params in [
+            ('DescribeInstances', {'MaxResults': instances}),
+            ('DescribeInstanceStatus', {'IncludeAllInstances': 'true'})]:
+        response = ec2_client.make_request(action, params, '/', 'POST')
+        responses[action] = response.read()
+    return ec2_client, responses
+
+
+def parse_with_boto(ec2_client, body, markers):
+    # as boto get_list does
+    result_set = ResultSet(markers)
+    xml.sax.parseString(body, XmlHandler(result_set, ec2_client))
+    return result_set
+
+
+def get_cases(ec2_client):
+    """Returns (action, parse with boto, parse into records) by action.
+    Both parsers return a list of the described items.
+    """
+
+    return [
+        ('DescribeInstances',
+         lambda body: [instance for reservation in parse_with_boto(
+             ec2_client, body, [('item', Reservation)])
+             for instance in reservation.instances],
+         lambda body: fastdescribe.parse(
+             body, fastdescribe.INSTANCE_ITEM_PATH,
+             fastdescribe.InstanceRecord)),
+        ('DescribeInstanceStatus',
+         lambda body: parse_with_boto(
+             ec2_client, body, [('item', InstanceStatus)]),
+         lambda body: fastdescribe.parse(
+             body, fastdescribe.INSTANCE_STATUS_ITEM_PATH,
+             fastdescribe.InstanceStatusRecord))]
+
+
+def get_best_seconds(parse, body, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.time()
+        parse(body)
+        seconds = time.time() - started
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def get_retained_bytes(item):
+    """The size of an item and of its attribute values, not counting
+    the objects nested in them.
+    """
+
+    if hasattr(item, '__dict__'):
+        values = item.__dict__.values()
+        size = sys.getsizeof(item.__dict__)
+    else:
+        values = [getattr(item, slot) for slot in item.__slots__]
+        size = 0
+    return size + sys.getsizeof(item) + sum(
+        sys.getsizeof(value) for value in values)
+
+
+def run(args):
+    report = []
+
+    with mock_ec2():
+        ec2_client, responses = get_responses(args.instances)
+
+        for action, boto_parse, fast_parse in get_cases(ec2_client):
+            body = responses[action]
+            boto_items = boto_parse(body)
+            records = fast_parse(body)
+            if [item.id for item in boto_items] != \
+                    [record.id for record in records]:
+                raise RuntimeError(
+                    '{0} was parsed into different items.'.format(action))
+
+            boto_seconds = get_best_seconds(boto_parse, body, args.repeat)
+            fast_seconds = get_best_seconds(fast_parse, body, args.repeat)
+            report.append(dict(
+                action=action,
+                items=len(records),
+                kilobytes=len(body) / 1024.0,
+                boto_seconds=boto_seconds,
+                fast_seconds=fast_seconds,
+                boto_item_bytes=sum(get_retained_bytes(item)
+                                    for item in boto_items) / len(records),
+                fast_item_bytes=sum(get_retained_bytes(record)
+                                    for record in records) / len(records)))
+
+    return report
+
+
+def format_report(report):
+    lines = ['  {0:<24} {1:>7} {2:>9} {3:>9} {4:>9} {5:>8} {6:>11} {7:>11}'
+             .format('action', 'items', 'KB', 'boto', 'records', 'speedup',
+                     'boto B/item', 'rec B/item')]
+    for case in report:
+        lines.append(
+            '  {0:<24} {1:>7} {2:>9.0f} {3:>9.3f} {4:>9.3f} {5:>7.1f}x '
+            '{6:>11} {7:>11}'.format(
+                case['action'], case['items'], case['kilobytes'],
+                case['boto_seconds'], case['fast_seconds'],
+                case['boto_seconds'] / case['fast_seconds'],
+                case['boto_item_bytes'], case['fast_item_bytes']))
+    return '\n'.join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Compares parsing describe responses into boto '
+                    'objects and into fastdescribe records.')
+    parser.add_argument('--instances', type=int, default=2000,
+                        help='Instances in the described responses.')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Parses of every response; the fastest is '
+                             'reported.')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # moto accepts any credentials, boto only needs some
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'describe-benchmark')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'describe-benchmark')
+
+    print(format_report(run(args)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
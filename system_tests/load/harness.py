@@ -0,0 +1,695 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""Synthetic large deployment load harness.
+
+Installs and uninstalls a generated deployment of instances, volumes and
+ELB members through the plugin's operations, against an in-process moto
+account that is pre-populated with background resources. Every API call
+can be delayed and a share of them fail with throttling errors. The
+report shows the throughput of every workflow phase, the tail latency of
+every operation and the API calls made, per action.
+
+Example:
+
+    python -m system_tests.load.harness --instances 300 \\
+        --background-instances 3000 --latency 0.05 --throttle-rate 0.02 \\
+        --workers 32 --output report.json
+
+Cloudify runs the operations of a node instance in the order of the
+blueprint's graph; the harness approximates it by running one operation
+of one node type at a time, with all of its node instances in parallel.
+"""
+
+# Built-in Imports
+import os
+import sys
+import json
+import time
+import uuid
+import Queue
+import random
+import logging
+import argparse
+import threading
+
+# Third Party Imports
+from moto import mock_ec2
+from moto import mock_elb
+from boto.ec2 import EC2Connection
+from boto.ec2.elb import ELBConnection
+from boto.connection import AWSQueryConnection
+
+# Cloudify Imports is imported and used in operations
+from ec2 import ebs
+from ec2 import metrics
+from ec2 import instance
+from ec2 import constants
+from ec2 import ratelimit
+from ec2 import securitygroup
+from ec2 import elasticloadbalancer
+from cloudify.mocks import MockContext
+from cloudify.mocks import MockCloudifyContext
+from cloudify.exceptions import NonRecoverableError
+
+IMAGE_ID = 'ami-e214778a'
+INSTANCE_TYPE = 't1.micro'
+ZONE = 'us-east-1a'
+DEVICE = '/dev/sdf'
+PERCENTILES = [50, 95, 99]
+THROTTLED_EC2_BODY = '<Response><Errors><Error><Code>RequestLimitExceeded' \
+    '</Code><Message>Request limit exceeded.</Message></Error></Errors>' \
+    '</Response>'
+THROTTLED_ELB_BODY = '<ErrorResponse><Error><Type>Sender</Type>' \
+    '<Code>Throttling</Code><Message>Rate exceeded</Message></Error>' \
+    '</ErrorResponse>'
+
+
+class ThrottledResponse(object):
+    """A throttling error response. AWS sends them with status 400, which
+    boto returns from make_request and the get_* methods then raise.
+    """
+
+    status = 400
+    reason = 'Bad Request'
+
+    def __init__(self, body):
+        self.body = body
+
+    def read(self, amt=None):
+        return self.body
+
+    def getheader(self, name, default=None):
+        if name.lower() == 'content-length':
+            return str(len(self.body))
+        return default
+
+
+class FaultInjector(object):
+    """Delays every API call and fails a share of them with throttling
+    errors, underneath the plugin's rate limiter, metrics and retries.
+
+    The in-process moto backend is not thread safe, so the calls reach it
+    one at a time and their responses are read before the next one is
+    sent; the injected latency is what overlaps between calls.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, throttle_rate=0.0,
+                 seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.calls = 0
+        self.throttled = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._backend_lock = threading.Lock()
+        self._make_request = None
+
+    def install(self):
+        self._make_request = AWSQueryConnection.make_request
+        make_request = self._make_request
+        injector = self
+
+        def make_request_with_faults(connection, action, *args, **kwargs):
+            throttled_response = injector.inject(connection, action)
+            if throttled_response is not None:
+                return throttled_response
+            with injector._backend_lock:
+                response = make_request(connection, action, *args, **kwargs)
+                # boto caches the body of the response on the first read
+                response.read()
+            return response
+
+        AWSQueryConnection.make_request = make_request_with_faults
+
+    def uninstall(self):
+        if self._make_request is not None:
+            AWSQueryConnection.make_request = self._make_request
+            self._make_request = None
+
+    def inject(self, connection, action):
+        """Waits for the injected latency.
+
+        :returns a ThrottledResponse for the calls to throttle, else None.
+        """
+
+        with self._lock:
+            delay = max(0.0, self.latency + self._random.uniform(
+                -self.jitter, self.jitter))
+            throttle = self._random.random() < self.throttle_rate
+            self.calls += 1
+            if throttle:
+                self.throttled += 1
+
+        if delay:
+            time.sleep(delay)
+
+        if not throttle:
+            return None
+        if isinstance(connection, ELBConnection):
+            return ThrottledResponse(THROTTLED_ELB_BODY)
+        return ThrottledResponse(THROTTLED_EC2_BODY)
+
+    def get_counters(self):
+        with self._lock:
+            return dict(calls=self.calls, throttled=self.throttled)
+
+
+class NodeInstance(object):
+    """A node instance of the generated deployment, which keeps its
+    runtime properties from one operation to the next.
+    """
+
+    def __init__(self, node, index, properties, type_hierarchy=None):
+        self.node = node
+        self.id = '{0}_{1:05d}'.format(node, index)
+        self.properties = properties
+        self.type_hierarchy = type_hierarchy or ['cloudify.nodes.Root']
+        self.runtime_properties = {}
+        self.relationships = []
+
+    def get_context(self, deployment_id, execution_id, retry_number=0):
+        ctx = MockCloudifyContext(
+            node_id=self.id,
+            node_name=self.node,
+            deployment_id=deployment_id,
+            execution_id=execution_id,
+            properties=self.properties,
+            runtime_properties=self.runtime_properties,
+            operation={'retry_number': retry_number})
+        ctx.node.type_hierarchy = self.type_hierarchy
+        ctx.instance.relationships = [
+            MockContext({'type': relationship_type,
+                         'target': target.get_context(
+                             deployment_id, execution_id)})
+            for relationship_type, target in self.relationships]
+        return ctx
+
+    def save(self, ctx):
+        self.runtime_properties = ctx.instance.runtime_properties
+
+
+class Task(object):
+    """One operation of one node instance, or of the relationship of a
+    source node instance to a target node instance.
+    """
+
+    def __init__(self, name, operation, node_instance, target=None,
+                 kwargs=None):
+        self.name = name
+        self.operation = operation
+        self.node_instance = node_instance
+        self.target = target
+        self.kwargs = kwargs or {}
+        self.attempts = 0
+        self.started = None
+
+    def run(self, deployment_id, execution_id):
+        self.attempts += 1
+        retry_number = self.attempts - 1
+        source_ctx = self.node_instance.get_context(
+            deployment_id, execution_id, retry_number)
+
+        if self.target is None:
+            ctx = source_ctx
+        else:
+            target_ctx = self.target.get_context(deployment_id, execution_id)
+            ctx = MockCloudifyContext(
+                node_id='{0}->{1}'.format(self.node_instance.id,
+                                          self.target.id),
+                deployment_id=deployment_id,
+                execution_id=execution_id,
+                source=source_ctx,
+                target=target_ctx,
+                operation={'retry_number': retry_number})
+
+        try:
+            self.operation(ctx=ctx, **self.kwargs)
+        finally:
+            self.node_instance.save(source_ctx)
+            if self.target is not None:
+                self.target.save(target_ctx)
+
+
+class Workflow(object):
+    """Runs the tasks of every phase on a pool of workers and times them.
+
+    A task that fails with anything but a NonRecoverableError goes back
+    to the queue after its retry_after, capped at max_retry_interval, like
+    the manager reschedules it, and its worker moves on to the next task.
+    """
+
+    def __init__(self, name, deployment_id, workers, task_retries,
+                 max_retry_interval):
+        self.name = name
+        self.deployment_id = deployment_id
+        self.execution_id = str(uuid.uuid4())
+        self.workers = workers
+        self.task_retries = task_retries
+        self.max_retry_interval = max_retry_interval
+        self.phases = []
+        self.durations = {}
+        self.retries = {}
+        self.failures = []
+        self._lock = threading.Lock()
+
+    def run_phase(self, name, tasks):
+        if not tasks:
+            return
+
+        logging.info('%s: %s x%d', self.name, name, len(tasks))
+        queue = Queue.Queue()
+        pending = [len(tasks)]
+        for task in tasks:
+            queue.put(task)
+
+        started = time.time()
+        threads = [threading.Thread(target=self._work, args=(queue, pending))
+                   for _ in range(min(self.workers, len(tasks)))]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.phases.append(dict(name=name, operations=len(tasks),
+                                seconds=time.time() - started))
+
+    def _work(self, queue, pending):
+        while True:
+            with self._lock:
+                if not pending[0]:
+                    return
+            try:
+                task = queue.get(timeout=0.1)
+            except Queue.Empty:
+                continue
+            if self._execute(task, queue):
+                with self._lock:
+                    pending[0] -= 1
+
+    def _execute(self, task, queue):
+        """Runs one attempt of a task.
+
+        :returns whether the task is done, because it succeeded or failed.
+        """
+
+        if task.started is None:
+            task.started = time.time()
+
+        try:
+            task.run(self.deployment_id, self.execution_id)
+        except NonRecoverableError as e:
+            return self._fail(task, e)
+        except Exception as e:
+            # like the workflow engine, retry everything else
+            if task.attempts > self.task_retries:
+                return self._fail(task, e)
+            with self._lock:
+                self.retries[task.name] = self.retries.get(task.name, 0) + 1
+            retry_after = min(getattr(e, 'retry_after', None) or
+                              self.max_retry_interval,
+                              self.max_retry_interval)
+            timer = threading.Timer(retry_after, queue.put, [task])
+            timer.daemon = True
+            timer.start()
+            return False
+
+        with self._lock:
+            self.durations.setdefault(task.name, []).append(
+                time.time() - task.started)
+        return True
+
+    def _fail(self, task, error):
+        logging.error('%s failed for %s: %s', task.name,
+                      task.node_instance.id, error)
+        with self._lock:
+            self.failures.append(dict(operation=task.name,
+                                      node_instance=task.node_instance.id,
+                                      error=str(error)))
+        return True
+
+    def get_report(self):
+        seconds = sum(phase['seconds'] for phase in self.phases)
+        operations = sum(phase['operations'] for phase in self.phases)
+        return dict(
+            seconds=seconds,
+            operations=operations,
+            operations_per_second=operations / seconds if seconds else 0.0,
+            failures=self.failures,
+            phases=[dict(phase, operations_per_second=phase['operations'] /
+                         phase['seconds'] if phase['seconds'] else 0.0)
+                    for phase in self.phases],
+            latency=dict(
+                (name, get_latency_summary(durations,
+                                           self.retries.get(name, 0)))
+                for name, durations in self.durations.items()))
+
+
+class Deployment(object):
+    """A security group, instances with one volume each and a load
+    balancer that all of the instances are members of.
+    """
+
+    def __init__(self, instances, batch_launch=True):
+        self.id = 'load-{0}'.format(uuid.uuid4().hex[:8])
+        self.security_group = NodeInstance('security_group', 0, dict(
+            get_common_properties(),
+            resource_id='{0}-sg'.format(self.id),
+            description='Load harness security group.',
+            rules=[dict(ip_protocol='tcp', from_port=port, to_port=port,
+                        cidr_ip='0.0.0.0/0') for port in [22, 80]]))
+        self.load_balancer = NodeInstance('load_balancer', 0, dict(
+            get_common_properties(),
+            elb_name=self.id,
+            zones=ZONE,
+            listeners=[[80, 8080, 'http']],
+            security_groups=[],
+            health_checks=[{'target': 'HTTP:8080/health'}]))
+        self.vms = [NodeInstance('vm', index, dict(
+            get_common_properties(),
+            image_id=IMAGE_ID,
+            instance_type=INSTANCE_TYPE,
+            name='{0}-vm'.format(self.id),
+            batch_launch=batch_launch,
+            cloudify_agent={},
+            agent_config={},
+            use_password=False,
+            parameters=dict(placement=ZONE)),
+            ['cloudify.aws.nodes.Instance', 'cloudify.nodes.Compute'])
+            for index in range(instances)]
+        self.volumes = [NodeInstance('volume', index, dict(
+            get_common_properties(),
+            size=1,
+            zone=ZONE,
+            device=DEVICE)) for index in range(instances)]
+
+        for vm in self.vms:
+            vm.relationships.append(
+                (constants.INSTANCE_SECURITY_GROUP_RELATIONSHIP,
+                 self.security_group))
+
+    def install(self, workflow, validate=False):
+        if validate:
+            workflow.run_phase('vm.creation_validation', [
+                Task('vm.creation_validation', instance.creation_validation,
+                     vm) for vm in self.vms])
+            workflow.run_phase('volume.creation_validation', [
+                Task('volume.creation_validation', ebs.creation_validation,
+                     volume) for volume in self.volumes])
+        workflow.run_phase('security_group.create', [
+            Task('security_group.create', securitygroup.create,
+                 self.security_group)])
+        workflow.run_phase('vm.run_instances', [
+            Task('vm.run_instances', instance.run_instances, vm)
+            for vm in self.vms])
+        workflow.run_phase('vm.start', [
+            Task('vm.start', instance.start, vm) for vm in self.vms])
+        workflow.run_phase('volume.create', [
+            Task('volume.create', ebs.create, volume, kwargs=dict(args={}))
+            for volume in self.volumes])
+        workflow.run_phase('volume.attach', [
+            Task('volume.attach', ebs.attach, volume, target=vm)
+            for volume, vm in zip(self.volumes, self.vms)])
+        workflow.run_phase('load_balancer.create_elb', [
+            Task('load_balancer.create_elb', elasticloadbalancer.create_elb,
+                 self.load_balancer)])
+        workflow.run_phase('vm.add_instance_to_elb', [
+            Task('vm.add_instance_to_elb',
+                 elasticloadbalancer.add_instance_to_elb, vm,
+                 target=self.load_balancer) for vm in self.vms])
+
+    def uninstall(self, workflow):
+        workflow.run_phase('vm.remove_instance_from_elb', [
+            Task('vm.remove_instance_from_elb',
+                 elasticloadbalancer.remove_instance_from_elb, vm,
+                 target=self.load_balancer) for vm in self.vms])
+        workflow.run_phase('load_balancer.delete_elb', [
+            Task('load_balancer.delete_elb', elasticloadbalancer.delete_elb,
+                 self.load_balancer)])
+        workflow.run_phase('volume.detach', [
+            Task('volume.detach', ebs.detach, volume, target=vm,
+                 kwargs=dict(args=dict(force=True)))
+            for volume, vm in zip(self.volumes, self.vms)])
+        workflow.run_phase('volume.delete', [
+            Task('volume.delete', ebs.delete, volume)
+            for volume in self.volumes])
+        workflow.run_phase('vm.stop', [
+            Task('vm.stop', instance.stop, vm) for vm in self.vms])
+        workflow.run_phase('vm.terminate', [
+            Task('vm.terminate', instance.terminate, vm) for vm in self.vms])
+        workflow.run_phase('security_group.delete', [
+            Task('security_group.delete', securitygroup.delete,
+                 self.security_group)])
+
+
+class QuietFilter(logging.Filter):
+    """Drops the log records of the operations, which are expected to
+    fail and retry under load.
+    """
+
+    def filter(self, record):
+        return False
+
+
+def get_common_properties():
+    return {
+        constants.AWS_CONFIG_PROPERTY: {},
+        'use_external_resource': False,
+        'resource_id': ''
+    }
+
+
+def populate_background(instances=0, volumes=0, security_groups=0,
+                        load_balancers=0, launch_size=500):
+    """Creates resources that the deployment does not own, so that
+    every describe call of the plugin has to skip over them.
+    """
+
+    ec2_client = EC2Connection()
+    elb_client = ELBConnection()
+
+    launched = 0
+    while launched < instances:
+        count = min(launch_size, instances - launched)
+        ec2_client.run_instances(IMAGE_ID, min_count=count, max_count=count,
+                                 instance_type=INSTANCE_TYPE,
+                                 placement=ZONE)
+        launched += count
+    for _ in range(volumes):
+        ec2_client.create_volume(1, ZONE)
+    for index in range(security_groups):
+        ec2_client.create_security_group(
+            'background-{0}'.format(index), 'Background security group.')
+    for index in range(load_balancers):
+        elb_client.create_load_balancer(
+            'background-{0}'.format(index), [ZONE], [(80, 8080, 'http')])
+
+
+def get_percentile(sorted_values, percentile):
+    if not sorted_values:
+        return 0.0
+    index = int(round(percentile / 100.0 * len(sorted_values) + 0.5)) - 1
+    return sorted_values[max(0, min(index, len(sorted_values) - 1))]
+
+
+def get_latency_summary(durations, retries=0):
+    durations = sorted(durations)
+    summary = dict(('p{0}'.format(percentile),
+                    get_percentile(durations, percentile))
+                   for percentile in PERCENTILES)
+    summary.update(count=len(durations), retries=retries,
+                   max=durations[-1] if durations else 0.0)
+    return summary
+
+
+def get_api_report(injector):
+    actions = metrics.process_metrics.get_counters()
+    totals = dict((name, sum(counters[name] for counters in actions.values()))
+                  for name in ['calls', 'errors', 'throttles', 'retries'])
+    return dict(
+        totals=totals,
+        actions=dict((action, dict(
+            (name, counters[name]) for name in
+            ['calls', 'errors', 'throttles', 'retries', 'seconds',
+             'max_seconds'])) for action, counters in actions.items()),
+        injected=injector.get_counters(),
+        rate_limiter=ratelimit.rate_limiter.get_wait_counters())
+
+
+def format_report(report):
+    lines = []
+    for name in ['install', 'uninstall']:
+        workflow = report['workflows'].get(name)
+        if workflow is None:
+            continue
+        lines.append(
+            '{0}: {1} operations in {2:.1f}s ({3:.1f} ops/s), {4} failed'
+            .format(name, workflow['operations'], workflow['seconds'],
+                    workflow['operations_per_second'],
+                    len(workflow['failures'])))
+        lines.append('  {0:<32} {1:>6} {2:>8} {3:>8} {4:>8} {5:>8} {6:>8}'
+                     .format('phase', 'count', 'retries', 'p50', 'p95',
+                             'p99', 'max'))
+        for phase in workflow['phases']:
+            latency = workflow['latency'].get(phase['name'])
+            if latency is None:
+                lines.append('  {0:<32} {1:>6} all failed'.format(
+                    phase['name'], phase['operations']))
+                continue
+            lines.append(
+                '  {0:<32} {1:>6} {2:>8} {3:>8.3f} {4:>8.3f} {5:>8.3f} '
+                '{6:>8.3f}  {7:.1f} ops/s'.format(
+                    phase['name'], latency['count'], latency['retries'],
+                    latency['p50'], latency['p95'], latency['p99'],
+                    latency['max'], phase['operations_per_second']))
+
+    api = report['api']
+    lines.append(
+        'API calls: {0} ({1} errors, {2} throttled, {3} retried), '
+        '{4} throttles injected'.format(
+            api['totals']['calls'], api['totals']['errors'],
+            api['totals']['throttles'], api['totals']['retries'],
+            api['injected']['throttled']))
+    lines.append('  {0:<36} {1:>6} {2:>8} {3:>8} {4:>8} {5:>8}'.format(
+        'action', 'calls', 'throttle', 'retries', 'mean', 'max'))
+    for action, counters in sorted(api['actions'].items()):
+        lines.append(
+            '  {0:<36} {1:>6} {2:>8} {3:>8} {4:>8.3f} {5:>8.3f}'.format(
+                action, counters['calls'], counters['throttles'],
+                counters['retries'],
+                counters['seconds'] / counters['calls'],
+                counters['max_seconds']))
+    for action_class, counters in sorted(api['rate_limiter'].items()):
+        lines.append(
+            'Rate limiter {0}: {1} of {2} calls waited {3:.1f}s in total, '
+            '{4:.2f}s at most'.format(
+                action_class, counters['waits'], counters['calls'],
+                counters['wait_seconds'], counters['max_wait']))
+    return '\n'.join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Installs and uninstalls a generated deployment '
+                    'against moto with injected latency and throttling.')
+    parser.add_argument('--instances', type=int, default=100,
+                        help='Instances in the deployment, each with a '
+                             'volume and a load balancer membership.')
+    parser.add_argument('--background-instances', type=int, default=1000)
+    parser.add_argument('--background-volumes', type=int, default=1000)
+    parser.add_argument('--background-security-groups', type=int,
+                        default=1000)
+    parser.add_argument('--background-load-balancers', type=int,
+                        default=100)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Seconds added to every API call.')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='The added latency varies by up to this '
+                             'many seconds.')
+    parser.add_argument('--throttle-rate', type=float, default=0.0,
+                        help='Share of API calls that fail with a '
+                             'throttling error.')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=16,
+                        help='Operations that run at the same time.')
+    parser.add_argument('--task-retries', type=int, default=60)
+    parser.add_argument('--max-retry-interval', type=float, default=1.0,
+                        help='Caps the retry_after of retried operations.')
+    parser.add_argument('--no-batch-launch', action='store_true')
+    parser.add_argument('--no-rate-limit', action='store_true',
+                        help='Disables the rate limiter of the plugin.')
+    parser.add_argument('--validate', action='store_true',
+                        help='Runs creation_validation before install.')
+    parser.add_argument('--skip-uninstall', action='store_true')
+    parser.add_argument('--output', help='Writes the report as JSON.')
+    parser.add_argument('--verbose', action='store_true')
+    return parser.parse_args(argv)
+
+
+def run(args):
+    deployment = Deployment(args.instances,
+                            batch_launch=not args.no_batch_launch)
+    injector = FaultInjector(args.latency, args.jitter, args.throttle_rate,
+                             args.seed)
+    report = dict(arguments=vars(args), workflows={})
+
+    with mock_ec2(), mock_elb():
+        started = time.time()
+        populate_background(args.background_instances,
+                            args.background_volumes,
+                            args.background_security_groups,
+                            args.background_load_balancers)
+        report['background_seconds'] = time.time() - started
+        logging.info('Populated the background resources in %.1fs.',
+                     report['background_seconds'])
+
+        metrics.process_metrics.reset()
+        ratelimit.rate_limiter.reset_wait_counters()
+        injector.install()
+        try:
+            workflows = [('install', lambda workflow: deployment.install(
+                workflow, args.validate))]
+            if not args.skip_uninstall:
+                workflows.append(('uninstall', deployment.uninstall))
+            for name, run_workflow in workflows:
+                workflow = Workflow(name, deployment.id, args.workers,
+                                    args.task_retries,
+                                    args.max_retry_interval)
+                run_workflow(workflow)
+                report['workflows'][name] = workflow.get_report()
+                if workflow.failures:
+                    break
+        finally:
+            injector.uninstall()
+
+    report['api'] = get_api_report(injector)
+    return report
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    if not args.verbose:
+        # every mock context sets the level of its logger again
+        for logger_name in ['mock-context-logger', 'boto']:
+            logging.getLogger(logger_name).addFilter(QuietFilter())
+
+    # metrics files of a single process are not useful here
+    os.environ.setdefault(constants.METRICS_DIR_ENV_VAR_NAME, '')
+    if args.no_rate_limit:
+        os.environ[constants.RATE_LIMITS_ENV_VAR_NAME] = json.dumps(
+            dict.fromkeys(constants.RATE_LIMITS.keys()))
+    # moto accepts any credentials, boto only needs some
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'load-harness')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'load-harness')
+
+    report = run(args)
+    print(format_report(report))
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2, sort_keys=True)
+
+    failed = any(workflow['failures']
+                 for workflow in report['workflows'].values())
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
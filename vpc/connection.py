@@ -19,8 +19,11 @@ from boto.vpc import VPCConnection
 
 # Cloudify imports
 from ec2.connection import EC2ConnectionClient
+from ec2.connection import connection_registry, get_connection_key
 from ec2 import utils as ec2_utils
 from ec2 import constants
+from ec2 import metrics
+from ec2 import ratelimit
 
 
 class VPCConnectionClient(EC2ConnectionClient):
@@ -33,6 +36,17 @@ class VPCConnectionClient(EC2ConnectionClient):
 
         aws_config_property = (self._get_aws_config_property(aws_config) or
                                self._get_aws_config_from_file())
+
+        return connection_registry.get(
+            get_connection_key(
+                self.__class__.__name__, aws_config_property),
+            lambda: ratelimit.install(metrics.install(
+                self._connect(aws_config_property))))
+
+    def _connect(self, aws_config_property):
+        """Creates a new VPCConnection for the given aws_config.
+        """
+
         if not aws_config_property:
             return VPCConnection()
         elif aws_config_property.get('ec2_region_name'):
@@ -17,6 +17,7 @@ EXTERNAL_RESOURCE_ID = 'aws_resource_id'
 AVAILABILITY_ZONE = 'availability_zone'
 AWS_CONFIG_PROPERTY = 'aws_config'
 ROUTE_NOT_FOUND_ERROR = 'InvalidRoute.NotFound'
+TRUST_RUNTIME_RESOURCE_IDS = True
 
 VPC = dict(
     AWS_RESOURCE_TYPE='vpc',
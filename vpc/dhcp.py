@@ -17,7 +17,7 @@
 from . import constants
 from core.base import AwsBaseNode, AwsBaseRelationship
 from cloudify import ctx
-from cloudify.decorators import operation
+from ec2.metrics import operation
 
 
 @operation
@@ -61,7 +61,8 @@ class DhcpAssociation(AwsBaseRelationship):
             vpc_id=self.target_resource_id
         )
         return self.execute(self.client.associate_dhcp_options,
-                            associate_args, raise_on_falsy=True)
+                            associate_args, raise_on_falsy=True,
+                            retry_not_found=True)
 
     def disassociate(self):
         disassociate_args = self.generate_disassociate_args()
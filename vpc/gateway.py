@@ -18,7 +18,7 @@ from ec2 import utils as ec2_utils
 from . import constants
 from core.base import AwsBaseNode, AwsBaseRelationship
 from cloudify import ctx
-from cloudify.decorators import operation
+from ec2.metrics import operation
 
 
 @operation
@@ -104,7 +104,8 @@ class VpnConnection(AwsBaseRelationship):
     def associate(self):
         associate_args = self.generate_associate_args(self.routes)
         vpn_connection = self.execute(self.client.create_vpn_connection,
-                                      associate_args, raise_on_falsy=True)
+                                      associate_args, raise_on_falsy=True,
+                                      retry_not_found=True)
         ctx.source.instance.runtime_properties['vpn_connection'] = \
             vpn_connection.id
         ctx.source.instance.runtime_properties['vpn_gateway'] = \
@@ -115,7 +116,8 @@ class VpnConnection(AwsBaseRelationship):
             for route in self.routes:
                 args = self.generate_route_args(vpn_connection.id, route)
                 self.execute(self.client.create_vpn_connection_route,
-                             args, raise_on_falsy=True)
+                             args, raise_on_falsy=True,
+                             retry_not_found=True)
                 ctx.source.instance.runtime_properties['routes'].append(route)
         return True
 
@@ -190,7 +192,8 @@ class GatewayVpcAttachment(AwsBaseRelationship):
 
     def associate(self):
         return self.execute(self.attachment_function,
-                            self.attachment_args, raise_on_falsy=True)
+                            self.attachment_args, raise_on_falsy=True,
+                            retry_not_found=True)
 
     def disassociate(self):
         return self.execute(self.detachment_function,
@@ -18,7 +18,7 @@ from ec2 import utils as ec2_utils
 from . import constants
 from core.base import AwsBaseNode, AwsBaseRelationship
 from cloudify import ctx
-from cloudify.decorators import operation
+from ec2.metrics import operation
 from cloudify.exceptions import NonRecoverableError
 
 
@@ -70,7 +70,8 @@ class NetworkAclSubnetAssociation(AwsBaseRelationship):
         )
         self.association_id = \
             self.execute(self.client.associate_network_acl,
-                         assoicate_args, raise_on_falsy=True)
+                         assoicate_args, raise_on_falsy=True,
+                         retry_not_found=True)
         return True
 
     def disassociate(self):
@@ -107,7 +108,8 @@ class NetworkAcl(AwsBaseNode):
     def create(self):
         create_args = self.generate_create_args()
         network_acl = self.execute(self.client.create_network_acl,
-                                   create_args, raise_on_falsy=True)
+                                   create_args, raise_on_falsy=True,
+                                   retry_not_found=True)
         self.resource_id = network_acl.id
         ctx.instance.runtime_properties['vpc_id'] = create_args['vpc_id']
         self.add_entries_to_network_acl()
@@ -119,16 +121,10 @@ class NetworkAcl(AwsBaseNode):
         vpc_ids = \
             self.get_target_ids_of_relationship_type(
                 constants.NETWORK_ACL_IN_VPC_RELATIONSHIP, relationships)
-        if not len(vpc_ids) == 1:
+        if not len(vpc_ids) == 1 or not vpc_ids[0]:
             raise NonRecoverableError(
                 'network acl can only be connected to one vpc')
-        vpc = \
-            self.filter_for_single_resource(
-                self.client.get_all_vpcs,
-                {'vpc_ids': vpc_ids[0]},
-                constants.VPC['NOT_FOUND_ERROR']
-            )
-        create_args = dict(vpc_id=vpc.id)
+        create_args = dict(vpc_id=vpc_ids[0])
         return create_args
 
     def add_entries_to_network_acl(self):
@@ -144,7 +140,8 @@ class NetworkAcl(AwsBaseNode):
     def create_network_acl_entry(self, args):
         ctx.logger.info('create network acl entry {0}'.format(args))
         return self.execute(self.client.create_network_acl_entry,
-                            args, raise_on_falsy=True)
+                            args, raise_on_falsy=True,
+                            retry_not_found=True)
 
     def delete(self):
         delete_args = dict(network_acl_id=self.resource_id)
@@ -17,9 +17,8 @@
 from . import constants
 from core.base import AwsBaseNode, AwsBaseRelationship, RouteMixin
 from cloudify import ctx
-from cloudify.decorators import operation
+from ec2.metrics import operation
 from cloudify.exceptions import NonRecoverableError
-from ec2 import utils as ec2_utils
 
 
 @operation
@@ -118,7 +117,8 @@ class RouteTableSubnetAssociation(AwsBaseRelationship):
         )
         self.association_id = \
             self.execute(self.client.associate_route_table,
-                         associate_args, raise_on_falsy=True)
+                         associate_args, raise_on_falsy=True,
+                         retry_not_found=True)
         return True
 
     def disassociate(self):
@@ -161,7 +161,8 @@ class RouteTable(AwsBaseNode, RouteMixin):
         create_args = self._generate_creation_args()
         route_table = \
             self.execute(self.client.create_route_table,
-                         create_args, raise_on_falsy=True)
+                         create_args, raise_on_falsy=True,
+                         retry_not_found=True)
         self.resource_id = route_table.id
         for route in self.routes:
             self.create_route(route_table.id, route, ctx.instance)
@@ -191,11 +192,7 @@ class RouteTable(AwsBaseNode, RouteMixin):
         vpc = self.get_containing_vpc()
         ctx.instance.runtime_properties['vpc_id'] = vpc.id
         ctx.instance.runtime_properties['routes'] = self.routes
-        ec2_utils.set_external_resource_id(self.resource_id, ctx.instance)
-        ctx.logger.info(
-            'Added {0} {1} to Cloudify.'
-            .format(self.aws_resource_type, self.resource_id))
-        return True
+        return super(RouteTable, self).post_create()
 
     def delete(self):
         for route in self.routes:
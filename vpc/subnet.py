@@ -17,7 +17,7 @@
 from . import constants
 from core.base import AwsBaseNode
 from cloudify import ctx
-from cloudify.decorators import operation
+from ec2.metrics import operation
 from cloudify.exceptions import NonRecoverableError
 
 
@@ -52,7 +52,8 @@ class Subnet(AwsBaseNode):
     def create(self):
         create_args = self._generate_creation_args()
         subnet = self.execute(self.client.create_subnet,
-                              create_args, raise_on_falsy=True)
+                              create_args, raise_on_falsy=True,
+                              retry_not_found=True)
         self.resource_id = subnet.id
         return True
 
@@ -64,18 +65,12 @@ class Subnet(AwsBaseNode):
         vpc_ids = self.get_target_ids_of_relationship_type(
             constants.SUBNET_IN_VPC, relationships)
 
-        if not len(vpc_ids) == 1:
+        if not len(vpc_ids) == 1 or not vpc_ids[0]:
             raise NonRecoverableError(
                 'subnet can only be connected to one vpc')
 
-        vpc = self.filter_for_single_resource(
-            self.client.get_all_vpcs,
-            {'vpc_ids': vpc_ids[0]},
-            constants.VPC['NOT_FOUND_ERROR']
-        )
-
         create_args = dict(
-            vpc_id=vpc.id,
+            vpc_id=vpc_ids[0],
             cidr_block=ctx.node.properties['cidr_block']
         )
 
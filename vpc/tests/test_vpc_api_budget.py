@@ -0,0 +1,269 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+# Built-in Imports
+import os
+
+# Third-party Imports
+from moto import mock_ec2
+
+# Cloudify Imports
+from vpc import vpc
+from vpc import dhcp
+from vpc import subnet
+from vpc import gateway
+from vpc import constants
+from vpc import networkacl
+from vpc import routetable
+from vpc_testcase import VpcTestCase
+from vpc_testcase import (
+    VPC_TYPE,
+    SUBNET_TYPE,
+    INTERNET_GATEWAY_TYPE,
+    VPN_GATEWAY_TYPE,
+    CUSTOMER_GATEWAY_TYPE,
+    ACL_TYPE,
+    DHCP_OPTIONS_TYPE,
+    ROUTE_TABLE_TYPE
+)
+from ec2.tests.api_budget import ApiBudgetTestCase
+from cloudify.state import current_ctx
+from cloudify.mocks import MockContext
+from cloudify.mocks import MockCloudifyContext
+
+
+class TestVpcApiBudget(ApiBudgetTestCase, VpcTestCase):
+    """Checks the API calls of the lifecycle operations of every VPC
+    node type against vpc/tests/api_budget.json.
+
+    Deleting customer gateways and DHCP options is not measured, because
+    moto answers these calls with False, and VPC peering needs a second
+    account. VPN connections are measured with the default inputs, so
+    without static routes.
+    """
+
+    budget_path = os.path.join(os.path.dirname(__file__), 'api_budget.json')
+
+    def mock_ctx(self, test_name, node_type, properties=None,
+                 relationships=None):
+        test_properties = self.get_mock_node_properties(properties)
+        test_properties['resource_id'] = ''
+
+        ctx = self.mock_node_context(
+            test_name, test_properties, relationships)
+        ctx.node.type = node_type
+        ctx.node.type_hierarchy = [node_type, 'cloudify.nodes.Root']
+        current_ctx.set(ctx=ctx)
+        return ctx
+
+    def mock_relationship_ctx(self, test_name, source, target):
+        ctx = MockCloudifyContext(
+            node_id=test_name, source=source, target=target)
+        current_ctx.set(ctx=ctx)
+        return ctx
+
+    def contained_in(self, relationship_type, target):
+        return MockContext({'type': relationship_type, 'target': target})
+
+    def create_vpc_node(self, test_name):
+        ctx = self.mock_ctx(test_name, VPC_TYPE,
+                            self.vpc_node_template_properties({}))
+        ctx.instance.runtime_properties[constants.EXTERNAL_RESOURCE_ID] = \
+            self.create_vpc(self.create_client()).id
+        return ctx
+
+    def create_subnet_node(self, test_name, vpc_ctx):
+        ctx = self.mock_ctx(test_name, SUBNET_TYPE,
+                            self.subnet_node_template_properties({}))
+        ctx.instance.runtime_properties[constants.EXTERNAL_RESOURCE_ID] = \
+            self.create_client().create_subnet(
+                vpc_id=vpc_ctx.instance.runtime_properties[
+                    constants.EXTERNAL_RESOURCE_ID],
+                cidr_block='11.0.0.0/25').id
+        return ctx
+
+    @mock_ec2
+    def test_vpc_lifecycle(self):
+        ctx = self.mock_ctx('test_vpc_lifecycle', VPC_TYPE,
+                            self.vpc_node_template_properties({}))
+
+        self.measure('vpc.vpc.creation_validation',
+                     vpc.creation_validation, ctx=ctx)
+        self.measure('vpc.vpc.create_vpc', vpc.create_vpc, ctx=ctx)
+        self.measure('vpc.vpc.delete', vpc.delete, ctx=ctx)
+
+    @mock_ec2
+    def test_subnet_lifecycle(self):
+        vpc_ctx = self.create_vpc_node('test_subnet_lifecycle_vpc')
+        ctx = self.mock_ctx(
+            'test_subnet_lifecycle', SUBNET_TYPE,
+            self.subnet_node_template_properties(
+                {'cidr_block': '11.0.0.0/25'}),
+            [self.contained_in(constants.SUBNET_IN_VPC, vpc_ctx)])
+
+        self.measure('vpc.subnet.creation_validation',
+                     subnet.creation_validation, ctx=ctx)
+        self.measure('vpc.subnet.create_subnet', subnet.create_subnet,
+                     ctx=ctx)
+        self.measure('vpc.subnet.delete_subnet', subnet.delete_subnet,
+                     ctx=ctx)
+
+    @mock_ec2
+    def test_internet_gateway_lifecycle(self):
+        vpc_ctx = self.create_vpc_node('test_internet_gateway_lifecycle_vpc')
+        ctx = self.mock_ctx('test_internet_gateway_lifecycle',
+                            INTERNET_GATEWAY_TYPE)
+
+        self.measure('vpc.gateway.creation_validation.internet_gateway',
+                     gateway.creation_validation, ctx=ctx)
+        self.measure('vpc.gateway.create_internet_gateway',
+                     gateway.create_internet_gateway, ctx=ctx)
+        relationship_ctx = self.mock_relationship_ctx(
+            'test_internet_gateway_lifecycle_attachment', ctx, vpc_ctx)
+        self.measure('vpc.gateway.attach_gateway.internet_gateway',
+                     gateway.attach_gateway, ctx=relationship_ctx)
+        self.measure('vpc.gateway.detach_gateway.internet_gateway',
+                     gateway.detach_gateway, ctx=relationship_ctx)
+        self.measure('vpc.gateway.delete_internet_gateway',
+                     gateway.delete_internet_gateway, ctx=ctx)
+
+    @mock_ec2
+    def test_vpn_gateway_lifecycle(self):
+        vpc_ctx = self.create_vpc_node('test_vpn_gateway_lifecycle_vpc')
+        ctx = self.mock_ctx(
+            'test_vpn_gateway_lifecycle', VPN_GATEWAY_TYPE,
+            self.vpn_gateway_node_template_properties({}))
+        customer_ctx = self.mock_ctx(
+            'test_vpn_gateway_lifecycle_customer', CUSTOMER_GATEWAY_TYPE,
+            self.customer_gateway_node_template_properties({}))
+
+        self.measure('vpc.gateway.creation_validation.vpn_gateway',
+                     gateway.creation_validation, ctx=ctx)
+        self.measure('vpc.gateway.create_vpn_gateway',
+                     gateway.create_vpn_gateway, ctx=ctx)
+        self.measure('vpc.gateway.creation_validation.customer_gateway',
+                     gateway.creation_validation, ctx=customer_ctx)
+        self.measure('vpc.gateway.create_customer_gateway',
+                     gateway.create_customer_gateway, ctx=customer_ctx)
+        relationship_ctx = self.mock_relationship_ctx(
+            'test_vpn_gateway_lifecycle_attachment', ctx, vpc_ctx)
+        self.measure('vpc.gateway.attach_gateway.vpn_gateway',
+                     gateway.attach_gateway, ctx=relationship_ctx)
+        self.measure('vpc.gateway.detach_gateway.vpn_gateway',
+                     gateway.detach_gateway, ctx=relationship_ctx)
+        self.measure('vpc.gateway.delete_vpn_gateway',
+                     gateway.delete_vpn_gateway, ctx=ctx)
+
+    @mock_ec2
+    def test_vpn_connection_lifecycle(self):
+        ctx = self.mock_ctx(
+            'test_vpn_connection_lifecycle_vpn_gateway', VPN_GATEWAY_TYPE,
+            self.vpn_gateway_node_template_properties({}))
+        gateway.create_vpn_gateway(ctx=ctx)
+        customer_ctx = self.mock_ctx(
+            'test_vpn_connection_lifecycle_customer', CUSTOMER_GATEWAY_TYPE,
+            self.customer_gateway_node_template_properties({}))
+        gateway.create_customer_gateway(ctx=customer_ctx)
+
+        relationship_ctx = self.mock_relationship_ctx(
+            'test_vpn_connection_lifecycle', customer_ctx, ctx)
+        self.measure('vpc.gateway.create_vpn_connection',
+                     gateway.create_vpn_connection, routes=[],
+                     ctx=relationship_ctx)
+        self.measure('vpc.gateway.delete_vpn_connection',
+                     gateway.delete_vpn_connection, ctx=relationship_ctx)
+
+    @mock_ec2
+    def test_network_acl_lifecycle(self):
+        vpc_ctx = self.create_vpc_node('test_network_acl_lifecycle_vpc')
+        subnet_ctx = self.create_subnet_node(
+            'test_network_acl_lifecycle_subnet', vpc_ctx)
+        ctx = self.mock_ctx(
+            'test_network_acl_lifecycle', ACL_TYPE,
+            self.network_acl_node_template_properties({}),
+            [self.contained_in(
+                constants.NETWORK_ACL_IN_VPC_RELATIONSHIP, vpc_ctx)])
+
+        self.measure('vpc.networkacl.creation_validation',
+                     networkacl.creation_validation, ctx=ctx)
+        self.measure('vpc.networkacl.create_network_acl',
+                     networkacl.create_network_acl, ctx=ctx)
+        relationship_ctx = self.mock_relationship_ctx(
+            'test_network_acl_lifecycle_association', ctx, subnet_ctx)
+        self.measure('vpc.networkacl.associate_network_acl',
+                     networkacl.associate_network_acl, ctx=relationship_ctx)
+        self.measure('vpc.networkacl.disassociate_network_acl',
+                     networkacl.disassociate_network_acl,
+                     ctx=relationship_ctx)
+        self.measure('vpc.networkacl.delete_network_acl',
+                     networkacl.delete_network_acl, ctx=ctx)
+
+    @mock_ec2
+    def test_route_table_lifecycle(self):
+        vpc_ctx = self.create_vpc_node('test_route_table_lifecycle_vpc')
+        subnet_ctx = self.create_subnet_node(
+            'test_route_table_lifecycle_subnet', vpc_ctx)
+        gateway_ctx = self.mock_ctx(
+            'test_route_table_lifecycle_gateway', INTERNET_GATEWAY_TYPE,
+            {'cidr_block': '0.0.0.0/0'})
+        gateway_ctx.instance.runtime_properties[
+            constants.EXTERNAL_RESOURCE_ID] = \
+            self.create_internet_gateway(self.create_client()).id
+        ctx = self.mock_ctx(
+            'test_route_table_lifecycle', ROUTE_TABLE_TYPE,
+            relationships=[self.contained_in(
+                constants.ROUTE_TABLE_VPC_RELATIONSHIP, vpc_ctx)])
+
+        self.measure('vpc.routetable.creation_validation',
+                     routetable.creation_validation, ctx=ctx)
+        self.measure('vpc.routetable.create_route_table',
+                     routetable.create_route_table, [], ctx=ctx)
+        relationship_ctx = self.mock_relationship_ctx(
+            'test_route_table_lifecycle_association', ctx, subnet_ctx)
+        self.measure('vpc.routetable.associate_route_table',
+                     routetable.associate_route_table, ctx=relationship_ctx)
+        gateway_relationship_ctx = self.mock_relationship_ctx(
+            'test_route_table_lifecycle_route', ctx, gateway_ctx)
+        self.measure('vpc.routetable.create_route_to_gateway',
+                     routetable.create_route_to_gateway, '0.0.0.0/0',
+                     ctx=gateway_relationship_ctx)
+        self.measure('vpc.routetable.delete_route_from_gateway',
+                     routetable.delete_route_from_gateway,
+                     ctx=gateway_relationship_ctx)
+        self.measure('vpc.routetable.disassociate_route_table',
+                     routetable.disassociate_route_table,
+                     ctx=relationship_ctx)
+        self.measure('vpc.routetable.delete_route_table',
+                     routetable.delete_route_table, ctx=ctx)
+
+    @mock_ec2
+    def test_dhcp_options_lifecycle(self):
+        vpc_ctx = self.create_vpc_node('test_dhcp_options_lifecycle_vpc')
+        vpc_ctx.instance.runtime_properties['default_dhcp_options_id'] = \
+            self.create_dhcp_options(self.create_client()).id
+        ctx = self.mock_ctx(
+            'test_dhcp_options_lifecycle', DHCP_OPTIONS_TYPE,
+            self.dhcp_options_node_template_properties({}))
+
+        self.measure('vpc.dhcp.creation_validation',
+                     dhcp.creation_validation, ctx=ctx)
+        self.measure('vpc.dhcp.create_dhcp_options',
+                     dhcp.create_dhcp_options, ctx=ctx)
+        relationship_ctx = self.mock_relationship_ctx(
+            'test_dhcp_options_lifecycle_association', ctx, vpc_ctx)
+        self.measure('vpc.dhcp.associate_dhcp_options',
+                     dhcp.associate_dhcp_options, ctx=relationship_ctx)
+        self.measure('vpc.dhcp.restore_dhcp_options',
+                     dhcp.restore_dhcp_options, ctx=relationship_ctx)
@@ -19,9 +19,11 @@ import mock
 
 # Third-party Imports
 from moto import mock_ec2
+from boto.exception import EC2ResponseError
 
 # Cloudify Imports
 from vpc.vpc import (
+    Vpc,
     delete
 )
 from vpc.subnet import (
@@ -29,6 +31,7 @@ from vpc.subnet import (
     delete_subnet
 )
 from vpc.routetable import (
+    RouteTable,
     delete_route_table
 )
 from vpc.dhcp import (
@@ -90,6 +93,53 @@ class TestVpcModule(VpcTestCase):
             'vpc-0123abcd is not in this account',
             error.message)
 
+    @mock_ec2
+    def test_delete_trusted_vpc_id_is_not_described(self):
+        ctx = self.get_mock_vpc_node_instance_context(
+            'test_delete_trusted_vpc_id_is_not_described')
+        vpc = self.create_vpc(self.create_client())
+        ctx.instance.runtime_properties['aws_resource_id'] = vpc.id
+        with mock.patch('boto.vpc.VPCConnection.get_all_vpcs') \
+                as mock_get_all_vpcs:
+            delete(ctx=ctx)
+        self.assertFalse(mock_get_all_vpcs.called)
+        self.assertNotIn(
+            vpc.id, [existing.id
+                     for existing in self.create_client().get_all_vpcs()])
+
+    @mock_ec2
+    def test_not_found_is_only_retried_when_asked(self):
+        self.get_mock_vpc_node_instance_context(
+            'test_not_found_is_only_retried_when_asked')
+        not_found = EC2ResponseError(
+            400, 'Bad Request',
+            '<Response><Errors><Error><Code>InvalidVpcID.NotFound</Code>'
+            '</Error></Errors></Response>')
+        delete_vpc = mock.Mock(side_effect=not_found)
+
+        self.assertRaises(NonRecoverableError, Vpc().execute,
+                          delete_vpc, dict(vpc_id='vpc-0123abcd'))
+        self.assertEqual(1, delete_vpc.call_count)
+
+        delete_vpc.reset_mock()
+        delete_vpc.side_effect = [not_found, True]
+        with mock.patch('time.sleep'):
+            self.assertTrue(Vpc().execute(
+                delete_vpc, dict(vpc_id='vpc-0123abcd'),
+                retry_not_found=True))
+        self.assertEqual(2, delete_vpc.call_count)
+
+    @mock_ec2
+    def test_get_resource_without_id(self):
+        ctx = self.get_mock_vpc_node_instance_context(
+            'test_get_resource_without_id')
+        ctx.node.properties['resource_id'] = ''
+        with mock.patch('boto.vpc.VPCConnection.get_all_vpcs') \
+                as mock_get_all_vpcs:
+            self.assertIsNone(Vpc().get_resource())
+            self.assertEqual([], Vpc().get_all_matching())
+        self.assertFalse(mock_get_all_vpcs.called)
+
 
 class TestSubnetModule(VpcTestCase):
 
@@ -193,6 +243,36 @@ class TestRouteTableModule(VpcTestCase):
         self.assertNotIn(ctx.instance.runtime_properties,
                          constants.EXTERNAL_RESOURCE_ID)
 
+    @mock_ec2
+    def test_post_create_tags_route_table(self):
+        ctx = self.get_mock_route_table_node_instance_context(
+            'test_post_create_tags_route_table')
+        route_table = RouteTable()
+        route_table.resource_id = 'rtb-0123abcd'
+        with mock.patch.object(RouteTable, 'get_containing_vpc',
+                               return_value=self.Vpc()), \
+                mock.patch('ec2.tagging.tag_resource') as tag_resource:
+            self.assertTrue(route_table.post_create())
+        tag_resource.assert_called_once_with('rtb-0123abcd')
+        self.assertEqual(
+            'rtb-0123abcd',
+            ctx.instance.runtime_properties[constants.EXTERNAL_RESOURCE_ID])
+
+    @mock_ec2
+    def test_post_create_records_id_when_tagging_fails(self):
+        ctx = self.get_mock_route_table_node_instance_context(
+            'test_post_create_records_id_when_tagging_fails')
+        route_table = RouteTable()
+        route_table.resource_id = 'rtb-0123abcd'
+        with mock.patch.object(RouteTable, 'get_containing_vpc',
+                               return_value=self.Vpc()), \
+                mock.patch('ec2.tagging.tag_resource',
+                           side_effect=NonRecoverableError('tagging')):
+            self.assertRaises(NonRecoverableError, route_table.post_create)
+        self.assertEqual(
+            'rtb-0123abcd',
+            ctx.instance.runtime_properties[constants.EXTERNAL_RESOURCE_ID])
+
 
 class TestDhcpModule(VpcTestCase):
 
@@ -19,9 +19,10 @@ from boto import exception
 # Cloudify imports
 from . import constants
 from . import connection
+from ec2 import pagination
 from core.base import AwsBaseNode, AwsBaseRelationship, RouteMixin
 from cloudify import ctx
-from cloudify.decorators import operation
+from ec2.metrics import operation
 from cloudify.exceptions import NonRecoverableError, RecoverableError
 
 
@@ -112,7 +113,8 @@ class VpcPeeringConnection(AwsBaseRelationship, RouteMixin):
         ctx.logger.info('ARGS: {0}'.format(associate_args))
         vpc_peering_connection = \
             self.execute(self.client.create_vpc_peering_connection,
-                         associate_args, raise_on_falsy=True)
+                         associate_args, raise_on_falsy=True,
+                         retry_not_found=True)
         self.resource_id = vpc_peering_connection.id
 
         for route in self.routes:
@@ -213,27 +215,25 @@ class VpcPeeringConnection(AwsBaseRelationship, RouteMixin):
         at least one failed.
         """
 
-        source_vpc_cidr_block = ''
-
-        vpcs = self.execute(self.client.get_all_vpcs)
-        for vpc in vpcs:
-            if vpc.id == self.source_vpc_id:
-                source_vpc_cidr_block = vpc.cidr_block
+        source_vpc = next(self.iterate(pagination.iterate_resources(
+            self.client, 'vpc',
+            filters={'vpc-id': self.source_vpc_id})), None)
 
         new_route = dict(
-            destination_cidr_block=source_vpc_cidr_block,
+            destination_cidr_block=source_vpc.cidr_block
+            if source_vpc else '',
             vpc_peering_connection_id=self.source_vpc_peering_connection_id
         )
 
-        route_tables = self.execute(self.client.get_all_route_tables)
-        for route_table in route_tables:
-            if route_table.vpc_id == self.target_vpc_id:
-                route_created = self.create_route(
-                    route_table_id=route_table.id,
-                    route=new_route
-                )
-                if not route_created:
-                    return False
+        for route_table in self.iterate(pagination.iterate_resources(
+                self.client, 'route_table',
+                filters={'vpc-id': self.target_vpc_id})):
+            route_created = self.create_route(
+                route_table_id=route_table.id,
+                route=new_route
+            )
+            if not route_created:
+                return False
 
         return True
 
@@ -282,5 +282,6 @@ class Vpc(AwsBaseNode):
         return True
 
     def delete(self):
-        vpc = self.get_resource()
-        return self.execute(vpc.delete, raise_on_falsy=True)
+        delete_args = dict(vpc_id=self.resource_id)
+        return self.execute(self.client.delete_vpc,
+                            delete_args, raise_on_falsy=True)